@@ -1,12 +1,11 @@
 import sys
 import soundcard as sc
 import numpy as np
-import wave
-import speech_recognition as sr
-from googletrans import Translator
 from PyQt5.QtWidgets import QApplication, QWidget, QPushButton, QVBoxLayout, QTextEdit, QComboBox
 from PyQt5.QtCore import QThread, pyqtSignal
 import time
+import translation_cache
+from recognizers import GoogleRecognizerBackend
 
 class AudioRecorderThread(QThread):
     update = pyqtSignal(str, str)
@@ -16,11 +15,13 @@ class AudioRecorderThread(QThread):
         super().__init__()
         self.speaker = speaker
         self.is_recording = False
+        self.recognizer = GoogleRecognizerBackend()
+        # Un solo traductor con caché para toda la grabación, no uno por fragmento
+        self.translator = translation_cache.get_cached_translator()
 
     def run(self):
         SAMPLE_RATE = 44100
         CHUNK_DURATION = 10  # Duración de cada fragmento en segundos
-        OUTPUT_FILENAME = "grabacion_sistema_mono.wav"
 
         self.is_recording = True
         all_data = []
@@ -32,56 +33,41 @@ class AudioRecorderThread(QThread):
                 
                 # Procesar los últimos 30 segundos de audio
                 if len(all_data) >= 3:  # 3 chunks de 10 segundos = 30 segundos
-                    self.process_audio(np.concatenate(all_data[-3:]), SAMPLE_RATE, OUTPUT_FILENAME)
+                    self.process_audio(np.concatenate(all_data[-3:]), SAMPLE_RATE)
                     
         # Procesar los últimos fragmentos al finalizar
         if all_data:
-            self.process_audio(np.concatenate(all_data[-3:]), SAMPLE_RATE, OUTPUT_FILENAME)
+            self.process_audio(np.concatenate(all_data[-3:]), SAMPLE_RATE)
         
         self.finished.emit()
 
-    def process_audio(self, data, SAMPLE_RATE, OUTPUT_FILENAME):
-        byte_data = (data * 32767).astype(np.int16).tobytes()
-
-        with wave.open(OUTPUT_FILENAME, 'wb') as wf:
-            wf.setnchannels(1)
-            wf.setsampwidth(2)
-            wf.setframerate(SAMPLE_RATE)
-            wf.writeframes(byte_data)
-
-        r = sr.Recognizer()
-        with sr.AudioFile(OUTPUT_FILENAME) as source:
-            audio_data = r.record(source)
-
-
-            try:
-                texto = r.recognize_google(audio_data, language='pt-BR')  # Cambiar a portugués de Brasil
-                if texto.strip():  # Solo procesar si hay texto reconocido
-                    translator = Translator()
-                    translated_text = translator.translate(texto, src='pt', dest='es')  # Traducir de portugués a español
-                    self.update.emit(texto, translated_text.text)
-            except Exception as e:
-                self.update.emit(str(e), "")
-
-
-            # try:
-            #     texto = r.recognize_google(audio_data, language='en-EN')
-            #     if texto.strip():  # Solo procesar si hay texto reconocido
-            #         translator = Translator()
-            #         translated_text = translator.translate(texto, src='en', dest='es')
-            #         self.update.emit(texto, translated_text.text)
-            # except Exception as e:
-            #     self.update.emit(str(e), "")
-
-
-            # try:
-            #     texto = r.recognize_google(audio_data, language='es-ES')
-            #     if texto.strip():  # Solo procesar si hay texto reconocido
-            #         translator = Translator()
-            #         translated_text = translator.translate(texto, src='es', dest='en')
-            #         self.update.emit(texto, translated_text.text)
-            # except Exception as e:
-            #     self.update.emit(str(e), "")
+    def process_audio(self, data, SAMPLE_RATE):
+        # El PCM va directo al reconocedor, sin escribir y releer un WAV por cada ventana
+        try:
+            texto = self.recognizer.transcribe(data, "pt", SAMPLE_RATE)  # Portugués de Brasil
+            if texto.strip():  # Solo procesar si hay texto reconocido
+                translated_text = self.translator.translate(texto, src='pt', dest='es')  # Traducir de portugués a español
+                self.update.emit(texto, translated_text)
+        except Exception as e:
+            self.update.emit(str(e), "")
+
+
+        # try:
+        #     texto = self.recognizer.transcribe(data, "en", SAMPLE_RATE)
+        #     if texto.strip():  # Solo procesar si hay texto reconocido
+        #         translated_text = self.translator.translate(texto, src='en', dest='es')
+        #         self.update.emit(texto, translated_text)
+        # except Exception as e:
+        #     self.update.emit(str(e), "")
+
+
+        # try:
+        #     texto = self.recognizer.transcribe(data, "es", SAMPLE_RATE)
+        #     if texto.strip():  # Solo procesar si hay texto reconocido
+        #         translated_text = self.translator.translate(texto, src='es', dest='en')
+        #         self.update.emit(texto, translated_text)
+        # except Exception as e:
+        #     self.update.emit(str(e), "")
 
 
 
@@ -1,13 +1,11 @@
 import sys
 import soundcard as sc
 import numpy as np
-import io
-import wave
-import speech_recognition as sr
-from googletrans import Translator
 from PyQt5.QtWidgets import QApplication, QWidget, QPushButton, QVBoxLayout, QTextEdit, QComboBox
 from PyQt5.QtCore import QThread, pyqtSignal, QTimer
 import queue
+import translation_cache
+from recognizers import GoogleRecognizerBackend
 
 class AudioRecorderThread(QThread):
     def __init__(self, speaker, message_queue):
@@ -15,6 +13,9 @@ class AudioRecorderThread(QThread):
         self.speaker = speaker
         self.is_recording = False
         self.message_queue = message_queue
+        self.recognizer = GoogleRecognizerBackend()
+        # Un solo traductor con caché para toda la grabación, no uno por fragmento
+        self.translator = translation_cache.get_cached_translator()
 
     def run(self):
         SAMPLE_RATE = 44100
@@ -36,41 +37,18 @@ class AudioRecorderThread(QThread):
         # Agregar un mensaje a la cola
         self.message_queue.put("Procesando audio...")
 
-        # Convertir los datos de audio a bytes
-        byte_data = (data * 32767).astype(np.int16).tobytes()
-
-        # Crear un buffer en memoria para los datos de audio
-        audio_buffer = io.BytesIO()
-
-        # Escribir un archivo WAV en el buffer en memoria
-        with wave.open(audio_buffer, 'wb') as wf:
-            wf.setnchannels(1)
-            wf.setsampwidth(2)  # 2 bytes = 16 bits
-            wf.setframerate(SAMPLE_RATE)
-            wf.writeframes(byte_data)
-
-        # Mover el puntero al inicio del buffer
-        audio_buffer.seek(0)
-
-        # Usar el buffer directamente para el reconocimiento de voz
-        r = sr.Recognizer()
-
         try:
-            with sr.AudioFile(audio_buffer) as source:
-                self.message_queue.put("Reconociendo voz...")
-
-                audio_data = r.record(source)
-                self.message_queue.put("audio_data...")
-                texto = r.recognize_google(audio_data, language='pt-BR')
-                self.message_queue.put("texto...")
+            # El PCM int16 se entrega tal cual al reconocedor, sin codificar ni decodificar un WAV
+            self.message_queue.put("Reconociendo voz...")
+            texto = self.recognizer.transcribe(data, "pt", SAMPLE_RATE)
+            self.message_queue.put("texto...")
 
-                if texto.strip():
-                    translator = Translator()
-                    self.message_queue.put("Traduciendo texto...")
-                    translated_text = translator.translate(texto, src='pt', dest='es')
+            if texto.strip():
+                self.message_queue.put("Traduciendo texto...")
+                translated_text = self.translator.translate(texto, src='pt', dest='es')
 
-                    self.message_queue.put(f"Texto original: {texto}")
-                    self.message_queue.put(f"Texto traducido: {translated_text.text}")
+                self.message_queue.put(f"Texto original: {texto}")
+                self.message_queue.put(f"Texto traducido: {translated_text}")
 
         except Exception as e:
             self.message_queue.put(f"Error: {str(e)}")
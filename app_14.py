@@ -7,6 +7,7 @@ from PyQt5.QtWidgets import QApplication, QWidget, QPushButton, QVBoxLayout, QTe
 from PyQt5.QtCore import QThread, pyqtSignal, QTimer
 import queue
 import threading
+from model_cache import default_device
 
 class AudioRecorderThread(QThread):
     finished = pyqtSignal()
@@ -38,7 +39,8 @@ class AudioProcessorThread(QThread):
         super().__init__()
         self.audio_queue = audio_queue
         self.message_queue = message_queue
-        self.whisper_model = whisper.load_model("base").to("cuda")
+        # En equipos sin GPU el modelo se queda en CPU
+        self.whisper_model = whisper.load_model("base", device=default_device())
         self.input_language = input_language
         self.output_language = output_language
         self.translator = Translator()
@@ -57,7 +59,8 @@ class AudioProcessorThread(QThread):
             # Usar Whisper para transcripción
             result = self.whisper_model.transcribe(
                 audio_data, 
-                language=self.input_language
+                language=self.input_language,
+                fp16=self.whisper_model.device.type == "cuda"
             )
             texto_original = result["text"]
 
@@ -1,60 +1,103 @@
 import sys
 import soundcard as sc
-import numpy as np
-import whisper
-from googletrans import Translator
-from PyQt5.QtWidgets import QApplication, QWidget, QPushButton, QVBoxLayout, QGridLayout, QTextEdit, QComboBox, QLabel
+from PyQt5.QtWidgets import QApplication, QWidget, QPushButton, QVBoxLayout, QGridLayout, QTextEdit, QComboBox, QLabel, QCheckBox
 from PyQt5.QtCore import QThread, pyqtSignal, QTimer
 import queue
+import model_cache
+import translation_cache
+from model_warmup import ModelWarmupThread
+from session_recording import SessionRecording, transcribe_session
+from parallel_transcribe import transcribe_parallel
+from transcript_store import get_transcript_store
+
+PARALLEL_MIN_SECONDS = 120  # Por debajo, arrancar los procesos y cargar un modelo en cada uno no compensa
 
 class AudioRecorderThread(QThread):
     finished = pyqtSignal()
 
-    def __init__(self, speaker, message_queue, input_language, output_language, model_name):
+    def __init__(self, speaker, message_queue, input_language, output_language, model_name, parallel=False):
         super().__init__()
+        self.parallel = parallel
         self.speaker = speaker
         self.is_recording = False
         self.message_queue = message_queue
-        self.whisper_model = whisper.load_model(model_name)
+        self.model_name = model_name
+        self.whisper_model = None
         self.input_language = input_language
         self.output_language = output_language
-        self.translator = Translator()
+        self.translator = translation_cache.get_cached_translator()
+        self.transcript_store = get_transcript_store()
+        self.session_id = None
 
     def run(self):
         SAMPLE_RATE = 16000  # Whisper prefers 16kHz
         CHUNK_DURATION = 2  # Duration of each chunk in seconds
 
         self.is_recording = True
-        all_data = []
+        # Fijado en la caché hasta terminar de transcribir la sesión, que puede durar más que el tiempo de inactividad
+        self.whisper_model = model_cache.acquire_model(self.model_name)
 
-        with sc.get_microphone(id=self.speaker.id, include_loopback=True).recorder(samplerate=SAMPLE_RATE, channels=1) as mic:
-            while self.is_recording:
-                data = mic.record(numframes=SAMPLE_RATE * CHUNK_DURATION)
-                all_data.append(data)
+        try:
+            # El audio de la sesión va a disco por segmentos: la memoria no crece con la duración de la grabación
+            session = SessionRecording.create(sample_rate=SAMPLE_RATE)
+            if self.transcript_store is not None:
+                self.session_id = self.transcript_store.start_session(self.model_name, [self.speaker.name])
+            try:
+                with sc.get_microphone(id=self.speaker.id, include_loopback=True).recorder(samplerate=SAMPLE_RATE, channels=1) as mic:
+                    while self.is_recording:
+                        data = mic.record(numframes=SAMPLE_RATE * CHUNK_DURATION)
+                        session.write(data)
+            finally:
+                session.close()
 
-        if all_data:
-            self.process_audio(np.concatenate(all_data))
+            if session.total_samples:
+                if self.process_session(session):
+                    session.remove()
+                else:
+                    self.message_queue.put(f"El audio de la sesión se conserva en {session.directory}")
+            else:
+                session.remove()
+        finally:
+            if self.whisper_model is not None:
+                model_cache.release_model(self.model_name)
 
         self.finished.emit()
 
-    def process_audio(self, data):
+    def process_session(self, session):
+        # Se transcribe por ventanas leídas del archivo mapeado y cada resultado se muestra en cuanto está listo
         try:
-            audio_data = data.flatten().astype(np.float32)
-            result = self.whisper_model.transcribe(audio_data, language=self.input_language)
-            
-            texto_original = result["text"]
-
-            if texto_original.strip():
-                if self.output_language != self.input_language:
-                    self.message_queue.put("-----------------------------------")
-                    translated_text = self.translator.translate(texto_original, src=self.input_language, dest=self.output_language).text
-                    self.message_queue.put(f"{translated_text}")
-                else:
-                    self.message_queue.put("-----------------------------------")
-                    self.message_queue.put(f"{texto_original}")
-
+            if self.parallel and session.duration >= PARALLEL_MIN_SECONDS and self.whisper_model.device.type == "cpu":
+                # Piezas cortadas en los silencios y transcritas en varios procesos; se muestran en orden
+                self.message_queue.put("Transcribiendo la sesión en paralelo...")
+                # Cada proceso carga su propia copia: la del proceso principal se suelta antes de arrancarlos
+                self.whisper_model = None
+                model_cache.release_model(self.model_name)
+                model_cache.discard_model(self.model_name)
+                for segments in transcribe_parallel(session, self.model_name, self.input_language):
+                    if segments:
+                        self.publish(" ".join(segment["text"] for segment in segments), segments[0]["start"], segments[-1]["end"])
+            else:
+                for start, end, texto_original in transcribe_session(self.whisper_model, session, self.input_language):
+                    self.publish(texto_original, start, end)
+            return True
         except Exception as e:
             self.message_queue.put(f"Error: {str(e)}")
+            return False
+        finally:
+            session.release()
+
+    def publish(self, texto_original, start=None, end=None):
+        if texto_original.strip():
+            translated_text = None
+            if self.output_language != self.input_language:
+                self.message_queue.put("-----------------------------------")
+                translated_text = self.translator.translate(texto_original, src=self.input_language, dest=self.output_language)
+                self.message_queue.put(f"{translated_text}")
+            else:
+                self.message_queue.put("-----------------------------------")
+                self.message_queue.put(f"{texto_original}")
+            if self.transcript_store is not None:
+                self.transcript_store.add_segment(self.session_id, texto_original.strip(), translated_text, start, end, self.speaker.name, self.input_language, self.output_language, self.model_name)
 
     def stop(self):
         self.is_recording = False
@@ -68,6 +111,11 @@ class AudioTranslatorApp(QWidget):
         self.timer = QTimer()
         self.timer.timeout.connect(self.check_messages)
         self.timer.start(100)
+        self.ready_model = None
+        # Modelo preparado que se mantiene fijado en la caché mientras esté seleccionado
+        self.held_model = None
+        self.warmup_threads = []
+        QTimer.singleShot(0, self.warmUpModel)
 
     def initUI(self):
         layout = QVBoxLayout()
@@ -100,20 +148,24 @@ class AudioTranslatorApp(QWidget):
 
         # Combobox para seleccionar el modelo de Whisper
         self.modelCombo = QComboBox()
-        self.modelCombo.addItem("tiny")
-        self.modelCombo.addItem("base")
-        self.modelCombo.addItem("small")
-        self.modelCombo.addItem("medium")
-        self.modelCombo.addItem("large")
+        for model_name in model_cache.MODEL_CHOICES:
+            self.modelCombo.addItem(model_name)
+        self.modelCombo.currentTextChanged.connect(self.warmUpModel)
         grid_layout.addWidget(QLabel("Modelo IA:"), 1, 2)
         grid_layout.addWidget(self.modelCombo, 1, 3)
         
 
         layout.addLayout(grid_layout)
 
+        # Transcripción de sesiones largas en varios procesos al detener la grabación
+        self.parallelCheck = QCheckBox("Transcribir en paralelo al detener (sesiones largas, CPU)")
+        self.parallelCheck.setChecked(True)
+        layout.addWidget(self.parallelCheck)
+
         # Botón de grabación
         self.recordButton = QPushButton('Iniciar Grabación')
         self.recordButton.clicked.connect(self.toggleRecording)
+        self.recordButton.setEnabled(False)
         layout.addWidget(self.recordButton)
 
         self.recordButton.setStyleSheet("""
@@ -121,6 +173,10 @@ class AudioTranslatorApp(QWidget):
         color: black;
         """)
 
+        # Estado de la preparación del modelo
+        self.statusLabel = QLabel("Preparando modelo...")
+        layout.addWidget(self.statusLabel)
+
         # Text area para mostrar los resultados
         self.resultText = QTextEdit()
         self.resultText.setReadOnly(True)
@@ -161,6 +217,44 @@ class AudioTranslatorApp(QWidget):
             }
         """)
 
+    def warmUpModel(self):
+        model_name = self.modelCombo.currentText()
+        self.ready_model = None
+        self.holdModel(None)
+        if not self.is_recording:
+            self.recordButton.setEnabled(False)
+
+        thread = ModelWarmupThread(model_name, self.inputLanguageCombo.currentData(), pin=True)
+        thread.progress.connect(self.onWarmupProgress)
+        thread.ready.connect(self.onModelReady)
+        thread.failed.connect(self.onModelFailed)
+        thread.finished.connect(lambda: self.warmup_threads.remove(thread))
+        self.warmup_threads.append(thread)
+        thread.start()
+
+    def onWarmupProgress(self, percent, message):
+        self.statusLabel.setText(f"{message} ({percent}%)")
+
+    def onModelReady(self, model_name, n_mels):
+        if model_name != self.modelCombo.currentText():
+            model_cache.release_model(model_name)
+            return
+        self.holdModel(model_name)
+        self.ready_model = model_name
+        self.statusLabel.setText(f"Modelo {model_name} listo")
+        if not self.is_recording:
+            self.recordButton.setEnabled(True)
+
+    def holdModel(self, model_name):
+        # Sin esta referencia la limpieza por inactividad descargaría el modelo con el botón de grabar activo
+        if self.held_model is not None:
+            model_cache.release_model(self.held_model)
+        self.held_model = model_name
+
+    def onModelFailed(self, model_name, error):
+        if model_name == self.modelCombo.currentText():
+            self.statusLabel.setText(f"Error al cargar el modelo {model_name}: {error}")
+
     def toggleRecording(self):
         if not self.is_recording:
             self.startRecording()
@@ -178,10 +272,14 @@ class AudioTranslatorApp(QWidget):
         selected_speaker = self.speakers[self.deviceCombo.currentIndex()]
         input_language = self.inputLanguageCombo.currentData()
         output_language = self.outputLanguageCombo.currentData()
-        model_name = self.modelCombo.currentText()
-        self.thread = AudioRecorderThread(selected_speaker, self.message_queue, input_language, output_language, model_name)
+        self.modelCombo.setEnabled(False)
+        self.thread = AudioRecorderThread(selected_speaker, self.message_queue, input_language, output_language, self.ready_model, self.parallelCheck.isChecked())
         self.thread.finished.connect(self.onRecordingFinished)
         self.thread.start()
+        if self.parallelCheck.isChecked():
+            # El hilo de grabación fija su propia referencia; sin la de la interfaz puede descargar el modelo antes
+            # de la transcripción en paralelo. Se vuelve a preparar al terminar
+            self.holdModel(None)
 
     def stopRecording(self):
         if hasattr(self, 'thread') and self.thread.isRunning():
@@ -200,6 +298,10 @@ class AudioTranslatorApp(QWidget):
             message = self.message_queue.get()
             self.resultText.append(message)
 
+    def closeEvent(self, event):
+        self.holdModel(None)
+        super().closeEvent(event)
+
     def onRecordingFinished(self):
         self.is_recording = False
         self.recordButton.setText('Iniciar Grabación')
@@ -207,7 +309,10 @@ class AudioTranslatorApp(QWidget):
             background-color: #00C7B7;
             color: black;
         """)
-        self.recordButton.setEnabled(True)
+        self.recordButton.setEnabled(self.ready_model is not None)
+        self.modelCombo.setEnabled(True)
+        if self.held_model is None:
+            self.warmUpModel()
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
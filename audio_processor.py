@@ -1,71 +1,370 @@
-import whisper
 import numpy as np
-from googletrans import Translator
 from PyQt5.QtCore import QThread
-import time
 import queue
 import logging
+import time
+import model_cache
+import inference
+import recognizers
+import translation_cache
+from translation_worker import TranslationStage
+from metrics import get_metrics
+from messages import TranscriptMessage, PROVISIONAL, COMMITTED
+from streaming import StreamingTranscriber, words_text
+from mel_frontend import IncrementalLogMel, HOP_LENGTH, N_FRAMES
+from sources import AudioSource
+
+SAMPLE_RATE = 16000
+STREAM_STEP = 0.5  # Cada cuánto se vuelve a decodificar la ventana en modo streaming
+STREAM_POLL = 0.05  # Espera entre rondas cuando ninguna fuente tiene audio nuevo
+BATCH_SIZE = 4  # Fragmentos pendientes que se decodifican juntos en una sola pasada
+BATCH_LATENCY = 0.2  # Con varias fuentes, cuánto puede esperar un fragmento a que otro lo acompañe
+SENTENCE_END = (".", "?", "!", "…")
+
+def sentence_boundary(words):
+    # Posición tras la última palabra que cierra una frase; 0 si ninguna la cierra
+    for i in range(len(words) - 1, -1, -1):
+        if words[i][2].strip().endswith(SENTENCE_END):
+            return i + 1
+    return 0
+
+class SourceStream:
+    # Estado de la transcripción continua de una fuente
+    def __init__(self, source, transcriber):
+        self.source = source
+        self.transcriber = transcriber
+        self.decoded_until = transcriber.window_start
+        self.pending_words = []  # Palabras confirmadas que aún no se han enviado a traducir
 
 class AudioProcessorThread(QThread):
-    def __init__(self, audio_queue, message_queue, input_language, output_language):
+    def __init__(self, audio_queue, message_queue, input_language, output_language, model_name="tiny", ring_buffer=None, streaming=False, translator_backend="google", mel_frontend=None, audio_context="full", sources=None, batch_size=BATCH_SIZE, batch_latency=BATCH_LATENCY, model_controller=None, recognizer_backend="whisper", transcript_store=None, session_id=None):
         super().__init__()
         self.audio_queue = audio_queue
         self.message_queue = message_queue
-        self.whisper_model = whisper.load_model("tiny")
-        self.input_language = input_language
-        self.output_language = output_language
-        self.translator = Translator()
+        self.model_name = model_name
+        self.whisper_model = None
+        self.translator = translation_cache.get_cached_translator(translator_backend)
         self.is_processing = True
-        self.last_processed_time = 0
+        # Al detener con drain=True se procesa antes lo que ya estaba en cola
+        self.drain = False
+        self.reported_drops = getattr(audio_queue, "dropped_chunks", 0)
+        self.streaming = streaming
+        # Espectrograma incremental calculado durante la captura; sin él se usa transcribe() sobre el audio
+        self.default_source = AudioSource(None, None, input_language, output_language, ring_buffer, mel_frontend)
+        # Varias fuentes comparten este hilo y, con él, una única instancia del modelo
+        self.sources = sources or [self.default_source]
+        self.batch_size = batch_size
+        self.batch_latency = batch_latency
+        # "dynamic": el codificador solo procesa la duración del segmento más un margen que depende del modelo
+        self.audio_context = audio_context
+        self.audio_context_margin = inference.audio_context_margin(model_name) if audio_context == "dynamic" else None
+        # Opcional: cambia de modelo según el factor de tiempo real y el retraso medidos
+        self.model_controller = model_controller
+        # Otro motor de reconocimiento (p. ej. "google") en lugar del modelo Whisper local
+        self.recognizer = recognizers.create_recognizer(recognizer_backend) if recognizer_backend != "whisper" else None
+        # Historial en SQLite: cada segmento se encola y lo escribe el hilo del almacén
+        self.transcript_store = transcript_store
+        self.session_id = session_id
+        self.translation_stage = None
+        self.metrics = get_metrics()
 
     def run(self):
-        while self.is_processing:
+        # El modelo se obtiene de la caché fuera del hilo de la interfaz
+        if self.recognizer is None:
+            # Fijado en la caché mientras el hilo lo use: la limpieza por inactividad no debe descargarlo
+            self.whisper_model = model_cache.acquire_model(self.model_name)
+        elif self.streaming:
+            # La transcripción continua necesita marcas de tiempo por palabra
+            logging.warning(f"El motor {self.recognizer.name} no admite transcripción continua; se usan fragmentos")
+            self.streaming = False
+        # La traducción corre en su propio grupo de hilos para no frenar a Whisper
+        self.translation_stage = TranslationStage(self.translator, self.deliver_translation)
+        try:
+            if self.streaming:
+                self.run_streaming()
+            else:
+                self.run_chunks()
+        finally:
+            if self.whisper_model is not None:
+                model_cache.release_model(self.model_name)
+            self.translation_stage.close()
+            logging.info(f"Caché de traducciones: {self.translator.stats()}")
+
+    def run_chunks(self):
+        while self.is_processing or (self.drain and self.audio_queue.qsize()):
             try:
-                audio_data = self.audio_queue.get(timeout=1)
-                self.process_audio(audio_data)
+                batch = self.next_batch()
+                self.report_drops()
+                batch_start = time.monotonic()
+                self.process_batch(batch)
+                now = time.monotonic()
+                lag = now - min(chunk.timestamps.get("emitted", batch_start) for chunk in batch)
+                self.adapt_model(sum(len(chunk) for chunk in batch), now - batch_start, lag)
             except queue.Empty:
                 continue
             except Exception as e:
                 logging.error(f"Error en el hilo de procesamiento: {str(e)}")
                 self.message_queue.put(f"Error en el hilo de procesamiento: {str(e)}")
 
-    def process_audio(self, audio_data):
+        pending = self.audio_queue.qsize()
+        if pending:
+            logging.warning(f"Procesamiento detenido con {pending} fragmentos de audio sin transcribir")
+
+    def next_batch(self):
+        batch = [self.audio_queue.get(timeout=1)]
+        # Con una sola fuente solo se agrupa lo que ya estaba en cola: sin atraso no se añade espera
+        deadline = time.monotonic() + (self.batch_latency if len(self.sources) > 1 else 0)
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self.audio_queue.get(timeout=remaining) if remaining > 0 else self.audio_queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def process_batch(self, batch):
+        # Solo la ruta sobre espectrograma admite lotes, y un lote comparte idioma
+        groups = {}
+        for chunk in batch:
+            source = chunk.source or self.default_source
+            key = source.input_language if self.uses_mel(source) else None
+            groups.setdefault(key, []).append(chunk)
+        for language, chunks in groups.items():
+            if language is None or len(chunks) == 1:
+                for chunk in chunks:
+                    self.process_chunk(chunk)
+            else:
+                self.process_mel_batch(chunks, language)
+
+    def process_mel_batch(self, chunks, language):
         try:
-            current_time = time.time()
-            if current_time - self.last_processed_time < 1:
-                return
-            self.last_processed_time = current_time
+            inference_start = time.monotonic()
+            n_frames = max(self.context_frames(len(chunk)) for chunk in chunks)
+            mels = np.stack([self.mel_window(chunk.source or self.default_source, chunk.start, chunk.data(), n_frames)[0] for chunk in chunks])
+            results = inference.decode_mel_batch(self.whisper_model, mels, language)
+            self.record_inference(sum(len(chunk) for chunk in chunks), time.monotonic() - inference_start, len(chunks))
+            self.metrics.increment("inference_batches")
+        except Exception as e:
+            # Si el lote no cabe (memoria, formas), cada fragmento se intenta por separado
+            logging.warning(f"Falló la inferencia por lotes de {len(chunks)} fragmentos, se procesan uno a uno: {str(e)}")
+            for chunk in chunks:
+                self.process_chunk(chunk)
+            return
+        for chunk, result in zip(chunks, results):
+            self.complete_chunk(chunk, result.text)
+
+    def adapt_model(self, samples, elapsed, lag):
+        if self.model_controller is None or self.recognizer is not None or not samples:
+            return
+        backlog = self.audio_queue.qsize() if self.audio_queue is not None else 0
+        name = self.model_controller.observe(elapsed / (samples / SAMPLE_RATE), lag, backlog)
+        if name is None or name == self.model_name:
+            return
+        # El controlador solo propone modelos que ya están en la caché, así que el cambio es inmediato
+        previous = self.model_name
+        self.whisper_model = model_cache.acquire_model(name)
+        model_cache.release_model(previous)
+        self.model_name = name
+        if self.audio_context == "dynamic":
+            self.audio_context_margin = inference.audio_context_margin(name)
+        self.metrics.increment("model_switches")
+        logging.info(f"Modelo ajustado de {previous} a {name} (RTF {elapsed / (samples / SAMPLE_RATE):.2f}, retraso {lag:.1f} s)")
+        self.message_queue.put(f"Modelo ajustado automáticamente: {previous} → {name}")
+
+    def report_drops(self):
+        # La cola acotada puede descartar audio bajo sobrecarga; se avisa en la interfaz
+        dropped = getattr(self.audio_queue, "dropped_chunks", 0)
+        if dropped > self.reported_drops:
+            self.message_queue.put(f"Aviso: se descartaron {dropped - self.reported_drops} fragmentos de audio por sobrecarga.")
+            self.reported_drops = dropped
 
+    def post(self, source, text):
+        self.message_queue.put(source.tag(text) if source is not None else text)
+
+    def process_chunk(self, chunk):
+        source = chunk.source or self.default_source
+        try:
             # self.message_queue.put("Procesando fragmento de audio...")
             # logging.info("Iniciando transcripción con Whisper")
 
-            audio_data = np.clip(audio_data, -1, 1)
-            result = self.whisper_model.transcribe(
-                audio_data, 
-                language=self.input_language,
-                fp16=False
-            )
-            texto_original = result["text"]
-
-            logging.info(f"Transcripción completada: {texto_original}")
-
-            if texto_original.strip():
-                self.message_queue.put(f"Texto original ({self.input_language}): {texto_original}")
-
-                if self.output_language != self.input_language:
-                    logging.info(f"Traduciendo de {self.input_language} a {self.output_language}")
-                    # self.message_queue.put(f"Traduciendo de {self.input_language} a {self.output_language}...")
-                    translated_text = self.translator.translate(texto_original, src=self.input_language, dest=self.output_language).text
-                    self.message_queue.put(f"Texto traducido ({self.output_language}): {translated_text}")
-                    logging.info(f"Traducción completada: {translated_text}")
-                else:
-                    self.message_queue.put("No se requiere traducción.")
-            else:
-                logging.warning("No se detectó texto en el fragmento de audio")
-                self.message_queue.put("No se detectó texto en este fragmento de audio.")
+            inference_start = time.monotonic()
+            texto_original = self.transcribe_chunk(chunk)
+            self.record_inference(len(chunk), time.monotonic() - inference_start)
+            self.complete_chunk(chunk, texto_original)
         except Exception as e:
             logging.error(f"Error en el procesamiento de audio: {str(e)}")
-            self.message_queue.put(f"Error en el procesamiento de audio: {str(e)}")
+            self.post(source, f"Error en el procesamiento de audio: {str(e)}")
+
+    def complete_chunk(self, chunk, texto_original):
+        source = chunk.source or self.default_source
+        logging.info(f"Transcripción completada: {source.tag(texto_original)}")
+        self.translation_stage.submit(texto_original, source.input_language, source.output_language, context="chunk", source=source, start=chunk.start / SAMPLE_RATE, end=chunk.end / SAMPLE_RATE, model=self.transcriber_name())
+
+    def uses_mel(self, source):
+        if self.recognizer is not None:
+            return False
+        return source.mel_frontend is not None or self.audio_context_margin is not None
+
+    def context_frames(self, samples):
+        if self.audio_context_margin is None:
+            return N_FRAMES
+        return inference.context_frames(samples // HOP_LENGTH, self.audio_context_margin, inference.max_frames(self.whisper_model))
+
+    def mel_window(self, source, start_index, audio_data, n_frames=None):
+        frontend = source.mel_frontend
+        # Tras un cambio automático de modelo las bandas pueden no coincidir (large usa 128, el resto 80):
+        # entonces el espectrograma de la captura no sirve y se calcula sobre el audio del fragmento
+        if frontend is None or frontend.n_mels != self.whisper_model.dims.n_mels:
+            frontend = IncrementalLogMel.from_audio(audio_data, self.whisper_model.dims.n_mels, start_index)
+        return frontend.window(start_index, start_index + len(audio_data), n_frames or self.context_frames(len(audio_data)))
+
+    def transcribe_chunk(self, chunk):
+        source = chunk.source or self.default_source
+        if self.recognizer is not None:
+            return self.recognizer.transcribe(chunk.data(), source.input_language)
+        if self.uses_mel(source):
+            mel, _ = self.mel_window(source, chunk.start, chunk.data())
+            return inference.decode_mel(self.whisper_model, mel, source.input_language).text
+
+        result = self.whisper_model.transcribe(
+            np.clip(chunk.data(), -1, 1),
+            language=source.input_language,
+            fp16=False
+        )
+        return result["text"]
+
+    def record_inference(self, samples, elapsed, chunks=1):
+        audio_seconds = samples / SAMPLE_RATE
+        self.metrics.observe("inference", elapsed)
+        self.metrics.increment("chunks_transcribed", chunks)
+        self.metrics.increment("audio_seconds_transcribed", audio_seconds)
+        if audio_seconds:
+            self.metrics.set_gauge("real_time_factor", elapsed / audio_seconds)
+
+    def deliver_translation(self, request, translated_text, error):
+        # Se llama en orden de secuencia, con el original y su traducción juntos
+        source = request.source
+        self.store_segment(request, translated_text, error)
+        if request.context == "sentence":
+            if error is not None:
+                self.post(source, f"Error en la traducción: {str(error)}")
+            elif translated_text is not None:
+                self.post(source, f"Texto traducido ({request.dest}): {translated_text}")
+            return
+
+        if not request.text.strip():
+            logging.warning("No se detectó texto en el fragmento de audio")
+            self.post(source, "No se detectó texto en este fragmento de audio.")
+            return
+
+        self.post(source, f"Texto original ({request.src}): {request.text}")
+        if error is not None:
+            self.post(source, f"Error en la traducción: {str(error)}")
+        elif translated_text is not None:
+            self.post(source, f"Texto traducido ({request.dest}): {translated_text}")
+            logging.info(f"Traducción completada: {translated_text}")
+        else:
+            self.post(source, "No se requiere traducción.")
+
+    def store_segment(self, request, translated_text, error):
+        if self.transcript_store is None or not request.text.strip():
+            return
+        source = request.source or self.default_source
+        self.transcript_store.add_segment(
+            self.session_id, request.text.strip(), translated_text if error is None else None,
+            request.start, request.end, source.label or getattr(source.device, "name", None),
+            request.src, request.dest, request.model or self.transcriber_name(),
+        )
+
+    def transcriber_name(self):
+        return self.model_name if self.recognizer is None else self.recognizer.name
+
+    def run_streaming(self):
+        step = int(SAMPLE_RATE * STREAM_STEP)
+        streams = [
+            SourceStream(source, StreamingTranscriber(
+                lambda audio_data, prompt, start_index, source=source: self.transcribe_words(source, audio_data, prompt, start_index),
+                source.ring_buffer.write_index
+            ))
+            for source in self.sources
+        ]
+
+        while self.is_processing:
+            # Por turnos: cada fuente con audio nuevo avanza un paso antes de que ninguna avance dos
+            ready = [stream for stream in streams if stream.source.ring_buffer.write_index - stream.decoded_until >= step]
+            if not ready:
+                if len(streams) == 1:
+                    streams[0].source.ring_buffer.wait_for(streams[0].decoded_until + step, timeout=0.5)
+                else:
+                    time.sleep(STREAM_POLL)
+                continue
+            for stream in ready:
+                self.stream_step(stream)
+
+        if self.drain:
+            # El audio que los grabadores volcaron al detenerse también se transcribe
+            for stream in streams:
+                if stream.source.ring_buffer.write_index > stream.decoded_until:
+                    self.stream_step(stream)
+        for stream in streams:
+            self.publish_stream(stream, stream.transcriber.finish(), [], final=True)
+
+    def stream_step(self, stream):
+        ring_buffer = stream.source.ring_buffer
+        new_samples = ring_buffer.write_index - stream.decoded_until
+        stream.decoded_until += new_samples
+        try:
+            audio_data = ring_buffer.read(stream.transcriber.window_start, stream.decoded_until)
+            inference_start = time.monotonic()
+            committed, provisional = stream.transcriber.process(audio_data)
+            # En streaming el factor de tiempo real se mide sobre el audio nuevo de cada paso
+            elapsed = time.monotonic() - inference_start
+            self.record_inference(new_samples, elapsed)
+            self.publish_stream(stream, committed, provisional)
+            self.adapt_model(new_samples, elapsed, (ring_buffer.write_index - stream.decoded_until) / SAMPLE_RATE)
+        except Exception as e:
+            logging.error(f"Error en la transcripción continua: {str(e)}")
+            self.post(stream.source, f"Error en la transcripción continua: {str(e)}")
+
+    def transcribe_words(self, source, audio_data, prompt, start_index):
+        if self.uses_mel(source):
+            # La ventana se corta del espectrograma ya calculado: cada paso solo paga el codificador y el decodificador
+            mel, num_frames = self.mel_window(source, start_index, audio_data)
+            return inference.decode_words(self.whisper_model, mel, num_frames, source.input_language, prompt)
+
+        result = self.whisper_model.transcribe(
+            np.clip(audio_data, -1, 1),
+            language=source.input_language,
+            fp16=False,
+            word_timestamps=True,
+            condition_on_previous_text=False,
+            initial_prompt=prompt or None
+        )
+        return [
+            (word["start"], word["end"], word["word"])
+            for segment in result["segments"]
+            for word in segment.get("words", [])
+        ]
+
+    def publish_stream(self, stream, committed, provisional, final=False):
+        source = stream.source
+        if committed:
+            text = words_text(committed)
+            self.message_queue.put(TranscriptMessage(COMMITTED, text, source.input_language, source.label))
+            stream.pending_words.extend(committed)
+        self.message_queue.put(TranscriptMessage(PROVISIONAL, words_text(provisional), source.input_language, source.label))
+
+        # Se traduce por frases completas, no por cada palabra confirmada: con "... fin. Y luego" se envía
+        # hasta "fin." y el resto espera a que termine su frase
+        words = stream.pending_words
+        end = len(words) if final else sentence_boundary(words)
+        if end == 0:
+            return
+        stream.pending_words = words[end:]
+        sentence = words_text(words[:end]).strip()
+        if sentence:
+            self.translation_stage.submit(sentence, source.input_language, source.output_language, context="sentence", source=source, start=words[0][0], end=words[end - 1][1], model=self.transcriber_name())
 
-    def stop(self):
+    def stop(self, drain=False):
+        self.drain = drain
         self.is_processing = False
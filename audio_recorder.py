@@ -1,34 +1,100 @@
 import soundcard as sc
-import numpy as np
 from PyQt5.QtCore import QThread, pyqtSignal
 import logging
+from ring_buffer import AudioRingBuffer, AudioChunk, emit_chunk
+from resampler import StreamingResampler
+
+SAMPLE_RATE = 16000
+CAPTURE_RATE = 48000  # Si no se puede leer la del dispositivo: la frecuencia nativa más habitual
+BLOCK_DURATION = 0.03  # Bloques pequeños: el audio llega al buffer cada 30 ms
+CHUNK_DURATION = 10
+BUFFER_DURATION = 120  # Segundos de historial que conserva el buffer circular
+
+def native_sample_rate(device, default=CAPTURE_RATE):
+    # soundcard no expone la frecuencia del dispositivo: se pide al backend su formato por defecto y, si falla, default
+    rate = getattr(device, "samplerate", None)
+    if rate:
+        return int(rate)
+    try:
+        if hasattr(device, "_audio_client"):
+            return wasapi_mix_rate(device)
+    except Exception as e:
+        logging.warning(f"No se pudo leer la frecuencia de {device.name}, se usa {default} Hz: {str(e)}")
+    return default
+
+def wasapi_mix_rate(device):
+    # Formato de mezcla compartido de WASAPI, el mismo que consulta soundcard al abrir el grabador
+    from soundcard.mediafoundation import _ffi, _com, _ole32
+    client = device._audio_client()
+    try:
+        mix_format = _ffi.new("WAVEFORMATEXTENSIBLE**")
+        _com.check_error(client[0][0].lpVtbl.GetMixFormat(client[0], mix_format))
+        rate = int(mix_format[0][0].Format.nSamplesPerSec)
+        _ole32.CoTaskMemFree(mix_format[0])
+        return rate
+    finally:
+        _com.release(client)
 
 class AudioRecorderThread(QThread):
     finished = pyqtSignal()
 
-    def __init__(self, audio_queue, selected_mic):
+    def __init__(self, audio_queue, selected_mic, ring_buffer=None, chunk_duration=CHUNK_DURATION, mel_frontend=None, source=None, capture_rate=None):
         super().__init__()
         self.is_recording = False
         self.audio_queue = audio_queue
         self.selected_mic = selected_mic
+        self.ring_buffer = ring_buffer or AudioRingBuffer(SAMPLE_RATE * BUFFER_DURATION, SAMPLE_RATE)
+        self.chunk_duration = chunk_duration
+        self.mel_frontend = mel_frontend
+        self.source = source
+        # None: la frecuencia del dispositivo, que se consulta al empezar a grabar
+        self.capture_rate = capture_rate
+        if source is not None:
+            source.ring_buffer = self.ring_buffer
+            source.mel_frontend = mel_frontend
 
     def run(self):
-        SAMPLE_RATE = 16000
-        CHUNK_DURATION = 10
+        chunk_samples = int(SAMPLE_RATE * self.chunk_duration)
         self.is_recording = True
 
         try:
-            with sc.get_microphone(id=self.selected_mic.id, include_loopback=True).recorder(samplerate=SAMPLE_RATE, channels=1) as mic:
-                logging.info("Grabación iniciada.")
+            device = sc.get_microphone(id=self.selected_mic.id, include_loopback=True)
+            if self.capture_rate is None:
+                self.capture_rate = native_sample_rate(device)
+            block_frames = int(self.capture_rate * BLOCK_DURATION)
+            # Se graba con la frecuencia y los canales del dispositivo; la conversión a 16 kHz mono es nuestra
+            channels = getattr(device, "channels", 1) or 1
+            resampler = StreamingResampler(self.capture_rate, SAMPLE_RATE, channels)
+            with device.recorder(samplerate=self.capture_rate, channels=channels, blocksize=block_frames) as mic:
+                logging.info(f"Grabación iniciada: {self.selected_mic.name} ({self.capture_rate} Hz, {channels} canales)")
+                chunk_start = self.ring_buffer.write_index
                 while self.is_recording:
-                    data = mic.record(numframes=SAMPLE_RATE * CHUNK_DURATION)
-                    data = data.astype(np.float32).flatten()
-                    self.audio_queue.put(data)
+                    self.write_block(resampler.process(mic.record(numframes=block_frames)))
+                    if self.ring_buffer.write_index - chunk_start >= chunk_samples:
+                        chunk_start = self.emit_chunk(chunk_start)
+                self.write_block(resampler.flush())
+                # El último fragmento parcial también se procesa
+                if self.ring_buffer.write_index > chunk_start:
+                    self.emit_chunk(chunk_start)
         except Exception as e:
             logging.error(f"Error en la grabación de audio: {str(e)}")
         finally:
             logging.info("Grabación finalizada.")
             self.finished.emit()
 
+    def write_block(self, block):
+        if not len(block):
+            return
+        self.ring_buffer.write(block)
+        if self.mel_frontend is not None:
+            # Solo se calculan las tramas STFT nuevas de cada bloque
+            self.mel_frontend.append(block)
+
+    def emit_chunk(self, chunk_start):
+        end = self.ring_buffer.write_index
+        if self.audio_queue is not None:
+            emit_chunk(self.audio_queue, AudioChunk(self.ring_buffer, chunk_start, end, self.source))
+        return end
+
     def stop(self):
         self.is_recording = False
@@ -0,0 +1,221 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import model_cache
+import translation_cache
+
+AUDIO_EXTENSIONS = (".wav", ".flac")
+
+_worker_model = None
+_worker_options = None
+
+def find_audio_files(inputs):
+    files = []
+    for path in inputs:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, name) for name in sorted(names) if name.lower().endswith(AUDIO_EXTENSIONS))
+        elif path.lower().endswith(AUDIO_EXTENSIONS):
+            files.append(path)
+        else:
+            logging.warning(f"Se ignora {path}: no es un archivo WAV/FLAC ni un directorio")
+    return files
+
+def output_names(files):
+    # Ruta relativa al directorio común y sin extensión: archivos con el mismo nombre en carpetas distintas no se pisan
+    paths = [os.path.abspath(path) for path in files]
+    try:
+        root = os.path.commonpath([os.path.dirname(path) for path in paths])
+    except ValueError:
+        # Unidades distintas en Windows: no hay directorio común
+        root = None
+    names = {}
+    used = set()
+    for path, absolute in zip(files, paths):
+        name = os.path.splitext(os.path.relpath(absolute, root) if root else os.path.basename(absolute))[0]
+        # Aún puede repetirse: el mismo nombre en WAV y en FLAC, o un archivo pasado dos veces
+        candidate = name
+        suffix = 1
+        while candidate in used:
+            candidate = f"{name}-{suffix}"
+            suffix += 1
+        used.add(candidate)
+        names[path] = candidate
+    return names
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"debe ser al menos 1: {value}")
+    return number
+
+def init_worker(model_name, device, language, threads, memory_budget_mb=None, idle_timeout=None):
+    global _worker_model, _worker_options
+    import torch
+    model_cache.configure(memory_budget_mb=memory_budget_mb, idle_timeout=idle_timeout)
+    # Cada proceso usa su parte de los núcleos para no competir entre sí
+    torch.set_num_threads(threads)
+    _worker_model = model_cache.load_model(model_name, device=device)
+    _worker_options = {"language": language}
+
+def transcribe_file(path):
+    import whisper
+    start = time.monotonic()
+    audio = whisper.load_audio(path)
+    result = _worker_model.transcribe(audio, language=_worker_options["language"], fp16=False)
+    segments = [
+        {"start": segment["start"], "end": segment["end"], "text": segment["text"].strip()}
+        for segment in result["segments"]
+    ]
+    return {
+        "file": path,
+        "language": result.get("language", _worker_options["language"]),
+        "duration": len(audio) / whisper.audio.SAMPLE_RATE,
+        "elapsed": time.monotonic() - start,
+        "segments": segments,
+    }
+
+def transcribe_range(directory, start, end):
+    # Una pieza de una sesión grabada en disco, con marcas de tiempo relativas al inicio de la pieza
+    import numpy as np
+    from session_recording import SessionRecording
+    started = time.monotonic()
+    session = SessionRecording.open(directory)
+    audio = session.read(start, end)
+    result = _worker_model.transcribe(np.clip(audio, -1, 1), language=_worker_options["language"], fp16=False)
+    segments = [
+        {"start": segment["start"], "end": segment["end"], "text": segment["text"].strip()}
+        for segment in result["segments"]
+    ]
+    return {"start": start, "end": end, "elapsed": time.monotonic() - started, "segments": segments}
+
+def format_srt_timestamp(seconds):
+    milliseconds = int(round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{milliseconds:03d}"
+
+def write_srt(path, segments, key="text"):
+    with open(path, "w", encoding="utf-8") as f:
+        for index, segment in enumerate(segments, start=1):
+            f.write(f"{index}\n{format_srt_timestamp(segment['start'])} --> {format_srt_timestamp(segment['end'])}\n{segment[key]}\n\n")
+
+def translate_segments(result, translator, target):
+    segments = result["segments"]
+    if target and target != result["language"] and segments:
+        translations = translator.translate_many([segment["text"] for segment in segments], result["language"], target)
+        for segment, translation in zip(segments, translations):
+            segment["translation"] = translation
+    return result
+
+def transcribed_files(jsonl_path):
+    # Archivos que ya tienen registros en el JSONL de una ejecución anterior
+    done = set()
+    if not os.path.exists(jsonl_path):
+        return done
+    with open(jsonl_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                done.add(os.path.abspath(json.loads(line)["file"]))
+            except (ValueError, KeyError):
+                # Última línea a medio escribir si la ejecución anterior se interrumpió
+                continue
+    return done
+
+def write_outputs(result, output_dir, formats, jsonl_file, model_name, target, name=None):
+    base = os.path.join(output_dir, name or os.path.splitext(os.path.basename(result["file"]))[0])
+    translated = any("translation" in segment for segment in result["segments"])
+    if "srt" in formats:
+        os.makedirs(os.path.dirname(base), exist_ok=True)
+        write_srt(f"{base}.srt", result["segments"])
+        if translated:
+            write_srt(f"{base}.{target}.srt", result["segments"], key="translation")
+    if jsonl_file is not None:
+        for segment in result["segments"]:
+            record = {"file": result["file"], "model": model_name, "language": result["language"], **segment}
+            jsonl_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        jsonl_file.flush()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Transcribe y traduce archivos de audio sin interfaz gráfica.")
+    parser.add_argument("inputs", nargs="+", help="Archivos WAV/FLAC o directorios que los contienen")
+    parser.add_argument("--model", default="small", help="Modelo de Whisper (tiny, base, small, medium, large; con -int8 la variante cuantizada para CPU)")
+    parser.add_argument("--language", default=None, help="Idioma del audio (por defecto se detecta)")
+    parser.add_argument("--target", default=None, help="Idioma al que traducir (por defecto no se traduce)")
+    parser.add_argument("--translator", default="google", help="Backend de traducción (google, stub)")
+    parser.add_argument("--workers", type=positive_int, default=max(1, (os.cpu_count() or 1) // 2), help="Procesos en paralelo, cada uno con su modelo")
+    parser.add_argument("--device", default="cpu", help="Dispositivo de inferencia (cpu, cuda)")
+    parser.add_argument("--output-dir", default="transcripciones", help="Directorio de salida")
+    parser.add_argument("--format", nargs="+", choices=("jsonl", "srt"), default=["jsonl", "srt"], help="Formatos de salida")
+    parser.add_argument("--overwrite", action="store_true", help="Vuelve a transcribir los archivos que ya están en transcripciones.jsonl y lo reescribe")
+    model_cache.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    files = find_audio_files(args.inputs)
+    if not files:
+        logging.error("No se encontraron archivos de audio")
+        return 1
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    jsonl_path = os.path.join(args.output_dir, "transcripciones.jsonl")
+    if "jsonl" in args.format and not args.overwrite:
+        # Se reanuda: los archivos ya registrados no se repiten en el JSONL
+        done = transcribed_files(jsonl_path)
+        skipped = [path for path in files if os.path.abspath(path) in done]
+        if skipped:
+            logging.info(f"Se omiten {len(skipped)} archivos ya transcritos en {jsonl_path} (--overwrite para repetirlos)")
+            files = [path for path in files if os.path.abspath(path) not in done]
+        if not files:
+            return 0
+
+    translator = translation_cache.get_cached_translator(args.translator) if args.target else None
+    names = output_names(files)
+    workers = min(args.workers, len(files))
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    jsonl_file = open(jsonl_path, "w" if args.overwrite else "a", encoding="utf-8") if "jsonl" in args.format else None
+
+    start = time.monotonic()
+    total_audio = 0.0
+    failures = 0
+    translation_failures = 0
+    logging.info(f"Transcribiendo {len(files)} archivos con {workers} procesos ({threads} hilos cada uno)")
+    try:
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=init_worker, initargs=(args.model, args.device, args.language, threads, args.model_memory_mb, args.model_idle_timeout)) as executor:
+            futures = {executor.submit(transcribe_file, path): path for path in files}
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    result = future.result()
+                    if translator is not None:
+                        # Si la traducción falla (red, límite de peticiones) la transcripción se escribe igualmente
+                        try:
+                            translate_segments(result, translator, args.target)
+                        except Exception as e:
+                            translation_failures += 1
+                            logging.error(f"Error al traducir {path}, se escribe solo la transcripción: {str(e)}")
+                    write_outputs(result, args.output_dir, args.format, jsonl_file, args.model, args.target, names[path])
+                    total_audio += result["duration"]
+                    logging.info(f"{path}: {result['duration']:.0f} s de audio en {result['elapsed']:.0f} s")
+                except Exception as e:
+                    failures += 1
+                    logging.error(f"Error al procesar {path}: {str(e)}")
+    finally:
+        if jsonl_file is not None:
+            jsonl_file.close()
+
+    elapsed = time.monotonic() - start
+    logging.info(f"{len(files) - failures}/{len(files)} archivos, {total_audio / 60:.1f} min de audio en {elapsed / 60:.1f} min")
+    if translation_failures:
+        logging.warning(f"{translation_failures} archivos sin traducción")
+    return 1 if failures or translation_failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,299 @@
+import argparse
+import itertools
+import json
+import logging
+import multiprocessing
+import platform
+import queue
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+SAMPLE_RATE = 16000
+MODELS = ("tiny", "base", "small", "medium", "large")
+FRONTENDS = ("audio", "mel")
+AUDIO_CONTEXTS = ("full", "dynamic")
+ENGINES = ("whisper", "google")
+BLOCK_SAMPLES = 480  # Bloques de 30 ms, como los del grabador
+
+def generate_fixture(duration, sample_rate=SAMPLE_RATE, seed=0):
+    # Audio sintético reproducible: "sílabas" armónicas con pausas, similar en ritmo a una conversación
+    rng = np.random.default_rng(seed)
+    audio = np.zeros(int(duration * sample_rate), dtype=np.float32)
+    position = 0
+    while position < len(audio):
+        syllables = rng.integers(3, 12)
+        for _ in range(syllables):
+            length = int(rng.uniform(0.12, 0.3) * sample_rate)
+            t = np.arange(length) / sample_rate
+            f0 = rng.uniform(100, 220)
+            formants = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 6))
+            envelope = np.sin(np.pi * np.arange(length) / length)
+            segment = (0.2 * formants * envelope).astype(np.float32)
+            end = min(position + length, len(audio))
+            audio[position:end] = segment[:end - position]
+            position = end
+        position += int(rng.uniform(0.3, 1.5) * sample_rate)
+    audio += (0.003 * rng.standard_normal(len(audio))).astype(np.float32)
+    return audio
+
+def load_fixture(path):
+    import whisper
+    return whisper.load_audio(path)
+
+def peak_rss_mb():
+    try:
+        import resource
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux informa en KB y macOS en bytes
+        return usage / 1024 / 1024 if sys.platform == "darwin" else usage / 1024
+    except ImportError:
+        try:
+            import psutil
+            info = psutil.Process().memory_info()
+            return getattr(info, "peak_wset", info.rss) / 1024 / 1024
+        except ImportError:
+            return None
+
+def percentiles(values):
+    if not values:
+        return {}
+    return {f"p{p}": float(np.percentile(values, p)) for p in (50, 90, 99)}
+
+def run_case(case, audio):
+    from audio_processor import AudioProcessorThread
+    from translation_worker import TranslationStage
+    from ring_buffer import AudioRingBuffer, AudioChunk
+    from model_warmup import ModelWarmupThread
+    from mel_frontend import IncrementalLogMel, HOP_LENGTH
+    import model_cache
+
+    engine = case.get("engine", "whisper")
+    start = time.monotonic()
+    if engine == "whisper":
+        ModelWarmupThread(case["model"], case["language"]).run()
+    load_time = time.monotonic() - start
+
+    # Se ejercita la lógica real del procesador, sin hilos de Qt y con el traductor simulado
+    message_queue = queue.Queue()
+    processor = AudioProcessorThread(None, message_queue, case["language"], case["target"], case["model"], translator_backend="stub", audio_context=case.get("audio_context", "full"), recognizer_backend=engine)
+    if engine == "whisper":
+        processor.whisper_model = model_cache.load_model(case["model"])
+    # Se guarda el texto de cada fragmento para comparar calidad entre configuraciones
+    texts = []
+    complete_chunk = processor.complete_chunk
+    def recording_complete_chunk(chunk, text):
+        texts.append(text)
+        complete_chunk(chunk, text)
+    processor.complete_chunk = recording_complete_chunk
+    processor.translation_stage = TranslationStage(processor.translator, processor.deliver_translation)
+
+    ring_buffer = AudioRingBuffer(len(audio))
+    ring_buffer.write(audio)
+    frontend_time = 0.0
+    if case.get("frontend") == "mel":
+        # Se alimenta por bloques de captura; en la aplicación este coste lo paga el hilo de grabación
+        processor.default_source.mel_frontend = IncrementalLogMel(len(audio) // HOP_LENGTH + 1, processor.whisper_model.dims.n_mels)
+        frontend_start = time.monotonic()
+        for block_start in range(0, len(audio), BLOCK_SAMPLES):
+            processor.default_source.mel_frontend.append(audio[block_start:block_start + BLOCK_SAMPLES])
+        frontend_time = time.monotonic() - frontend_start
+    chunk_samples = int(case["chunk_duration"] * SAMPLE_RATE)
+    latencies = []
+    cpu_start = time.process_time()
+    wall_start = time.monotonic()
+    chunks = [AudioChunk(ring_buffer, chunk_start, min(chunk_start + chunk_samples, len(audio))) for chunk_start in range(0, len(audio), chunk_samples)]
+    # Todo el audio está disponible desde el principio: es el caso de atraso acumulado que aprovechan los lotes
+    batch_size = case.get("batch_size", 1)
+    for batch_start in range(0, len(chunks), batch_size):
+        batch = chunks[batch_start:batch_start + batch_size]
+        t0 = time.monotonic()
+        processor.process_batch(batch)
+        latencies.extend([time.monotonic() - t0] * len(batch))
+    processor.translation_stage.close()
+    wall_time = time.monotonic() - wall_start
+    cpu_time = time.process_time() - cpu_start
+
+    audio_duration = len(audio) / SAMPLE_RATE
+    return {
+        **case,
+        "audio_seconds": audio_duration,
+        "chunks": len(chunks),
+        "device": str(processor.whisper_model.device) if processor.whisper_model is not None else engine,
+        "load_seconds": load_time,
+        "frontend_seconds": frontend_time,
+        "wall_seconds": wall_time,
+        "cpu_seconds": cpu_time,
+        "real_time_factor": wall_time / audio_duration,
+        "cpu_per_audio_second": cpu_time / audio_duration,
+        "chunk_latency": percentiles(latencies),
+        "peak_rss_mb": peak_rss_mb(),
+        "transcript": " ".join(text.strip() for text in texts),
+    }
+
+def normalize_words(text):
+    return [word.strip(".,;:!?¿¡\"'").lower() for word in text.split() if word.strip(".,;:!?¿¡\"'")]
+
+def word_error_rate(reference, hypothesis):
+    reference = normalize_words(reference)
+    hypothesis = normalize_words(hypothesis)
+    if not reference:
+        return 0.0 if not hypothesis else 1.0
+    # Distancia de edición por palabras, fila a fila
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_word in enumerate(reference, 1):
+        current = [i] + [0] * len(hypothesis)
+        for j, hyp_word in enumerate(hypothesis, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_word != hyp_word))
+        previous = current
+    return previous[-1] / len(reference)
+
+def compare_contexts(results, reference=None):
+    # El contexto completo es la referencia de velocidad y, sin transcripción de referencia, también de calidad
+    baselines = {
+        (r["engine"], r["model"], r["chunk_duration"], r["frontend"], r["batch_size"]): r
+        for r in results if r.get("audio_context") == "full" and "error" not in r
+    }
+    for result in results:
+        if "error" in result:
+            continue
+        if reference is not None:
+            result["wer"] = word_error_rate(reference, result["transcript"])
+        baseline = baselines.get((result["engine"], result["model"], result["chunk_duration"], result["frontend"], result["batch_size"]))
+        if baseline is not None and baseline is not result:
+            result["speedup_vs_full"] = baseline["wall_seconds"] / result["wall_seconds"]
+            result["wer_vs_full"] = word_error_rate(baseline["transcript"], result["transcript"])
+
+def test_tones(rate, duration, channels, seed=0):
+    # Tonos dentro de la banda de 16 kHz más uno de 11 kHz que el resampler debe eliminar (si no, aparece como alias)
+    rng = np.random.default_rng(seed)
+    in_band = [(rng.uniform(100, 7000), rng.uniform(0, 2 * np.pi)) for _ in range(8)]
+    def synthesize(sample_rate, with_alias_tone):
+        t = np.arange(int(duration * sample_rate)) / sample_rate
+        signal = sum(0.05 * np.sin(2 * np.pi * f * t + phase) for f, phase in in_band)
+        if with_alias_tone:
+            signal = signal + 0.05 * np.sin(2 * np.pi * 11000 * t)
+        return signal.astype(np.float32)
+    captured = np.repeat(synthesize(rate, True)[:, None], channels, axis=1)
+    return captured, synthesize(SAMPLE_RATE, False)
+
+def naive_resample(block, in_rate, out_rate=SAMPLE_RATE):
+    # Interpolación lineal bloque a bloque: sin filtro antialias ni estado entre bloques
+    mono = block.mean(axis=1)
+    n_out = int(round(len(mono) * out_rate / in_rate))
+    return np.interp(np.arange(n_out) * in_rate / out_rate, np.arange(len(mono)), mono).astype(np.float32)
+
+def fft_resample(block, in_rate, out_rate=SAMPLE_RATE):
+    # Remuestreo por FFT de cada bloque (como scipy.signal.resample): filtra bien, pero cada bloque es periódico
+    mono = block.mean(axis=1)
+    n_out = int(round(len(mono) * out_rate / in_rate))
+    spectrum = np.fft.rfft(mono)[:n_out // 2 + 1]
+    return (np.fft.irfft(spectrum, n_out) * n_out / len(mono)).astype(np.float32)
+
+def run_resampler_case(method, in_rate, channels, duration=30, seed=0):
+    from resampler import StreamingResampler
+    captured, reference = test_tones(in_rate, duration, channels, seed)
+    block_frames = int(in_rate * BLOCK_SAMPLES / SAMPLE_RATE)
+    resampler = StreamingResampler(in_rate, SAMPLE_RATE, channels)
+    process = {
+        "polyphase": resampler.process,
+        "linear": lambda block: naive_resample(block, in_rate),
+        "fft": lambda block: fft_resample(block, in_rate),
+    }[method]
+
+    cpu_start = time.process_time()
+    output = np.concatenate([process(captured[i:i + block_frames]) for i in range(0, len(captured), block_frames)])
+    cpu_time = time.process_time() - cpu_start
+
+    # Se ignora el primer y el último segundo para medir el régimen estable
+    n = min(len(output), len(reference)) - SAMPLE_RATE
+    error = output[SAMPLE_RATE:n] - reference[SAMPLE_RATE:n]
+    snr = 10 * np.log10(np.sum(reference[SAMPLE_RATE:n] ** 2) / max(np.sum(error ** 2), 1e-20))
+    return {
+        "method": method,
+        "input_rate": in_rate,
+        "channels": channels,
+        "cpu_per_audio_second": cpu_time / duration,
+        "snr_db": float(snr),
+    }
+
+def write_report(report, path):
+    output = json.dumps(report, indent=2)
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mide el rendimiento del pipeline de transcripción con audio de prueba.")
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=["whisper"], help="Motores de reconocimiento: whisper (local) o google (speech_recognition, requiere red)")
+    parser.add_argument("--models", nargs="+", default=list(MODELS), help="Modelos de Whisper a medir (con -int8, la variante cuantizada para CPU: small-int8)")
+    parser.add_argument("--chunk-durations", nargs="+", type=float, default=[5, 10], help="Duraciones de fragmento en segundos")
+    parser.add_argument("--frontends", nargs="+", choices=FRONTENDS, default=["audio"], help="audio: transcribe() sobre el audio; mel: espectrograma incremental")
+    parser.add_argument("--audio-contexts", nargs="+", choices=AUDIO_CONTEXTS, default=["full"], help="full: ventana de 30 s; dynamic: contexto proporcional al fragmento")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1], help="Fragmentos por pasada de inferencia (los lotes requieren el espectrograma: frontend mel o contexto dinámico)")
+    parser.add_argument("--fixture", default=None, help="Archivo de audio grabado (por defecto se genera audio sintético)")
+    parser.add_argument("--reference", default=None, help="Transcripción de referencia del fixture, para calcular el WER")
+    parser.add_argument("--duration", type=float, default=60, help="Duración del audio sintético en segundos")
+    parser.add_argument("--seed", type=int, default=0, help="Semilla del audio sintético")
+    parser.add_argument("--language", default="es", help="Idioma del audio")
+    parser.add_argument("--target", default="en", help="Idioma de traducción (traductor simulado)")
+    parser.add_argument("--resample-rates", nargs="+", type=int, default=None, help="Solo compara remuestreadores (polifásico, lineal, FFT) desde estas frecuencias de captura")
+    parser.add_argument("--channels", type=int, default=2, help="Canales de la captura simulada en la comparación de remuestreadores")
+    parser.add_argument("--output", default=None, help="Archivo JSON de salida (por defecto, la salida estándar)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    if args.resample_rates:
+        results = [
+            run_resampler_case(method, rate, args.channels, seed=args.seed)
+            for rate in args.resample_rates
+            for method in ("polyphase", "linear", "fft")
+        ]
+        for result in results:
+            print(f"{result['input_rate']} Hz / {result['method']}: {result['cpu_per_audio_second'] * 1000:.2f} ms CPU por s, SNR {result['snr_db']:.1f} dB", file=sys.stderr)
+        write_report({"platform": {"python": platform.python_version(), "machine": platform.machine(), "system": platform.system()}, "resampling": results}, args.output)
+        return 0
+
+    audio = load_fixture(args.fixture) if args.fixture else generate_fixture(args.duration, seed=args.seed)
+
+    results = []
+    context = multiprocessing.get_context("spawn")
+    cases = []
+    for engine in args.engines:
+        if engine == "whisper":
+            dimensions = itertools.product(args.models, args.chunk_durations, args.frontends, args.audio_contexts, args.batch_sizes)
+        else:
+            # Los demás motores reciben el PCM de cada fragmento: el modelo, el espectrograma y los lotes no aplican
+            dimensions = itertools.product([None], args.chunk_durations, ["audio"], ["full"], [1])
+        cases.extend((engine, *dimension) for dimension in dimensions)
+
+    for engine, model_name, chunk_duration, frontend, audio_context, batch_size in cases:
+        case = {"engine": engine, "model": model_name, "chunk_duration": chunk_duration, "frontend": frontend, "audio_context": audio_context, "batch_size": batch_size, "language": args.language, "target": args.target}
+        # Cada caso corre en un proceso nuevo para que el pico de memoria sea solo suyo
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            try:
+                result = executor.submit(run_case, case, audio).result()
+            except Exception as e:
+                result = {**case, "error": str(e)}
+        print(f"{model_name or engine} / {chunk_duration:g} s / {frontend} / {audio_context} / lote {batch_size}: RTF {result.get('real_time_factor', float('nan')):.3f}", file=sys.stderr)
+        results.append(result)
+
+    reference = None
+    if args.reference:
+        with open(args.reference, encoding="utf-8") as f:
+            reference = f.read()
+    compare_contexts(results, reference)
+
+    report = {
+        "fixture": args.fixture or {"synthetic": True, "duration": args.duration, "seed": args.seed},
+        "platform": {"python": platform.python_version(), "machine": platform.machine(), "system": platform.system()},
+        "results": results,
+    }
+    write_report(report, args.output)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
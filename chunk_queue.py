@@ -0,0 +1,179 @@
+import os
+import threading
+import queue
+import logging
+from collections import deque
+import time
+from metrics import get_metrics
+
+SAMPLE_RATE = 16000
+COALESCE = "coalesce"
+DROP_OLDEST = "drop_oldest"
+QUEUE_MAXSIZE = 6
+QUEUE_POLICY = COALESCE
+MAX_COALESCED_DURATION = 28  # Una sola pasada de Whisper cubre como máximo 30 s
+IN_FLIGHT_DURATION = MAX_COALESCED_DURATION  # Audio que el buffer sigue recibiendo mientras se procesa el fragmento en curso
+# Ajustes por despliegue, sin tocar el código
+POLICY_ENV = "AUDIO_TRANSLATOR_QUEUE_POLICY"
+MAXSIZE_ENV = "AUDIO_TRANSLATOR_QUEUE_MAXSIZE"
+
+def queue_options(environ=None):
+    # Argumentos de FairAudioQueue según el entorno; un valor no válido se ignora con un aviso
+    environ = os.environ if environ is None else environ
+    options = {}
+    policy = environ.get(POLICY_ENV)
+    if policy:
+        if policy in (COALESCE, DROP_OLDEST):
+            options["policy"] = policy
+        else:
+            logging.warning(f"{POLICY_ENV}={policy} no es una política válida ({COALESCE}, {DROP_OLDEST}); se usa {QUEUE_POLICY}")
+    maxsize = environ.get(MAXSIZE_ENV)
+    if maxsize:
+        if maxsize.isdigit() and int(maxsize) >= 1:
+            options["maxsize"] = int(maxsize)
+        else:
+            logging.warning(f"{MAXSIZE_ENV}={maxsize} no es un entero positivo; se usa {QUEUE_MAXSIZE}")
+    return options
+
+class BoundedAudioQueue:
+    def __init__(self, maxsize=QUEUE_MAXSIZE, policy=QUEUE_POLICY, max_coalesced_samples=SAMPLE_RATE * MAX_COALESCED_DURATION, labels=None, in_flight_samples=SAMPLE_RATE * IN_FLIGHT_DURATION):
+        if policy not in (COALESCE, DROP_OLDEST):
+            raise ValueError(f"Política de sobrecarga desconocida: {policy}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.max_coalesced_samples = max_coalesced_samples
+        self.in_flight_samples = in_flight_samples
+        self.labels = labels or {}
+        self.coalesced_chunks = 0
+        self.dropped_chunks = 0
+        self.dropped_samples = 0
+        self._chunks = deque()
+        self._condition = threading.Condition()
+        self.metrics = get_metrics()
+
+    def put(self, chunk):
+        with self._condition:
+            self._expire(chunk)
+            if len(self._chunks) >= self.maxsize:
+                self._make_room()
+            chunk.mark("enqueued")
+            self._chunks.append(chunk)
+            self.metrics.set_gauge("queue_depth", len(self._chunks), queue="audio", **self.labels)
+            self._condition.notify()
+
+    def _make_room(self):
+        if self.policy == COALESCE:
+            # Se fusiona el par contiguo más antiguo que quepa en una sola inferencia
+            for i in range(len(self._chunks) - 1):
+                first, second = self._chunks[i], self._chunks[i + 1]
+                if first.can_merge(second) and max(first.end, second.end) - first.start <= self.max_coalesced_samples:
+                    self._chunks[i] = first.merge(second)
+                    del self._chunks[i + 1]
+                    self.coalesced_chunks += 1
+                    self.metrics.increment("audio_chunks_coalesced")
+                    return
+
+        self._drop(self._chunks.popleft(), "Cola de audio llena")
+
+    def _expire(self, newest):
+        # Lo encolado más el fragmento en curso tiene que caber en el buffer circular: un fragmento
+        # que el productor alcanzaría antes de procesarse se descarta ahora, y se cuenta
+        ring_buffer = newest.ring_buffer
+        limit = ring_buffer.capacity - min(self.in_flight_samples, ring_buffer.capacity // 2)
+        while self._chunks and self._chunks[0].ring_buffer is ring_buffer and newest.end - self._chunks[0].start > limit:
+            self._drop(self._chunks.popleft(), "El buffer de audio se llenaría antes de procesar la cola")
+
+    def _drop(self, chunk, reason):
+        self.dropped_chunks += 1
+        self.dropped_samples += len(chunk)
+        self.metrics.increment("audio_chunks_dropped")
+        logging.warning(f"{reason}: se descarta un fragmento de {len(chunk) / SAMPLE_RATE:.1f} s ({self.dropped_chunks} descartados en total)")
+
+    def get(self, block=True, timeout=None):
+        with self._condition:
+            if block and not self._condition.wait_for(lambda: self._chunks, timeout):
+                raise queue.Empty
+            chunk = None
+            while self._chunks:
+                chunk = self._chunks.popleft()
+                if chunk.start >= chunk.ring_buffer.oldest_index:
+                    break
+                # Si aun así el buffer lo sobrescribió (procesamiento más lento que el tiempo real), se cuenta como descartado
+                self._drop(chunk, "Fragmento sobrescrito en el buffer antes de procesarse")
+                chunk = None
+            self.metrics.set_gauge("queue_depth", len(self._chunks), queue="audio", **self.labels)
+            if chunk is None:
+                raise queue.Empty
+        if "enqueued" in chunk.timestamps:
+            self.metrics.observe("queue_wait", time.monotonic() - chunk.timestamps["enqueued"])
+        return chunk
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def qsize(self):
+        with self._condition:
+            return len(self._chunks)
+
+    def empty(self):
+        return self.qsize() == 0
+
+class FairAudioQueue:
+    # Una cola acotada por fuente; el consumidor las recorre por turnos para que ninguna fuente acapare el modelo
+    def __init__(self, maxsize=QUEUE_MAXSIZE, policy=QUEUE_POLICY, max_coalesced_samples=SAMPLE_RATE * MAX_COALESCED_DURATION):
+        self.maxsize = maxsize
+        self.policy = policy
+        self.max_coalesced_samples = max_coalesced_samples
+        self._queues = {}
+        self._order = []
+        self._next = 0
+        self._condition = threading.Condition()
+        self.metrics = get_metrics()
+
+    def queue_for(self, source):
+        with self._condition:
+            if source not in self._queues:
+                labels = {"source": source.label} if source is not None and source.label else {}
+                self._queues[source] = BoundedAudioQueue(self.maxsize, self.policy, self.max_coalesced_samples, labels)
+                self._order.append(source)
+            return self._queues[source]
+
+    def put(self, chunk):
+        self.queue_for(chunk.source).put(chunk)
+        with self._condition:
+            self.metrics.set_gauge("queue_depth", self._total(), queue="audio")
+            self._condition.notify()
+
+    def get(self, block=True, timeout=None):
+        with self._condition:
+            if block and not self._condition.wait_for(lambda: self._total() > 0, timeout):
+                raise queue.Empty
+            for i in range(len(self._order)):
+                source = self._order[(self._next + i) % len(self._order)]
+                try:
+                    chunk = self._queues[source].get_nowait()
+                except queue.Empty:
+                    continue
+                # La próxima búsqueda empieza por la fuente siguiente a la atendida
+                self._next = (self._next + i + 1) % len(self._order)
+                self.metrics.set_gauge("queue_depth", self._total(), queue="audio")
+                return chunk
+            raise queue.Empty
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def _total(self):
+        return sum(q.qsize() for q in self._queues.values())
+
+    def qsize(self):
+        with self._condition:
+            return self._total()
+
+    def empty(self):
+        return self.qsize() == 0
+
+    @property
+    def dropped_chunks(self):
+        with self._condition:
+            return sum(q.dropped_chunks for q in self._queues.values())
@@ -0,0 +1,113 @@
+import dataclasses
+import math
+import types
+import numpy as np
+
+# Margen de contexto de audio por modelo, en segundos. None usa siempre la ventana completa de 30 s;
+# los modelos grandes toleran peor el recorte, así que se les deja más margen.
+AUDIO_CONTEXT_MARGINS = {
+    "tiny": 1.0,
+    "base": 1.0,
+    "small": 2.0,
+    "medium": 3.0,
+    "large": None,
+}
+AUDIO_CONTEXT_STEP = 100  # Tramas mel (1 s): el contexto se redondea para no generar una forma distinta por fragmento
+HOP_SECONDS = 0.01
+# Mismos umbrales que transcribe(): sin ellos, whisper.decode devuelve texto inventado en silencio o ruido
+TEMPERATURES = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+
+def audio_context_margin(model_name):
+    # Las variantes cuantizadas ("small-int8") usan el margen de su modelo base
+    import model_cache
+    return AUDIO_CONTEXT_MARGINS.get(model_cache.split_model_name(model_name)[0])
+
+def context_frames(num_frames, margin, max_frames):
+    # Tramas mel que necesita un segmento de num_frames con el margen dado, hasta la ventana completa
+    frames = num_frames + int(margin / HOP_SECONDS)
+    frames = int(math.ceil(frames / AUDIO_CONTEXT_STEP)) * AUDIO_CONTEXT_STEP
+    return min(max(frames, AUDIO_CONTEXT_STEP), max_frames)
+
+def _encoder_forward(self, x):
+    import torch.nn.functional as F
+    x = F.gelu(self.conv1(x))
+    x = F.gelu(self.conv2(x))
+    x = x.permute(0, 2, 1)
+    # Igual que AudioEncoder.forward, pero con el embedding posicional recortado a la longitud real
+    x = (x + self.positional_embedding[:x.shape[1]]).to(x.dtype)
+    for block in self.blocks:
+        x = block(x)
+    return self.ln_post(x)
+
+def enable_dynamic_context(model):
+    # El codificador original exige exactamente 1500 posiciones; con 1500 el resultado es idéntico
+    encoder = model.encoder
+    if not getattr(encoder, "dynamic_context", False):
+        encoder.forward = types.MethodType(_encoder_forward, encoder)
+        encoder.dynamic_context = True
+
+def max_frames(model):
+    return 2 * model.dims.n_audio_ctx
+
+def decoding_options(language, prompt=None, fp16=False, temperature=0.0):
+    import whisper
+    return whisper.DecodingOptions(language=language, prompt=prompt or None, fp16=fp16, temperature=temperature)
+
+def is_silence(result):
+    return result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD
+
+def needs_fallback(result):
+    # Repetitivo o poco probable, salvo que sea silencio: entonces no se reintenta, se descarta
+    if result.no_speech_prob > NO_SPEECH_THRESHOLD:
+        return False
+    return result.compression_ratio > COMPRESSION_RATIO_THRESHOLD or result.avg_logprob < LOGPROB_THRESHOLD
+
+def filter_result(result):
+    return dataclasses.replace(result, text="", tokens=[]) if is_silence(result) else result
+
+def decode_with_fallback(model, mel, language, prompt=None, fp16=False, temperatures=TEMPERATURES):
+    # mel ya es un tensor en el dispositivo del modelo; se sube la temperatura mientras el resultado no pase los umbrales
+    import whisper
+    for temperature in temperatures:
+        result = whisper.decode(model, mel, decoding_options(language, prompt, fp16, temperature))
+        if not needs_fallback(result):
+            break
+    return filter_result(result)
+
+def mel_tensor(model, mel):
+    import torch
+    if mel.shape[-1] < max_frames(model):
+        enable_dynamic_context(model)
+    return torch.from_numpy(np.ascontiguousarray(mel)).to(model.device)
+
+def decode_mel(model, mel, language, prompt=None, fp16=False):
+    # Una sola pasada de decodificación sobre un espectrograma ya calculado (sin recalcular la STFT)
+    return decode_with_fallback(model, mel_tensor(model, mel), language, prompt, fp16)
+
+def decode_mel_batch(model, mels, language, fp16=False):
+    # mels: (lote, bandas, tramas), todos con el mismo ancho; una pasada del codificador y del decodificador para el lote
+    import whisper
+    mels = mel_tensor(model, mels)
+    results = whisper.decode(model, mels, decoding_options(language, fp16=fp16))
+    # Solo los fragmentos que no pasan los umbrales se repiten, uno a uno y con más temperatura
+    return [
+        decode_with_fallback(model, mels[i], language, fp16=fp16, temperatures=TEMPERATURES[1:]) if needs_fallback(result) else filter_result(result)
+        for i, result in enumerate(results)
+    ]
+
+def decode_words(model, mel, num_frames, language, prompt=None, fp16=False):
+    from whisper.timing import find_alignment
+    from whisper.tokenizer import get_tokenizer
+
+    mel = mel_tensor(model, mel)
+    result = decode_with_fallback(model, mel, language, prompt, fp16)
+    tokenizer = get_tokenizer(model.is_multilingual, num_languages=model.num_languages, language=language, task="transcribe")
+    text_tokens = [token for token in result.tokens if token < tokenizer.eot]
+    if not text_tokens:
+        return []
+    # Misma alineación por cabezas de atención que usa transcribe(word_timestamps=True)
+    timings = find_alignment(model, tokenizer, text_tokens, mel, num_frames)
+    return [(timing.start, timing.end, timing.word) for timing in timings if timing.word]
@@ -1,9 +1,41 @@
 import sys
-from PyQt5.QtWidgets import QApplication
-from ui import AudioTranslatorApp
+import argparse
+import model_cache
+from startup_profile import StartupProfiler
+
+STARTUP_REPORT_FLAG = "--startup-report"
 
 if __name__ == '__main__':
+    profiler = None
+    if STARTUP_REPORT_FLAG in sys.argv:
+        sys.argv.remove(STARTUP_REPORT_FLAG)
+        profiler = StartupProfiler()
+        profiler.install_import_timer()
+
+    # Las opciones de la caché de modelos se quitan de argv; el resto es para Qt
+    parser = argparse.ArgumentParser(add_help=False)
+    model_cache.add_arguments(parser)
+    cache_args, qt_args = parser.parse_known_args(sys.argv[1:])
+    sys.argv = sys.argv[:1] + qt_args
+    model_cache.configure_from_args(cache_args)
+
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import QTimer
+    from ui import AudioTranslatorApp
+
     app = QApplication(sys.argv)
     ex = AudioTranslatorApp()
     ex.show()
+
+    if profiler is not None:
+        profiler.phase("ventana creada")
+
+        def report_startup():
+            # Se mide cuando el bucle de eventos ya pintó la ventana
+            profiler.phase("ventana visible")
+            profiler.uninstall_import_timer()
+            print(profiler.report(), file=sys.stderr)
+
+        QTimer.singleShot(0, report_startup)
+
     sys.exit(app.exec_())
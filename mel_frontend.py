@@ -0,0 +1,105 @@
+import threading
+import numpy as np
+
+SAMPLE_RATE = 16000
+N_FFT = 400
+HOP_LENGTH = 160
+N_FRAMES = 3000  # 30 s, la ventana fija del codificador de Whisper
+LOG_FLOOR = -10.0  # log10 del mínimo que usa Whisper (1e-10): el valor del silencio digital
+
+def mel_filters(n_mels):
+    import whisper
+    return whisper.audio.mel_filters("cpu", n_mels).numpy()
+
+def normalize_log_mel(log_spec):
+    # Misma normalización que whisper.log_mel_spectrogram, aplicada a la ventana que se va a decodificar
+    log_spec = np.maximum(log_spec, log_spec.max() - 8.0)
+    return (log_spec + 4.0) / 4.0
+
+class IncrementalLogMel:
+    def __init__(self, capacity_frames, n_mels=80, start_index=0, filters=None):
+        self.capacity = int(capacity_frames)
+        self.n_mels = n_mels
+        self.start_index = start_index
+        self.filters = (filters if filters is not None else mel_filters(n_mels)).astype(np.float32)
+        # Ventana de Hann periódica, como torch.hann_window
+        self.hann = (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(N_FFT) / N_FFT)).astype(np.float32)
+        self._frames = np.full((n_mels, self.capacity * 2), LOG_FLOOR, dtype=np.float32)
+        self._frame_count = 0
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._started = False
+        self._condition = threading.Condition()
+
+    @classmethod
+    def from_audio(cls, audio, n_mels=80, start_index=0):
+        # Espectrograma de un fragmento suelto; el final se rellena con ceros como hace transcribe()
+        frontend = cls(len(audio) // HOP_LENGTH + 1, n_mels, start_index)
+        frontend.append(audio)
+        frontend.append(np.zeros(N_FFT // 2, dtype=np.float32))
+        return frontend
+
+    @property
+    def frame_count(self):
+        return self._frame_count
+
+    def frame_index(self, sample_index):
+        return (sample_index - self.start_index) // HOP_LENGTH
+
+    def append(self, samples):
+        samples = np.asarray(samples, dtype=np.float32).reshape(-1)
+        if not self._started:
+            # Igual que torch.stft(center=True): el inicio se rellena por reflexión
+            samples = np.concatenate([self._pending, samples])
+            if len(samples) <= N_FFT // 2:
+                self._pending = samples
+                return
+            samples = np.concatenate([samples[1:N_FFT // 2 + 1][::-1], samples])
+            self._pending = np.zeros(0, dtype=np.float32)
+            self._started = True
+
+        buffer = np.concatenate([self._pending, samples]) if len(self._pending) else samples
+        n_frames = (len(buffer) - N_FFT) // HOP_LENGTH + 1 if len(buffer) >= N_FFT else 0
+        if n_frames > 0:
+            frames = np.lib.stride_tricks.sliding_window_view(buffer, N_FFT)[::HOP_LENGTH][:n_frames]
+            power = np.abs(np.fft.rfft(frames * self.hann, axis=1)) ** 2
+            log_spec = np.log10(np.maximum(self.filters @ power.T.astype(np.float32), 1e-10))
+            self._store(log_spec)
+        self._pending = buffer[n_frames * HOP_LENGTH:].copy()
+
+    def _store(self, log_spec):
+        n = log_spec.shape[1]
+        if n > self.capacity:
+            log_spec = log_spec[:, -self.capacity:]
+            self._frame_count += n - self.capacity
+            n = self.capacity
+        pos = self._frame_count % self.capacity
+        first = min(n, self.capacity - pos)
+        for offset in (0, self.capacity):
+            self._frames[:, offset + pos:offset + pos + first] = log_spec[:, :first]
+            if n > first:
+                self._frames[:, offset:offset + n - first] = log_spec[:, first:]
+        with self._condition:
+            self._frame_count += n
+            self._condition.notify_all()
+
+    def wait_for(self, frame, timeout=None):
+        with self._condition:
+            return self._condition.wait_for(lambda: self._frame_count >= frame, timeout)
+
+    def raw_frames(self, start_frame, end_frame):
+        if start_frame < max(0, self._frame_count - self.capacity) or end_frame > self._frame_count:
+            raise ValueError(f"Tramas fuera de rango: [{start_frame}, {end_frame}) con {self._frame_count} calculadas")
+        pos = start_frame % self.capacity
+        return self._frames[:, pos:pos + end_frame - start_frame]
+
+    def window(self, start_index, end_index, n_frames=N_FRAMES, timeout=0.5):
+        # Devuelve el espectrograma normalizado de [start_index, end_index) rellenado hasta n_frames
+        start_frame = max(0, self.frame_index(start_index))
+        end_frame = min(self.frame_index(end_index), start_frame + n_frames)
+        # Las últimas tramas necesitan 12,5 ms de audio posterior; si no llegan (fin de la grabación) se rellenan
+        self.wait_for(end_frame, timeout)
+        available = min(end_frame, self._frame_count) - start_frame
+        mel = np.full((self.n_mels, n_frames), LOG_FLOOR, dtype=np.float32)
+        if available > 0:
+            mel[:, :available] = self.raw_frames(start_frame, start_frame + available)
+        return normalize_log_mel(mel), max(0, end_frame - start_frame)
@@ -0,0 +1,49 @@
+import threading
+import time
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from metrics import get_metrics
+
+FRAME_INTERVAL = 16  # ms: como máximo una actualización de la interfaz por fotograma
+
+class MessageBus(QObject):
+    delivered = pyqtSignal(list)
+    _wakeup = pyqtSignal()
+
+    def __init__(self, frame_interval=FRAME_INTERVAL, metrics=None):
+        super().__init__()
+        self.metrics = metrics or get_metrics()
+        self._pending = []
+        self._lock = threading.Lock()
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(frame_interval)
+        self._timer.timeout.connect(self._flush)
+        # Emitida desde otros hilos, la señal llega en cola al hilo de la interfaz
+        self._wakeup.connect(self._schedule)
+
+    def put(self, message):
+        with self._lock:
+            first = not self._pending
+            self._pending.append((time.monotonic(), message))
+        # Solo el primer mensaje de cada lote despierta a la interfaz; sin mensajes no hay temporizadores activos
+        if first:
+            self._wakeup.emit()
+
+    def _schedule(self):
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def _flush(self):
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if not batch:
+            return
+        now = time.monotonic()
+        for queued_at, _ in batch:
+            self.metrics.observe("render", now - queued_at)
+        self.metrics.set_gauge("queue_depth", 0, queue="messages")
+        self.delivered.emit([message for _, message in batch])
+
+    def qsize(self):
+        with self._lock:
+            return len(self._pending)
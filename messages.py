@@ -0,0 +1,12 @@
+PROVISIONAL = "provisional"
+COMMITTED = "committed"
+
+class TranscriptMessage:
+    def __init__(self, kind, text, language=None, source=None):
+        self.kind = kind
+        self.text = text
+        self.language = language
+        self.source = source
+
+    def __str__(self):
+        return self.text
@@ -0,0 +1,146 @@
+import os
+import threading
+import time
+import logging
+from collections import deque
+import numpy as np
+
+METRIC_PREFIX = "audio_translator"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+RECENT_SAMPLES = 512  # Observaciones recientes usadas para los percentiles del panel
+STAGES = ("capture", "queue_wait", "inference", "translation", "render")
+DEFAULT_PROMETHEUS_PATH = os.path.join(os.path.expanduser("~"), ".audio_translator", "metrics.prom")
+PROMETHEUS_INTERVAL = 5
+
+def escape_label(value):
+    # Formato de texto de Prometheus: en los valores de las etiquetas se escapan la barra invertida, las comillas y el salto de línea
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self.recent.append(value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def percentile(self, p):
+        if not self.recent:
+            return None
+        return float(np.percentile(self.recent, p))
+
+class PipelineMetrics:
+    def __init__(self):
+        self.started = time.monotonic()
+        self._histograms = {stage: Histogram() for stage in STAGES}
+        self._counters = {}
+        self._gauges = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            if stage not in self._histograms:
+                self._histograms[stage] = Histogram()
+            self._histograms[stage].observe(max(0.0, seconds))
+
+    def increment(self, name, value=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        with self._lock:
+            self._gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def counter(self, name):
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def gauge(self, name, **labels):
+        with self._lock:
+            return self._gauges.get((name, tuple(sorted(labels.items()))))
+
+    def stage_summary(self):
+        with self._lock:
+            return {
+                stage: {"count": h.count, "p50": h.percentile(50), "p95": h.percentile(95)}
+                for stage, h in self._histograms.items()
+            }
+
+    def to_prometheus(self):
+        lines = []
+        with self._lock:
+            name = f"{METRIC_PREFIX}_stage_latency_seconds"
+            lines.append(f"# HELP {name} Latencia de cada etapa del pipeline.")
+            lines.append(f"# TYPE {name} histogram")
+            for stage, h in self._histograms.items():
+                cumulative = 0
+                for bound, count in zip(h.buckets, h.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{stage="{escape_label(stage)}",le="{bound:g}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{stage="{escape_label(stage)}",le="+Inf"}} {h.count}')
+                lines.append(f'{name}_sum{{stage="{escape_label(stage)}"}} {h.sum:.6f}')
+                lines.append(f'{name}_count{{stage="{escape_label(stage)}"}} {h.count}')
+
+            for counter, value in sorted(self._counters.items()):
+                lines.append(f"# TYPE {METRIC_PREFIX}_{counter}_total counter")
+                lines.append(f"{METRIC_PREFIX}_{counter}_total {value:g}")
+
+            typed = set()
+            for (gauge, labels), value in sorted(self._gauges.items()):
+                if gauge not in typed:
+                    lines.append(f"# TYPE {METRIC_PREFIX}_{gauge} gauge")
+                    typed.add(gauge)
+                label_text = ",".join(f'{key}="{escape_label(val)}"' for key, val in labels)
+                lines.append(f"{METRIC_PREFIX}_{gauge}{{{label_text}}} {value:g}" if label_text else f"{METRIC_PREFIX}_{gauge} {value:g}")
+        return "\n".join(lines) + "\n"
+
+class PrometheusFileWriter:
+    def __init__(self, path=DEFAULT_PROMETHEUS_PATH, metrics=None, interval=PROMETHEUS_INTERVAL):
+        self.path = path
+        self.metrics = metrics or get_metrics()
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        # Solo mientras se graba: sin sesión no hay nada nuevo que escribir y el hilo no despierta
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, daemon=True)
+            self._thread.start()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.write()
+
+    def write(self):
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            # Escritura atómica para que el lector nunca vea un archivo a medias
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(self.metrics.to_prometheus())
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logging.warning(f"No se pudieron escribir las métricas en {self.path}: {str(e)}")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.write()
+
+_default_metrics = PipelineMetrics()
+
+def get_metrics():
+    return _default_metrics
@@ -0,0 +1,281 @@
+import os
+import argparse
+import threading
+import time
+import logging
+from collections import OrderedDict
+
+DEFAULT_MEMORY_BUDGET_MB = 4096
+DEFAULT_IDLE_TIMEOUT = 600  # Segundos sin uso antes de descargar un modelo
+PRECISIONS = ("fp32", "fp16", "int8")
+INT8_SUFFIX = "-int8"
+MODEL_NAMES = ("tiny", "base", "small", "medium", "large")
+# Opciones que se ofrecen en la interfaz: cada modelo y su variante int8 para CPU
+MODEL_CHOICES = MODEL_NAMES + tuple(name + INT8_SUFFIX for name in MODEL_NAMES)
+QUANTIZED_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".audio_translator", "models")
+
+def default_device():
+    import torch
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+def split_model_name(name, precision="fp32"):
+    # "small-int8" es el modelo "small" cuantizado a int8 para CPU
+    if name.endswith(INT8_SUFFIX):
+        return name[:-len(INT8_SUFFIX)], "int8"
+    return name, precision
+
+def model_size_bytes(model):
+    # Se recorre el state_dict porque las capas cuantizadas guardan sus pesos empaquetados fuera de parameters()
+    size = 0
+    for value in model.state_dict().values():
+        tensors = value if isinstance(value, tuple) else (value,)
+        size += sum(t.numel() * t.element_size() for t in tensors if hasattr(t, "element_size"))
+    return size
+
+def quantize_int8(model):
+    import torch
+    import whisper.model
+
+    # Whisper usa su propia subclase de Linear; quantize_dynamic solo reconoce nn.Linear
+    def replace_linear(module):
+        for child_name, child in module.named_children():
+            if isinstance(child, whisper.model.Linear):
+                linear = torch.nn.Linear(child.in_features, child.out_features, bias=child.bias is not None)
+                linear.load_state_dict(child.state_dict())
+                setattr(module, child_name, linear)
+            else:
+                replace_linear(child)
+
+    engines = torch.backends.quantized.supported_engines
+    for engine in ("fbgemm", "x86", "qnnpack"):
+        if engine in engines:
+            torch.backends.quantized.engine = engine
+            break
+    replace_linear(model)
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+class CachedModel:
+    def __init__(self, model, size_bytes):
+        self.model = model
+        self.size_bytes = size_bytes
+        self.last_used = time.monotonic()
+        self.users = 0  # Hilos que lo están usando (acquire/release): no se descarta mientras haya alguno
+
+class ModelCache:
+    def __init__(self, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB, idle_timeout=DEFAULT_IDLE_TIMEOUT, quantized_dir=QUANTIZED_CACHE_DIR):
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        self.idle_timeout = idle_timeout
+        self.quantized_dir = quantized_dir
+        self._models = OrderedDict()
+        self._loading = {}
+        self._lock = threading.Lock()
+        self._sweeper = None
+        self._stop_sweeper = threading.Event()
+
+    def _key(self, name, device, precision):
+        name, precision = split_model_name(name, precision)
+        if precision not in PRECISIONS:
+            raise ValueError(f"Precisión no soportada: {precision}")
+        # La cuantización dinámica int8 solo tiene kernels de CPU
+        return (name, "cpu" if precision == "int8" else device or default_device(), precision)
+
+    def is_loaded(self, name, device=None, precision="fp32"):
+        key = self._key(name, device, precision)
+        with self._lock:
+            return key in self._models
+
+    def get(self, name, device=None, precision="fp32"):
+        return self._get(self._key(name, device, precision), acquire=False)
+
+    def acquire(self, name, device=None, precision="fp32"):
+        # Como get(), pero el modelo queda fijado en la caché hasta el release() correspondiente
+        return self._get(self._key(name, device, precision), acquire=True)
+
+    def release(self, name, device=None, precision="fp32"):
+        key = self._key(name, device, precision)
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is not None and entry.users > 0:
+                entry.users -= 1
+                # El tiempo de inactividad cuenta desde que se dejó de usar, no desde que se pidió
+                entry.last_used = time.monotonic()
+
+    def _get(self, key, acquire):
+        while True:
+            with self._lock:
+                entry = self._models.get(key)
+                if entry is not None:
+                    self._models.move_to_end(key)
+                    entry.last_used = time.monotonic()
+                    entry.users += acquire
+                    return entry.model
+                loading = self._loading.get(key)
+                if loading is None:
+                    # Este hilo se encarga de la carga; los demás esperan al mismo modelo
+                    loading = self._loading[key] = threading.Event()
+                    break
+            loading.wait()
+
+        try:
+            model = self._load(*key)
+            with self._lock:
+                entry = self._models[key] = CachedModel(model, model_size_bytes(model))
+                entry.users += acquire
+                self._evict_over_budget()
+            self._ensure_sweeper()
+            return model
+        finally:
+            with self._lock:
+                del self._loading[key]
+            loading.set()
+
+    def _load(self, name, device, precision):
+        # whisper (y con él torch) se importa en el primer uso, nunca al arrancar la aplicación
+        import whisper
+        logging.info(f"Cargando modelo Whisper '{name}' en {device} ({precision})")
+        start = time.monotonic()
+        if precision == "int8":
+            model = self._load_quantized(name)
+        else:
+            model = whisper.load_model(name, device=device)
+        if precision == "fp16":
+            model = model.half()
+        logging.info(f"Modelo '{name}' cargado en {time.monotonic() - start:.1f} s")
+        return model
+
+    def _load_quantized(self, name):
+        import dataclasses
+        import torch
+        import whisper
+        from whisper.model import ModelDimensions, Whisper
+        # Solo se guardan las dimensiones y los pesos: un módulo serializado con pickle ejecutaría código al cargarse
+        path = os.path.join(self.quantized_dir, f"{name}{INT8_SUFFIX}.state.pt")
+        if os.path.exists(path):
+            try:
+                checkpoint = torch.load(path, map_location="cpu", weights_only=True)
+                model = quantize_int8(Whisper(ModelDimensions(**checkpoint["dims"])))
+                model.load_state_dict(checkpoint["model_state_dict"])
+                if name in whisper._ALIGNMENT_HEADS:
+                    model.set_alignment_heads(whisper._ALIGNMENT_HEADS[name])
+                return model
+            except Exception as e:
+                logging.warning(f"No se pudo leer el modelo cuantizado {path}, se vuelve a cuantizar: {str(e)}")
+
+        model = quantize_int8(whisper.load_model(name, device="cpu"))
+        # Se guarda el modelo ya cuantizado para no repetir la conversión en cada arranque
+        try:
+            os.makedirs(self.quantized_dir, exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            torch.save({"dims": dataclasses.asdict(model.dims), "model_state_dict": model.state_dict()}, tmp_path)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logging.warning(f"No se pudo guardar el modelo cuantizado en {path}: {str(e)}")
+        return model
+
+    def _used_bytes(self):
+        return sum(entry.size_bytes for entry in self._models.values())
+
+    def _evict_over_budget(self):
+        # Siempre se conserva el modelo recién usado aunque supere el presupuesto por sí solo, y nunca
+        # se descarta uno en uso: quien lo tiene seguiría con su copia y la caché cargaría otra
+        candidates = [key for key, entry in list(self._models.items())[:-1] if entry.users == 0]
+        while candidates and self._used_bytes() > self.memory_budget:
+            key = candidates.pop(0)
+            del self._models[key]
+            logging.info(f"Modelo {key} descartado por presupuesto de memoria")
+            self._release_device_memory(key[1])
+
+    def discard(self, name, device=None, precision="fp32"):
+        # Descarga el modelo ya, si nadie lo está usando
+        key = self._key(name, device, precision)
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is None or entry.users > 0:
+                return False
+            del self._models[key]
+        self._release_device_memory(key[1])
+        return True
+
+    def evict_idle(self):
+        if self.idle_timeout is None:
+            return []
+        now = time.monotonic()
+        with self._lock:
+            idle = [key for key, entry in self._models.items() if entry.users == 0 and now - entry.last_used > self.idle_timeout]
+            for key in idle:
+                del self._models[key]
+                logging.info(f"Modelo {key} descargado por inactividad")
+        for key in idle:
+            self._release_device_memory(key[1])
+        return idle
+
+    def clear(self):
+        with self._lock:
+            keys = list(self._models)
+            self._models.clear()
+        for key in keys:
+            self._release_device_memory(key[1])
+
+    def loaded_models(self):
+        with self._lock:
+            return list(self._models)
+
+    def _release_device_memory(self, device):
+        if str(device).startswith("cuda"):
+            import torch
+            torch.cuda.empty_cache()
+
+    def _ensure_sweeper(self):
+        if self.idle_timeout is None or (self._sweeper is not None and self._sweeper.is_alive()):
+            return
+        self._sweeper = threading.Thread(target=self._sweep_loop, daemon=True)
+        self._sweeper.start()
+
+    def _sweep_loop(self):
+        interval = max(1, min(self.idle_timeout / 2, 60))
+        while not self._stop_sweeper.wait(interval):
+            self.evict_idle()
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def get_model_cache():
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ModelCache()
+        return _default_cache
+
+def configure(memory_budget_mb=None, idle_timeout=None):
+    cache = get_model_cache()
+    if memory_budget_mb is not None:
+        cache.memory_budget = memory_budget_mb * 1024 * 1024
+    if idle_timeout is not None:
+        # 0 desactiva la descarga por inactividad
+        cache.idle_timeout = idle_timeout or None
+    return cache
+
+def non_negative_number(value):
+    number = float(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"no puede ser negativo: {value}")
+    return number
+
+def add_arguments(parser):
+    parser.add_argument("--model-memory-mb", type=non_negative_number, default=None, help=f"Memoria máxima para los modelos cargados, en MB (por defecto {DEFAULT_MEMORY_BUDGET_MB})")
+    parser.add_argument("--model-idle-timeout", type=non_negative_number, default=None, help=f"Segundos sin uso antes de descargar un modelo, 0 para no descargarlo nunca (por defecto {DEFAULT_IDLE_TIMEOUT})")
+
+def configure_from_args(args):
+    return configure(memory_budget_mb=args.model_memory_mb, idle_timeout=args.model_idle_timeout)
+
+def load_model(name, device=None, precision="fp32"):
+    return get_model_cache().get(name, device=device, precision=precision)
+
+def acquire_model(name, device=None, precision="fp32"):
+    return get_model_cache().acquire(name, device=device, precision=precision)
+
+def release_model(name, device=None, precision="fp32"):
+    get_model_cache().release(name, device=device, precision=precision)
+
+def discard_model(name, device=None, precision="fp32"):
+    return get_model_cache().discard(name, device=device, precision=precision)
@@ -0,0 +1,101 @@
+import threading
+import logging
+import model_cache
+
+RTF_SMOOTHING = 0.3  # Peso de la última medida en la media exponencial del factor de tiempo real
+STEP_DOWN_RTF = 0.9  # Por encima, el modelo apenas da abasto y la cola empieza a crecer
+STEP_UP_RTF = 0.35  # Por debajo, hay margen para probar el modelo siguiente
+MAX_LAG = 10.0  # Segundos de retraso respecto de la captura que obligan a bajar aunque el RTF parezca bueno
+DOWN_PATIENCE = 2  # Observaciones lentas seguidas antes de bajar
+UP_PATIENCE = 6  # Observaciones holgadas seguidas antes de subir
+COOLDOWN = 3  # Observaciones ignoradas tras un cambio, mientras se estabilizan las medidas
+RETRY_DELAY = 20  # Observaciones extra antes de volver a probar un modelo que ya resultó lento
+
+def model_ladder(selected, minimum=None):
+    # Modelos entre el mínimo y el seleccionado, de la misma familia (normal o -int8), de menor a mayor coste
+    name, precision = model_cache.split_model_name(selected)
+    names = model_cache.MODEL_NAMES
+    high = names.index(name)
+    low = names.index(model_cache.split_model_name(minimum)[0]) if minimum else 0
+    suffix = model_cache.INT8_SUFFIX if precision == "int8" else ""
+    return [n + suffix for n in names[min(low, high):high + 1]]
+
+class AdaptiveModelController:
+    def __init__(self, ladder, current=None):
+        self.ladder = list(ladder)
+        self.index = self.ladder.index(current) if current in self.ladder else len(self.ladder) - 1
+        self.rtf = None
+        self.measured = {}
+        self.slow = 0
+        self.fast = 0
+        self.cooldown = 0
+        self._loading = None
+        self._ready = None
+        self._lock = threading.Lock()
+
+    @property
+    def current(self):
+        return self.ladder[self.index]
+
+    def observe(self, rtf, lag, backlog=0):
+        # Devuelve el nombre del modelo al que hay que cambiar, o None para seguir con el actual
+        self.rtf = rtf if self.rtf is None else RTF_SMOOTHING * rtf + (1 - RTF_SMOOTHING) * self.rtf
+        self.measured[self.current] = self.rtf
+
+        with self._lock:
+            ready, self._ready = self._ready, None
+        if ready is not None:
+            return self._switch(ready)
+        if self._loading is not None:
+            return None
+        if self.cooldown:
+            self.cooldown -= 1
+            return None
+
+        if self.rtf > STEP_DOWN_RTF or lag > MAX_LAG:
+            self.slow += 1
+            self.fast = 0
+        elif self.rtf < STEP_UP_RTF and lag < MAX_LAG / 2 and backlog == 0:
+            self.fast += 1
+            self.slow = 0
+        else:
+            self.slow = self.fast = 0
+
+        if self.slow >= DOWN_PATIENCE and self.index > 0:
+            return self._step(self.index - 1)
+        if self.fast >= UP_PATIENCE and self.index < len(self.ladder) - 1:
+            upper = self.ladder[self.index + 1]
+            if self.measured.get(upper, 0) < STEP_DOWN_RTF:
+                return self._step(self.index + 1)
+            # Ya resultó lento: se espera RETRY_DELAY observaciones más y se olvida la medida para volver a probarlo
+            del self.measured[upper]
+            self.fast = -RETRY_DELAY
+        return None
+
+    def _step(self, index):
+        self.slow = self.fast = 0
+        name = self.ladder[index]
+        if model_cache.get_model_cache().is_loaded(name):
+            return self._switch(index)
+        # El modelo se carga en segundo plano; mientras tanto sigue el actual
+        self._loading = index
+        threading.Thread(target=self._load, args=(index,), daemon=True).start()
+        return None
+
+    def _load(self, index):
+        name = self.ladder[index]
+        try:
+            model_cache.load_model(name)
+            with self._lock:
+                self._ready = index
+        except Exception as e:
+            logging.error(f"No se pudo cargar el modelo {name} para el ajuste automático: {str(e)}")
+        finally:
+            self._loading = None
+
+    def _switch(self, index):
+        self.index = index
+        self.rtf = None
+        self.slow = self.fast = 0
+        self.cooldown = COOLDOWN
+        return self.current
@@ -0,0 +1,42 @@
+import numpy as np
+from PyQt5.QtCore import QThread, pyqtSignal
+import logging
+import time
+import model_cache
+
+WARMUP_SECONDS = 1
+SAMPLE_RATE = 16000
+
+class ModelWarmupThread(QThread):
+    progress = pyqtSignal(int, str)
+    ready = pyqtSignal(str, int)  # Nombre del modelo y número de bandas mel que espera
+    failed = pyqtSignal(str, str)
+
+    def __init__(self, model_name, language=None, pin=False):
+        super().__init__()
+        self.model_name = model_name
+        self.language = language
+        # Con pin=True el modelo queda fijado en la caché: quien recibe ready debe llamar a model_cache.release_model
+        self.pin = pin
+
+    def run(self):
+        model = None
+        try:
+            start = time.monotonic()
+            self.progress.emit(0, f"Cargando modelo {self.model_name}...")
+            model = model_cache.acquire_model(self.model_name) if self.pin else model_cache.load_model(self.model_name)
+
+            # Una inferencia sobre silencio deja inicializados los kernels y cachés del modelo
+            self.progress.emit(60, f"Preparando modelo {self.model_name}...")
+            silence = np.zeros(SAMPLE_RATE * WARMUP_SECONDS, dtype=np.float32)
+            model.transcribe(silence, language=self.language, fp16=False)
+
+            self.progress.emit(100, f"Modelo {self.model_name} listo")
+            logging.info(f"Modelo '{self.model_name}' preparado en {time.monotonic() - start:.1f} s")
+        except Exception as e:
+            if self.pin and model is not None:
+                model_cache.release_model(self.model_name)
+            logging.error(f"Error al preparar el modelo {self.model_name}: {str(e)}")
+            self.failed.emit(self.model_name, str(e))
+            return
+        self.ready.emit(self.model_name, model.dims.n_mels)
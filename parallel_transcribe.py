@@ -0,0 +1,150 @@
+import multiprocessing
+import os
+import logging
+from concurrent.futures import ProcessPoolExecutor
+import model_cache
+from vad import EnergyVAD
+from batch_transcribe import init_worker, transcribe_range
+
+PIECE_SECONDS = 60  # Duración buscada de cada pieza; el corte se hace en un silencio cercano
+MIN_PIECE_SECONDS = 30
+MAX_PIECE_SECONDS = 90
+MIN_SILENCE_SECONDS = 0.3
+CLEAR_SILENCE_SECONDS = 0.6  # A partir de aquí cualquier silencio es un corte seguro y manda la duración buscada
+OVERLAP_SECONDS = 2.0  # Solapamiento cuando no hay silencio y hay que cortar en medio de la voz
+MAX_OVERLAP_WORDS = 12
+VAD_BLOCK_FRAMES = 900  # ~29 s por bloque: el análisis lee la sesión del disco por partes
+# Parámetros de cada modelo, para estimar la memoria de un proceso sin cargarlo
+MODEL_PARAMETERS = {"tiny": 39e6, "base": 74e6, "small": 244e6, "medium": 769e6, "large": 1550e6}
+WORKER_OVERHEAD_BYTES = 512 * 1024 * 1024  # torch y whisper importados en cada proceso, más las activaciones
+
+def find_silences(session, vad=None, min_silence=MIN_SILENCE_SECONDS):
+    # Tramos de silencio (inicio, fin) en muestras, de al menos min_silence
+    vad = vad or EnergyVAD(session.sample_rate)
+    frame_length = vad.frame_length
+    block = frame_length * VAD_BLOCK_FRAMES
+    min_frames = max(1, int(min_silence * session.sample_rate / frame_length))
+    silences = []
+    run_start = None
+    position = 0
+    while position < session.total_samples:
+        flags = vad.is_speech(session.read(position, position + block))
+        for i, is_speech in enumerate(flags):
+            frame_start = position + i * frame_length
+            if not is_speech and run_start is None:
+                run_start = frame_start
+            elif is_speech and run_start is not None:
+                if (frame_start - run_start) // frame_length >= min_frames:
+                    silences.append((run_start, frame_start))
+                run_start = None
+        position += block
+    if run_start is not None and (session.total_samples - run_start) // frame_length >= min_frames:
+        silences.append((run_start, session.total_samples))
+    return silences
+
+def plan_pieces(total_samples, silences, sample_rate, piece=PIECE_SECONDS, min_piece=MIN_PIECE_SECONDS, max_piece=MAX_PIECE_SECONDS, overlap=OVERLAP_SECONDS):
+    # Piezas (inicio, fin) en muestras, cortadas en el centro de un silencio entre min_piece y max_piece
+    target = int(piece * sample_rate)
+    low = int(min_piece * sample_rate)
+    high = int(max_piece * sample_rate)
+    clear = int(CLEAR_SILENCE_SECONDS * sample_rate)
+    pieces = []
+    start = 0
+    while total_samples - start > high:
+        candidates = [(s, e) for s, e in silences if start + low <= (s + e) // 2 <= start + high]
+        if candidates:
+            # El silencio más claro; entre los claros, el más cercano a la duración buscada
+            s, e = max(candidates, key=lambda c: (min(c[1] - c[0], clear), -abs((c[0] + c[1]) // 2 - start - target)))
+            cut = (s + e) // 2
+            pieces.append((start, cut))
+            start = cut
+        else:
+            # Voz continua: se corta y la pieza siguiente repite el final para no perder la palabra partida
+            cut = start + high
+            pieces.append((start, cut))
+            start = cut - int(overlap * sample_rate)
+    pieces.append((start, total_samples))
+    return pieces
+
+def normalize_word(word):
+    return word.strip(".,;:!?¿¡\"'").lower()
+
+def drop_repeated_prefix(tail_words, text, max_words=MAX_OVERLAP_WORDS):
+    # Quita del principio de text las palabras con las que ya terminaba la transcripción anterior
+    words = text.split()
+    tail = [normalize_word(word) for word in tail_words[-max_words:]]
+    for k in range(min(len(tail), len(words)), 0, -1):
+        if tail[-k:] == [normalize_word(word) for word in words[:k]]:
+            return " ".join(words[k:])
+    return text
+
+class TranscriptStitcher:
+    # Une los segmentos de piezas consecutivas con marcas de tiempo absolutas y sin repetir lo solapado
+    def __init__(self):
+        self.last_end = 0.0
+        self.tail_words = []
+
+    def add(self, offset, segments):
+        kept = []
+        for segment in segments:
+            start = offset + segment["start"]
+            end = offset + segment["end"]
+            text = segment["text"].strip()
+            if end <= self.last_end:
+                continue
+            if start < self.last_end:
+                text = drop_repeated_prefix(self.tail_words, text)
+                start = self.last_end
+            if not text:
+                continue
+            kept.append({"start": start, "end": end, "text": text})
+            self.last_end = end
+            self.tail_words = (self.tail_words + text.split())[-MAX_OVERLAP_WORDS:]
+        return kept
+
+def estimated_model_bytes(model_name):
+    # Aproximado: con int8 las capas lineales, casi todos los pesos, ocupan un byte por parámetro
+    name, precision = model_cache.split_model_name(model_name)
+    return int(MODEL_PARAMETERS.get(name, MODEL_PARAMETERS["large"]) * (1 if precision == "int8" else 4))
+
+def available_memory():
+    try:
+        import psutil
+        return psutil.virtual_memory().available
+    except ImportError:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+def memory_workers(model_name):
+    # Procesos que caben en la memoria libre, cada uno con su copia del modelo; None si no se puede medir
+    available = available_memory()
+    if available is None:
+        return None
+    return max(1, available // (estimated_model_bytes(model_name) + WORKER_OVERHEAD_BYTES))
+
+def default_workers(model_name=None):
+    workers = max(1, (os.cpu_count() or 1) // 2)
+    limit = memory_workers(model_name) if model_name is not None else None
+    return min(workers, limit) if limit is not None else workers
+
+def transcribe_parallel(session, model_name, language, workers=None, device="cpu", pieces=None):
+    # Genera, en orden, los segmentos de cada pieza; las piezas siguientes se transcriben mientras tanto
+    if pieces is None:
+        pieces = plan_pieces(session.total_samples, find_silences(session), session.sample_rate)
+    workers = min(workers or default_workers(model_name), len(pieces))
+    limit = memory_workers(model_name)
+    if limit is not None and workers > limit:
+        logging.warning(f"Se usan {limit} procesos en lugar de {workers}: no hay memoria libre para más copias de {model_name}")
+        workers = limit
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    stitcher = TranscriptStitcher()
+    context = multiprocessing.get_context("spawn")
+    # Cada proceso carga su modelo y lee su pieza del archivo mapeado: no se copia audio entre procesos
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=init_worker, initargs=(model_name, device, language, threads)) as executor:
+        futures = [executor.submit(transcribe_range, session.directory, start, end) for start, end in pieces]
+        for (start, _), future in zip(pieces, futures):
+            result = future.result()
+            yield stitcher.add(start / session.sample_rate, result["segments"])
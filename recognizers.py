@@ -0,0 +1,67 @@
+import numpy as np
+import model_cache
+from resampler import StreamingResampler
+
+SAMPLE_RATE = 16000
+# Google necesita la variante regional del idioma
+GOOGLE_LANGUAGE_TAGS = {"es": "es-ES", "en": "en-US", "pt": "pt-BR"}
+
+def to_pcm16(samples):
+    samples = np.clip(np.asarray(samples, dtype=np.float32).reshape(-1), -1, 1)
+    return (samples * 32767).astype(np.int16).tobytes()
+
+class RecognizerBackend:
+    name = None
+    word_timestamps = False  # Si sirve para el modo streaming
+
+    def transcribe(self, samples, language, sample_rate=SAMPLE_RATE):
+        raise NotImplementedError
+
+class WhisperRecognizerBackend(RecognizerBackend):
+    name = "whisper"
+    word_timestamps = True
+
+    def __init__(self, model_name="small"):
+        self.model_name = model_name
+
+    def transcribe(self, samples, language, sample_rate=SAMPLE_RATE):
+        samples = np.asarray(samples, dtype=np.float32)
+        if sample_rate != SAMPLE_RATE:
+            resampler = StreamingResampler(sample_rate, SAMPLE_RATE, samples.shape[1] if samples.ndim > 1 else 1)
+            samples = np.concatenate([resampler.process(samples), resampler.flush()])
+        model = model_cache.load_model(self.model_name)
+        return model.transcribe(np.clip(samples.reshape(-1), -1, 1), language=language, fp16=False)["text"]
+
+class GoogleRecognizerBackend(RecognizerBackend):
+    name = "google"
+
+    def __init__(self):
+        self.sr = None
+        self.recognizer = None
+
+    def client(self):
+        # speech_recognition se importa en el primer uso, como googletrans
+        if self.recognizer is None:
+            import speech_recognition as sr
+            self.sr = sr
+            self.recognizer = sr.Recognizer()
+        return self.recognizer
+
+    def transcribe(self, samples, language, sample_rate=SAMPLE_RATE):
+        recognizer = self.client()
+        # El PCM int16 se entrega directamente en memoria: sin WAV en disco ni codificar y decodificar un WAV
+        audio = self.sr.AudioData(to_pcm16(samples), int(sample_rate), 2)
+        try:
+            return recognizer.recognize_google(audio, language=GOOGLE_LANGUAGE_TAGS.get(language, language))
+        except self.sr.UnknownValueError:
+            return ""
+
+BACKENDS = {
+    WhisperRecognizerBackend.name: WhisperRecognizerBackend,
+    GoogleRecognizerBackend.name: GoogleRecognizerBackend,
+}
+
+def create_recognizer(name="whisper", **options):
+    if name not in BACKENDS:
+        raise ValueError(f"Motor de reconocimiento desconocido: {name}")
+    return BACKENDS[name](**options)
@@ -0,0 +1,77 @@
+from math import gcd
+import numpy as np
+
+ZERO_CROSSINGS = 10  # Semiancho del filtro en periodos de la frecuencia más baja, como scipy.signal.resample_poly
+KAISER_BETA = 5.0
+
+def design_lowpass(up, down, zero_crossings=ZERO_CROSSINGS, beta=KAISER_BETA):
+    # Sinc enventanado (Kaiser) con corte en la menor de las dos frecuencias de Nyquist, a la tasa intermedia
+    max_rate = max(up, down)
+    half_length = zero_crossings * max_rate
+    n = np.arange(-half_length, half_length + 1)
+    h = np.sinc(n / max_rate) / max_rate * np.kaiser(len(n), beta)
+    return (h * up).astype(np.float64)
+
+class StreamingResampler:
+    def __init__(self, in_rate, out_rate=16000, channels=1):
+        g = gcd(int(in_rate), int(out_rate))
+        self.up = int(out_rate) // g
+        self.down = int(in_rate) // g
+        self.channels = channels
+        h = design_lowpass(self.up, self.down)
+        self.delay = (len(h) - 1) // 2
+        # Matriz polifásica: la fila p tiene los coeficientes h[p], h[p + up], h[p + 2·up], ...
+        self.taps = -(-len(h) // self.up)
+        padded = np.zeros(self.taps * self.up)
+        padded[:len(h)] = h
+        self.phases = padded.reshape(self.taps, self.up).T.astype(np.float32)
+        # Historial de entrada: las últimas taps - 1 muestras (ceros antes del inicio)
+        self._history = np.zeros(self.taps - 1, dtype=np.float32)
+        self._consumed = 0  # Muestras de entrada ya recibidas
+        self._next_output = 0
+
+    @property
+    def passthrough(self):
+        return self.up == 1 and self.down == 1
+
+    def downmix(self, block):
+        block = np.asarray(block, dtype=np.float32)
+        if block.ndim == 1:
+            return block
+        # La mezcla es lineal, así que se hace antes de filtrar y se filtra un solo canal
+        return block[:, 0] if block.shape[1] == 1 else block.mean(axis=1)
+
+    def process(self, block):
+        samples = self.downmix(block)
+        if self.passthrough:
+            return samples
+
+        buffer = np.concatenate([self._history, samples])
+        buffer_start = self._consumed - len(self._history)  # Índice global de buffer[0]
+        self._consumed += len(samples)
+
+        # Salida n = muestra (n·down + delay) de la señal sobremuestreada y filtrada; necesita la entrada hasta (n·down + delay) // up
+        last = (self._consumed * self.up - 1 - self.delay) // self.down
+        count = max(0, last - self._next_output + 1)
+        if count:
+            positions = (self._next_output + np.arange(count, dtype=np.int64)) * self.down + self.delay
+            newest = positions // self.up - buffer_start
+            if self.up == 1:
+                # Solo diezmado (p. ej. 48 kHz → 16 kHz): ventanas deslizantes sin índices por salida
+                windows = np.lib.stride_tricks.sliding_window_view(buffer, self.taps)[newest - self.taps + 1]
+                output = windows @ self.phases[0][::-1]
+            else:
+                gathered = buffer[newest[:, None] - np.arange(self.taps)]
+                output = np.einsum("ij,ij->i", gathered, self.phases[positions % self.up])
+            self._next_output += count
+        else:
+            output = np.zeros(0, dtype=np.float32)
+
+        self._history = buffer[len(buffer) - (self.taps - 1):] if self.taps > 1 else buffer[:0]
+        return output.astype(np.float32, copy=False)
+
+    def flush(self):
+        # Completa las muestras que esperaban la mitad futura del filtro
+        if self.passthrough:
+            return np.zeros(0, dtype=np.float32)
+        return self.process(np.zeros(self.taps, dtype=np.float32))
@@ -0,0 +1,97 @@
+import threading
+import time
+import numpy as np
+from metrics import get_metrics
+
+class AudioRingBuffer:
+    def __init__(self, capacity, sample_rate=16000):
+        self.capacity = int(capacity)
+        self.sample_rate = sample_rate
+        self.last_write_time = time.monotonic()
+        # Cada muestra se escribe dos veces (espejo) para que cualquier ventana
+        # de hasta `capacity` muestras sea una vista contigua, sin copias
+        self._buffer = np.zeros(self.capacity * 2, dtype=np.float32)
+        self._write_index = 0
+        self._condition = threading.Condition()
+
+    @property
+    def write_index(self):
+        return self._write_index
+
+    @property
+    def oldest_index(self):
+        return max(0, self._write_index - self.capacity)
+
+    def write(self, block):
+        block = np.asarray(block).reshape(-1)
+        n = len(block)
+        index = self._write_index
+        if n > self.capacity:
+            index += n - self.capacity
+            block = block[-self.capacity:]
+            n = self.capacity
+
+        pos = index % self.capacity
+        first = min(n, self.capacity - pos)
+        rest = n - first
+        self._buffer[pos:pos + first] = block[:first]
+        self._buffer[pos + self.capacity:pos + self.capacity + first] = block[:first]
+        if rest:
+            self._buffer[:rest] = block[first:]
+            self._buffer[self.capacity:self.capacity + rest] = block[first:]
+
+        with self._condition:
+            self._write_index = index + n
+            self.last_write_time = time.monotonic()
+            self._condition.notify_all()
+
+    def sample_time(self, index):
+        # Momento aproximado (reloj monotónico) en que se capturó la muestra `index`
+        return self.last_write_time - (self._write_index - index) / self.sample_rate
+
+    def read(self, start, end):
+        if end < start or end > self._write_index:
+            raise ValueError(f"Ventana fuera de rango: [{start}, {end}) con {self._write_index} muestras escritas")
+        if start < self.oldest_index:
+            raise ValueError(f"Las muestras desde {start} ya fueron sobrescritas (más antigua: {self.oldest_index})")
+        pos = start % self.capacity
+        # La vista es válida mientras el productor no avance más de `capacity` muestras
+        return self._buffer[pos:pos + end - start]
+
+    def wait_for(self, index, timeout=None):
+        with self._condition:
+            return self._condition.wait_for(lambda: self._write_index >= index, timeout)
+
+class AudioChunk:
+    def __init__(self, ring_buffer, start, end, source=None):
+        self.ring_buffer = ring_buffer
+        self.start = start
+        self.end = end
+        self.source = source
+        self.timestamps = {}
+
+    def __len__(self):
+        return self.end - self.start
+
+    def data(self):
+        return self.ring_buffer.read(self.start, self.end)
+
+    def mark(self, name):
+        self.timestamps[name] = time.monotonic()
+
+    def can_merge(self, other):
+        return self.ring_buffer is other.ring_buffer and self.start <= other.start
+
+    def merge(self, other):
+        # Fusionar dos fragmentos del mismo buffer es solo ampliar la ventana (incluye el hueco entre ambos)
+        merged = AudioChunk(self.ring_buffer, self.start, max(self.end, other.end), self.source)
+        merged.timestamps = dict(self.timestamps)
+        return merged
+
+def emit_chunk(audio_queue, chunk):
+    # Retardo entre la captura de la última muestra y la entrega del fragmento a la cola
+    metrics = get_metrics()
+    chunk.mark("emitted")
+    metrics.observe("capture", chunk.timestamps["emitted"] - chunk.ring_buffer.sample_time(chunk.end))
+    metrics.increment("audio_chunks")
+    audio_queue.put(chunk)
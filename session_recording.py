@@ -0,0 +1,144 @@
+import json
+import os
+import shutil
+import time
+import numpy as np
+
+SAMPLE_RATE = 16000
+WINDOW_SECONDS = 30  # Ventana de Whisper
+SEGMENT_SECONDS = 300  # 5 min por archivo: ~19 MB de float32 a 16 kHz
+SESSION_DIR = os.path.join(os.path.expanduser("~"), ".audio_translator", "sessions")
+METADATA_FILE = "session.json"
+DTYPE = np.float32
+
+class SessionRecording:
+    # Audio de una sesión larga en disco, en segmentos de float32 crudo; la memoria usada no crece con la duración
+    def __init__(self, directory, sample_rate=SAMPLE_RATE, segment_seconds=SEGMENT_SECONDS):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.segment_samples = int(segment_seconds * sample_rate)
+        self.total_samples = 0
+        self._file = None
+        self._maps = {}
+
+    @classmethod
+    def create(cls, base_dir=SESSION_DIR, sample_rate=SAMPLE_RATE, segment_seconds=SEGMENT_SECONDS):
+        directory = os.path.join(base_dir, time.strftime("session-%Y%m%d-%H%M%S"))
+        suffix = 1
+        while os.path.exists(directory):
+            directory = os.path.join(base_dir, time.strftime("session-%Y%m%d-%H%M%S") + f"-{suffix}")
+            suffix += 1
+        os.makedirs(directory)
+        session = cls(directory, sample_rate, segment_seconds)
+        session._write_metadata()
+        return session
+
+    @classmethod
+    def open(cls, directory):
+        # Para leer una sesión ya grabada, también desde otro proceso
+        with open(os.path.join(directory, METADATA_FILE), encoding="utf-8") as f:
+            metadata = json.load(f)
+        session = cls(directory, metadata["sample_rate"], metadata["segment_samples"] / metadata["sample_rate"])
+        # La duración sale del tamaño de los segmentos, así también se recupera una sesión interrumpida
+        index = 0
+        while os.path.exists(session.segment_path(index)):
+            session.total_samples += os.path.getsize(session.segment_path(index)) // np.dtype(DTYPE).itemsize
+            index += 1
+        return session
+
+    @property
+    def duration(self):
+        return self.total_samples / self.sample_rate
+
+    def segment_path(self, index):
+        return os.path.join(self.directory, f"segment-{index:04d}.f32")
+
+    def _write_metadata(self):
+        metadata = {"sample_rate": self.sample_rate, "segment_samples": self.segment_samples}
+        path = os.path.join(self.directory, METADATA_FILE)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(metadata, f)
+        os.replace(path + ".tmp", path)
+
+    def write(self, samples):
+        samples = np.asarray(samples, dtype=DTYPE).reshape(-1)
+        while len(samples):
+            offset = self.total_samples % self.segment_samples
+            if self._file is None:
+                self._file = open(self.segment_path(self.total_samples // self.segment_samples), "ab")
+            count = min(len(samples), self.segment_samples - offset)
+            self._file.write(samples[:count].tobytes())
+            self.total_samples += count
+            samples = samples[count:]
+            if offset + count == self.segment_samples:
+                # Segmento lleno: se cierra y los datos ya no ocupan memoria del proceso
+                self._file.close()
+                self._file = None
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _segment(self, index):
+        # Mapeo de solo lectura: las páginas se cargan bajo demanda y el sistema puede liberarlas
+        segment = self._maps.get(index)
+        if segment is None:
+            segment = np.memmap(self.segment_path(index), dtype=DTYPE, mode="r")
+            self._maps[index] = segment
+        return segment
+
+    def read(self, start, end):
+        start = max(0, start)
+        end = min(end, self.total_samples)
+        if end <= start:
+            return np.zeros(0, dtype=DTYPE)
+        # Los mapeos de segmentos anteriores a la lectura ya no hacen falta: la lectura avanza por la sesión
+        first = start // self.segment_samples
+        for index in [index for index in self._maps if index < first]:
+            del self._maps[index]
+        parts = []
+        position = start
+        while position < end:
+            index, offset = divmod(position, self.segment_samples)
+            count = min(end - position, self.segment_samples - offset)
+            parts.append(self._segment(index)[offset:offset + count])
+            position += count
+        # Copia solo la ventana pedida, no la sesión entera
+        return np.concatenate(parts) if len(parts) > 1 else np.array(parts[0])
+
+    def release(self):
+        # Cierra los mapeos abiertos (necesario antes de borrar los archivos en Windows)
+        self._maps = {}
+
+    def remove(self):
+        self.close()
+        self.release()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+def transcribe_session(model, session, language, window_seconds=WINDOW_SECONDS):
+    # Transcribe la sesión ventana a ventana desde los archivos mapeados; en memoria solo hay una ventana
+    window = int(window_seconds * session.sample_rate)
+    position = 0
+    prompt = None
+    while position < session.total_samples:
+        audio = session.read(position, position + window)
+        result = model.transcribe(np.clip(audio, -1, 1), language=language, fp16=False, initial_prompt=prompt)
+        segments = [segment for segment in result["segments"] if segment["text"].strip()]
+        advance = len(audio)
+        if position + len(audio) < session.total_samples and len(segments) > 1:
+            # Como el seek de Whisper: el último segmento puede estar cortado, se vuelve a decodificar en la ventana siguiente
+            kept = segments[:-1]
+            advance = min(len(audio), int(kept[-1]["end"] * session.sample_rate))
+            # Avance mínimo de media ventana: si lo completo acaba antes, se publica la ventana entera; si no, con marcas
+            # de tiempo cercanas a 0 la sesión avanzaría casi muestra a muestra
+            if advance >= window // 2:
+                segments = kept
+            else:
+                advance = len(audio)
+        start_seconds = position / session.sample_rate
+        text = "".join(segment["text"] for segment in segments)
+        if text.strip():
+            yield start_seconds, start_seconds + advance / session.sample_rate, text
+            prompt = text
+        position += advance
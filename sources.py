@@ -0,0 +1,13 @@
+class AudioSource:
+    # Un dispositivo capturado con sus propios idiomas; el buffer y el espectrograma los asigna su grabador
+    def __init__(self, label, device=None, input_language=None, output_language=None, ring_buffer=None, mel_frontend=None):
+        self.label = label
+        self.device = device
+        self.input_language = input_language
+        self.output_language = output_language
+        self.ring_buffer = ring_buffer
+        self.mel_frontend = mel_frontend
+
+    def tag(self, text):
+        # Con varias fuentes cada línea de salida indica de cuál viene
+        return f"[{self.label}] {text}" if self.label else text
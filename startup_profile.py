@@ -0,0 +1,55 @@
+import builtins
+import sys
+import threading
+import time
+
+HEAVY_MODULES = ("torch", "whisper", "googletrans", "speech_recognition")
+REPORT_TOP = 15
+
+class StartupProfiler:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases = []
+        self.import_times = {}
+        self._stack = []
+        self._original_import = None
+
+    def install_import_timer(self):
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+
+    def uninstall_import_timer(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        # Solo se mide el hilo principal; la precarga del modelo corre en paralelo en otro hilo
+        if level or name in sys.modules or threading.current_thread() is not threading.main_thread():
+            return self._original_import(name, globals, locals, fromlist, level)
+
+        # Tiempo propio de cada import nuevo (sin contar sus imports anidados), agrupado por paquete raíz
+        self._stack.append(0.0)
+        t0 = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - t0
+            children = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += elapsed
+            package = name.partition(".")[0]
+            self.import_times[package] = self.import_times.get(package, 0.0) + elapsed - children
+
+    def phase(self, name):
+        loaded = [module for module in HEAVY_MODULES if module in sys.modules]
+        self.phases.append((name, time.perf_counter() - self.start, loaded))
+
+    def report(self):
+        lines = ["Informe de arranque:"]
+        for name, elapsed, loaded in self.phases:
+            lines.append(f"  {elapsed * 1000:8.1f} ms  {name} (módulos pesados: {', '.join(loaded) if loaded else 'ninguno'})")
+        lines.append("Tiempo de import por paquete:")
+        for package, elapsed in sorted(self.import_times.items(), key=lambda item: item[1], reverse=True)[:REPORT_TOP]:
+            lines.append(f"  {elapsed * 1000:8.1f} ms  {package}")
+        return "\n".join(lines)
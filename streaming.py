@@ -0,0 +1,90 @@
+SAMPLE_RATE = 16000
+TRIM_WINDOW_DURATION = 12  # A partir de aquí se recorta la ventana tras el último texto confirmado
+MAX_WINDOW_DURATION = 25  # Límite duro, por debajo de los 30 s de Whisper
+PROMPT_CHARS = 200
+
+def normalize_word(text):
+    return text.strip().lower().strip(".,;:!?¿¡\"'")
+
+def words_text(words):
+    return "".join(word[2] for word in words)
+
+class HypothesisBuffer:
+    def __init__(self):
+        self.committed_in_buffer = []
+        self.buffer = []
+        self.new = []
+        self.last_committed_time = 0
+
+    def insert(self, words, offset):
+        new = [(start + offset, end + offset, text) for start, end, text in words]
+        self.new = [word for word in new if word[0] > self.last_committed_time - 0.1]
+
+        # Se descartan las palabras iniciales que repiten el final de lo ya confirmado
+        if self.new and self.committed_in_buffer and abs(self.new[0][0] - self.last_committed_time) < 1:
+            for n in range(min(len(self.committed_in_buffer), len(self.new), 5), 0, -1):
+                committed_tail = [normalize_word(w[2]) for w in self.committed_in_buffer[-n:]]
+                new_head = [normalize_word(w[2]) for w in self.new[:n]]
+                if committed_tail == new_head:
+                    del self.new[:n]
+                    break
+
+    def flush(self):
+        # Política de acuerdo local: se confirma el prefijo común de las dos últimas hipótesis
+        commit = []
+        while self.new and self.buffer and normalize_word(self.new[0][2]) == normalize_word(self.buffer[0][2]):
+            word = self.new.pop(0)
+            self.buffer.pop(0)
+            commit.append(word)
+            self.last_committed_time = word[1]
+        self.buffer = self.new
+        self.new = []
+        self.committed_in_buffer.extend(commit)
+        return commit
+
+    def pop_committed(self, time):
+        popped = []
+        while self.committed_in_buffer and self.committed_in_buffer[0][1] <= time:
+            popped.append(self.committed_in_buffer.pop(0))
+        return popped
+
+class StreamingTranscriber:
+    def __init__(self, transcribe_words, start_index=0, sample_rate=SAMPLE_RATE, trim_window=TRIM_WINDOW_DURATION, max_window=MAX_WINDOW_DURATION):
+        self.transcribe_words = transcribe_words
+        self.sample_rate = sample_rate
+        self.trim_window = trim_window
+        self.max_window = max_window
+        self.window_start = start_index
+        self.hypothesis = HypothesisBuffer()
+        self.prompt = ""
+
+    def process(self, audio):
+        offset = self.window_start / self.sample_rate
+        words = self.transcribe_words(audio, self.prompt, self.window_start)
+        self.hypothesis.insert(words, offset)
+        committed = self.hypothesis.flush()
+
+        duration = len(audio) / self.sample_rate
+        if duration > self.max_window:
+            # La ventana no llegó a estabilizarse: se confirma lo pendiente y se reinicia
+            pending = self.hypothesis.buffer
+            self.hypothesis.buffer = []
+            self.hypothesis.committed_in_buffer.extend(pending)
+            committed += pending
+            end_time = (self.window_start + len(audio)) / self.sample_rate
+            self.hypothesis.last_committed_time = end_time
+            self.trim(end_time)
+        elif duration > self.trim_window and self.hypothesis.committed_in_buffer:
+            self.trim(self.hypothesis.committed_in_buffer[-1][1])
+        return committed, list(self.hypothesis.buffer)
+
+    def trim(self, time):
+        # El texto que sale de la ventana pasa a ser el contexto (prompt) de las siguientes decodificaciones
+        popped = self.hypothesis.pop_committed(time)
+        self.prompt = (self.prompt + words_text(popped))[-PROMPT_CHARS:]
+        self.window_start = max(self.window_start, int(time * self.sample_rate))
+
+    def finish(self):
+        remaining = self.hypothesis.buffer
+        self.hypothesis.buffer = []
+        return remaining
@@ -0,0 +1,44 @@
+import queue
+import types
+from audio_processor import AudioProcessorThread, SourceStream
+
+
+class RecordingStage:
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, text, src, dest, **options):
+        self.submitted.append((text, options["start"], options["end"]))
+
+
+def make_processor():
+    return types.SimpleNamespace(message_queue=queue.Queue(), translation_stage=RecordingStage(), transcriber_name=lambda: "base")
+
+
+def make_stream():
+    source = types.SimpleNamespace(input_language="es", output_language="en", label=None)
+    return SourceStream(source, types.SimpleNamespace(window_start=0.0))
+
+
+def test_sentence_is_split_at_last_sentence_end():
+    processor = make_processor()
+    stream = make_stream()
+
+    words = [(0.0, 0.5, " Es"), (0.5, 1.0, " el"), (1.0, 1.4, " fin."), (1.6, 1.9, " Y"), (1.9, 2.3, " luego")]
+    AudioProcessorThread.publish_stream(processor, stream, words, [])
+    assert processor.translation_stage.submitted == [("Es el fin.", 0.0, 1.4)]
+
+    AudioProcessorThread.publish_stream(processor, stream, [(2.3, 2.8, " vino?")], [])
+    assert processor.translation_stage.submitted[-1] == ("Y luego vino?", 1.6, 2.8)
+
+
+def test_final_flushes_unfinished_sentence():
+    processor = make_processor()
+    stream = make_stream()
+
+    AudioProcessorThread.publish_stream(processor, stream, [(0.0, 0.4, " hola"), (0.4, 0.9, " mundo")], [])
+    assert processor.translation_stage.submitted == []
+
+    AudioProcessorThread.publish_stream(processor, stream, [], [], final=True)
+    assert processor.translation_stage.submitted == [("hola mundo", 0.0, 0.9)]
+    assert stream.pending_words == []
@@ -0,0 +1,60 @@
+import json
+import os
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+import batch_transcribe
+from batch_transcribe import output_names, transcribed_files, main
+
+def test_same_name_in_different_directories_does_not_collide(tmp_path):
+    files = [str(tmp_path / "a" / "clase.wav"), str(tmp_path / "b" / "clase.wav"), str(tmp_path / "b" / "clase.flac")]
+    assert output_names(files) == {
+        files[0]: os.path.join("a", "clase"),
+        files[1]: os.path.join("b", "clase"),
+        files[2]: os.path.join("b", "clase-1"),
+    }
+
+def test_single_directory_keeps_the_base_name(tmp_path):
+    files = [str(tmp_path / "uno.wav"), str(tmp_path / "dos.wav")]
+    assert output_names(files) == {files[0]: "uno", files[1]: "dos"}
+
+def test_rejects_zero_workers(tmp_path):
+    with pytest.raises(SystemExit):
+        main([str(tmp_path), "--workers", "0"])
+
+def test_rerun_skips_files_already_in_the_jsonl(tmp_path):
+    audio = tmp_path / "audio"
+    audio.mkdir()
+    (audio / "uno.wav").write_bytes(b"")
+    output = tmp_path / "salida"
+    output.mkdir()
+    with open(output / "transcripciones.jsonl", "w", encoding="utf-8") as f:
+        f.write(json.dumps({"file": str(audio / "uno.wav"), "text": "hola"}) + "\n")
+        f.write('{"file": "cortado')
+    assert transcribed_files(str(output / "transcripciones.jsonl")) == {str(audio / "uno.wav")}
+    # Nada pendiente: no se arranca ningún proceso ni se añaden registros
+    assert main([str(audio), "--output-dir", str(output)]) == 0
+    assert len((output / "transcripciones.jsonl").read_text(encoding="utf-8").splitlines()) == 2
+
+class InlineExecutor(ThreadPoolExecutor):
+    # Sin procesos ni modelo: transcribe_file se sustituye en la prueba
+    def __init__(self, max_workers, mp_context=None, initializer=None, initargs=()):
+        super().__init__(max_workers)
+
+class FailingTranslator:
+    def translate_many(self, texts, src, dest):
+        raise ConnectionError("429 Too Many Requests")
+
+def test_translation_failure_still_writes_the_transcript(tmp_path, monkeypatch):
+    audio = tmp_path / "audio"
+    audio.mkdir()
+    (audio / "uno.wav").write_bytes(b"")
+    output = tmp_path / "salida"
+    result = {"file": str(audio / "uno.wav"), "language": "es", "duration": 2.0, "elapsed": 1.0, "segments": [{"start": 0.0, "end": 2.0, "text": "hola"}]}
+    monkeypatch.setattr(batch_transcribe, "ProcessPoolExecutor", InlineExecutor)
+    monkeypatch.setattr(batch_transcribe, "transcribe_file", lambda path: result)
+    monkeypatch.setattr(batch_transcribe.translation_cache, "get_cached_translator", lambda backend: FailingTranslator())
+    assert main([str(audio), "--output-dir", str(output), "--target", "en"]) == 1
+    assert (output / "uno.srt").read_text(encoding="utf-8").strip().endswith("hola")
+    assert not (output / "uno.en.srt").exists()
+    records = [json.loads(line) for line in (output / "transcripciones.jsonl").read_text(encoding="utf-8").splitlines()]
+    assert records == [{"file": str(audio / "uno.wav"), "model": "small", "language": "es", "start": 0.0, "end": 2.0, "text": "hola"}]
@@ -0,0 +1,75 @@
+import queue
+import numpy as np
+import pytest
+from chunk_queue import BoundedAudioQueue, FairAudioQueue, COALESCE, DROP_OLDEST, SAMPLE_RATE, POLICY_ENV, MAXSIZE_ENV, queue_options
+from ring_buffer import AudioRingBuffer, AudioChunk
+from sources import AudioSource
+
+def fill(ring_buffer, seconds):
+    ring_buffer.write(np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32))
+
+def test_queued_chunks_stay_readable_when_ring_wraps():
+    # 6 fragmentos de 28 s superan los 120 s del buffer: lo que no cabe se descarta y se cuenta
+    ring_buffer = AudioRingBuffer(120 * SAMPLE_RATE)
+    audio_queue = BoundedAudioQueue(maxsize=6, policy=COALESCE)
+    chunk_samples = 28 * SAMPLE_RATE
+    for i in range(6):
+        fill(ring_buffer, 28)
+        audio_queue.put(AudioChunk(ring_buffer, i * chunk_samples, (i + 1) * chunk_samples))
+
+    queued_samples = 0
+    while not audio_queue.empty():
+        chunk = audio_queue.get_nowait()
+        chunk.data()
+        queued_samples += len(chunk)
+    assert audio_queue.dropped_chunks > 0
+    assert queued_samples + audio_queue.dropped_samples == 6 * chunk_samples
+    assert queued_samples <= ring_buffer.capacity - 28 * SAMPLE_RATE
+
+def test_overwritten_chunk_is_counted_not_returned():
+    ring_buffer = AudioRingBuffer(10 * SAMPLE_RATE)
+    audio_queue = BoundedAudioQueue(in_flight_samples=0)
+    fill(ring_buffer, 2)
+    audio_queue.put(AudioChunk(ring_buffer, 0, 2 * SAMPLE_RATE))
+    # El productor avanza más que el buffer sin que nadie consuma
+    fill(ring_buffer, 12)
+    with pytest.raises(queue.Empty):
+        audio_queue.get_nowait()
+    assert audio_queue.dropped_chunks == 1
+
+def test_coalesce_merges_oldest_pair_when_full():
+    ring_buffer = AudioRingBuffer(120 * SAMPLE_RATE)
+    audio_queue = BoundedAudioQueue(maxsize=2, policy=COALESCE)
+    fill(ring_buffer, 15)
+    for i in range(3):
+        audio_queue.put(AudioChunk(ring_buffer, i * 5 * SAMPLE_RATE, (i + 1) * 5 * SAMPLE_RATE))
+    first = audio_queue.get_nowait()
+    assert (first.start, first.end) == (0, 10 * SAMPLE_RATE)
+    assert audio_queue.coalesced_chunks == 1
+    assert audio_queue.dropped_chunks == 0
+
+def test_drop_oldest_policy():
+    ring_buffer = AudioRingBuffer(120 * SAMPLE_RATE)
+    audio_queue = BoundedAudioQueue(maxsize=2, policy=DROP_OLDEST)
+    fill(ring_buffer, 3)
+    for i in range(3):
+        audio_queue.put(AudioChunk(ring_buffer, i * SAMPLE_RATE, (i + 1) * SAMPLE_RATE))
+    assert audio_queue.get_nowait().start == SAMPLE_RATE
+    assert audio_queue.dropped_chunks == 1
+
+def test_fair_queue_round_robin():
+    ring_buffer = AudioRingBuffer(60 * SAMPLE_RATE)
+    fill(ring_buffer, 10)
+    a, b = AudioSource("A"), AudioSource("B")
+    fair_queue = FairAudioQueue()
+    for i in range(3):
+        fair_queue.put(AudioChunk(ring_buffer, i * SAMPLE_RATE, (i + 1) * SAMPLE_RATE, a))
+    fair_queue.put(AudioChunk(ring_buffer, 0, SAMPLE_RATE, b))
+    order = [fair_queue.get_nowait().source.label for _ in range(4)]
+    assert order == ["A", "B", "A", "A"]
+
+def test_queue_options_from_the_environment():
+    assert queue_options({}) == {}
+    assert queue_options({POLICY_ENV: DROP_OLDEST, MAXSIZE_ENV: "12"}) == {"policy": DROP_OLDEST, "maxsize": 12}
+    # Valores no válidos: se mantienen los de por defecto
+    assert queue_options({POLICY_ENV: "lifo", MAXSIZE_ENV: "0"}) == {}
@@ -0,0 +1,43 @@
+import sys
+import types
+from dataclasses import dataclass, field
+import inference
+
+@dataclass
+class Result:
+    text: str
+    avg_logprob: float
+    no_speech_prob: float
+    compression_ratio: float
+    temperature: float = 0.0
+    tokens: list = field(default_factory=lambda: [1, 2])
+
+def fake_whisper(monkeypatch, results):
+    # Devuelve un resultado por temperatura, en orden
+    calls = []
+    def decode(model, mel, options):
+        calls.append(options.temperature)
+        return results[len(calls) - 1]
+    module = types.SimpleNamespace(decode=decode, DecodingOptions=lambda **options: types.SimpleNamespace(**options))
+    monkeypatch.setitem(sys.modules, "whisper", module)
+    return calls
+
+def test_silence_is_dropped_without_fallback(monkeypatch):
+    calls = fake_whisper(monkeypatch, [Result("Gracias por ver el video.", -1.4, 0.9, 1.2)])
+    result = inference.decode_with_fallback(None, None, "es")
+    assert result.text == "" and result.tokens == []
+    assert calls == [0.0]
+
+def test_repetitive_output_retries_at_higher_temperature(monkeypatch):
+    calls = fake_whisper(monkeypatch, [
+        Result("sí sí sí sí sí sí sí sí", -0.3, 0.1, 3.5),
+        Result("sí, claro", -0.4, 0.1, 1.1, temperature=0.2),
+    ])
+    result = inference.decode_with_fallback(None, None, "es")
+    assert result.text == "sí, claro"
+    assert calls == [0.0, 0.2]
+
+def test_confident_speech_is_kept(monkeypatch):
+    calls = fake_whisper(monkeypatch, [Result("hola", -0.2, 0.7, 1.0)])
+    assert inference.decode_with_fallback(None, None, "es").text == "hola"
+    assert calls == [0.0]
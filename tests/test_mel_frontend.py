@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+from mel_frontend import IncrementalLogMel, normalize_log_mel, N_FFT, HOP_LENGTH, LOG_FLOOR
+
+def reference_log_mel(audio, filters):
+    # torch.stft(center=True) con reflexión, como whisper.log_mel_spectrogram, sin normalizar
+    padded = np.pad(audio, N_FFT // 2, mode="reflect")
+    frames = np.lib.stride_tricks.sliding_window_view(padded, N_FFT)[::HOP_LENGTH]
+    hann = 0.5 - 0.5 * np.cos(2 * np.pi * np.arange(N_FFT) / N_FFT)
+    power = np.abs(np.fft.rfft(frames * hann, axis=1)) ** 2
+    return np.log10(np.maximum(filters @ power.T, 1e-10))[:, :-1]
+
+@pytest.mark.parametrize("n_mels", [80, 128])
+def test_blockwise_frames_match_a_single_stft(n_mels):
+    rng = np.random.default_rng(0)
+    filters = rng.random((n_mels, N_FFT // 2 + 1)).astype(np.float32) / 100
+    audio = (rng.standard_normal(16000 * 3) * 0.1).astype(np.float32)
+    frontend = IncrementalLogMel(1000, n_mels, filters=filters)
+    # Bloques de 30 ms a 16 kHz, y uno inicial más corto que el relleno por reflexión
+    frontend.append(audio[:100])
+    for start in range(100, len(audio), 480):
+        frontend.append(audio[start:start + 480])
+    expected = reference_log_mel(audio, filters)
+    computed = frontend.frame_count
+    assert computed >= expected.shape[1] - 2
+    np.testing.assert_allclose(frontend.raw_frames(0, computed), expected[:, :computed], atol=1e-3)
+
+def test_window_pads_missing_frames_and_wraps():
+    rng = np.random.default_rng(1)
+    filters = rng.random((80, N_FFT // 2 + 1)).astype(np.float32) / 100
+    frontend = IncrementalLogMel(200, 80, filters=filters)
+    frontend.append((rng.standard_normal(HOP_LENGTH * 450) * 0.1).astype(np.float32))
+    with pytest.raises(ValueError):
+        frontend.raw_frames(0, 10)
+    mel, frames = frontend.window(HOP_LENGTH * 300, HOP_LENGTH * 460, n_frames=300, timeout=0)
+    assert mel.shape == (80, 300)
+    assert frames == 160
+    # Tramas 300-449 a través del final del buffer circular; las que aún no tienen audio quedan en silencio
+    available = frontend.frame_count - 300
+    raw = np.full((80, 300), LOG_FLOOR, dtype=np.float32)
+    raw[:, :available] = frontend.raw_frames(300, 300 + available)
+    np.testing.assert_allclose(mel, normalize_log_mel(raw))
@@ -0,0 +1,31 @@
+from metrics import PipelineMetrics, PrometheusFileWriter
+
+
+def test_label_values_are_escaped():
+    metrics = PipelineMetrics()
+    metrics.set_gauge("queue_depth", 2, source='mic "USB"\\1\nB')
+    metrics.observe('asr"x', 0.2)
+
+    text = metrics.to_prometheus()
+
+    assert 'audio_translator_queue_depth{source="mic \\"USB\\"\\\\1\\nB"} 2' in text
+    assert 'stage="asr\\"x"' in text
+    # Cada muestra sigue ocupando una sola línea
+    assert all(not line.startswith("B") for line in text.splitlines())
+
+
+def test_writer_stops_and_restarts(tmp_path):
+    path = tmp_path / "metrics.prom"
+    metrics = PipelineMetrics()
+    writer = PrometheusFileWriter(str(path), metrics=metrics, interval=60)
+
+    writer.start()
+    writer.stop()
+    assert writer._thread is None
+    assert path.exists()
+
+    metrics.increment("segments")
+    writer.start()
+    assert writer._thread.is_alive()
+    writer.stop()
+    assert "segments_total 1" in path.read_text(encoding="utf-8")
@@ -0,0 +1,51 @@
+import argparse
+import types
+import pytest
+import model_cache
+from model_cache import ModelCache
+
+MB = 1024 * 1024
+
+@pytest.fixture
+def cache(monkeypatch):
+    # Sin whisper: cada "modelo" ocupa 1 MB y se carga al instante
+    monkeypatch.setattr(model_cache, "model_size_bytes", lambda model: MB)
+    cache = ModelCache(memory_budget_mb=1, idle_timeout=None)
+    monkeypatch.setattr(cache, "_load", lambda name, device, precision: types.SimpleNamespace(name=name))
+    return cache
+
+def test_idle_eviction_skips_models_in_use(cache):
+    cache.idle_timeout = 0
+    cache.acquire("tiny", device="cpu")
+    cache.get("base", device="cpu")
+    assert cache.evict_idle() == [("base", "cpu", "fp32")]
+    assert cache.is_loaded("tiny", device="cpu")
+    cache.release("tiny", device="cpu")
+    assert cache.evict_idle() == [("tiny", "cpu", "fp32")]
+
+def test_budget_eviction_skips_models_in_use(cache):
+    tiny = cache.acquire("tiny", device="cpu")
+    cache.get("base", device="cpu")
+    # tiny es el menos reciente pero está en uso: el presupuesto se excede antes que cargar una segunda copia
+    assert cache.loaded_models() == [("tiny", "cpu", "fp32"), ("base", "cpu", "fp32")]
+    assert cache.acquire("tiny", device="cpu") is tiny
+    cache.release("tiny", device="cpu")
+    cache.release("tiny", device="cpu")
+    cache.get("small", device="cpu")
+    assert cache.loaded_models() == [("small", "cpu", "fp32")]
+
+def test_configure_from_command_line(monkeypatch):
+    monkeypatch.setattr(model_cache, "_default_cache", ModelCache())
+    parser = argparse.ArgumentParser()
+    model_cache.add_arguments(parser)
+
+    cache = model_cache.configure_from_args(parser.parse_args(["--model-memory-mb", "512", "--model-idle-timeout", "0"]))
+    assert cache is model_cache.get_model_cache()
+    assert cache.memory_budget == 512 * MB
+    assert cache.idle_timeout is None
+
+    # Sin opciones se conservan los valores actuales
+    model_cache.configure_from_args(parser.parse_args([]))
+    assert cache.memory_budget == 512 * MB
+    with pytest.raises(SystemExit):
+        parser.parse_args(["--model-memory-mb", "-1"])
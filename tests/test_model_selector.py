@@ -0,0 +1,52 @@
+import types
+import pytest
+import model_cache
+import model_selector
+from model_selector import AdaptiveModelController, model_ladder, DOWN_PATIENCE, UP_PATIENCE, COOLDOWN, RETRY_DELAY
+
+@pytest.fixture(autouse=True)
+def loaded_models(monkeypatch):
+    # Todos los modelos están en caché: los cambios son inmediatos y no se carga nada
+    cache = types.SimpleNamespace(is_loaded=lambda name: True)
+    monkeypatch.setattr(model_cache, "get_model_cache", lambda: cache)
+
+def observe_until_switch(controller, rtf, limit=200):
+    for _ in range(limit):
+        name = controller.observe(rtf, 0.0)
+        if name is not None:
+            return name
+    return None
+
+def test_ladder():
+    assert model_ladder("small", "tiny") == ["tiny", "base", "small"]
+    assert model_ladder("small-int8", "base") == ["base-int8", "small-int8"]
+
+def test_steps_down_after_patience():
+    controller = AdaptiveModelController(["tiny", "base", "small"], "small")
+    for _ in range(DOWN_PATIENCE - 1):
+        assert controller.observe(2.0, 0.0) is None
+    assert controller.observe(2.0, 0.0) == "base"
+
+def test_steps_down_on_lag_even_with_good_rtf():
+    controller = AdaptiveModelController(["base", "small"], "small")
+    names = [controller.observe(0.5, model_selector.MAX_LAG + 1) for _ in range(DOWN_PATIENCE)]
+    assert names[-1] == "base"
+
+def test_steps_up_when_fast():
+    controller = AdaptiveModelController(["tiny", "base"], "tiny")
+    assert observe_until_switch(controller, 0.1, UP_PATIENCE) == "base"
+
+def test_slow_model_is_retried_after_delay():
+    controller = AdaptiveModelController(["base", "small"], "small")
+    assert observe_until_switch(controller, 2.0) == "base"
+    # El modelo pequeño va holgado, pero small acaba de medirse lento: no se sube enseguida
+    observations = 0
+    name = None
+    while name is None and observations < 500:
+        name = controller.observe(0.1, 0.0)
+        observations += 1
+    assert name == "small"
+    assert observations > COOLDOWN + UP_PATIENCE + RETRY_DELAY
+    # Y tras volver a medirse lento se baja otra vez, y se vuelve a reintentar más tarde
+    assert observe_until_switch(controller, 2.0) == "base"
+    assert observe_until_switch(controller, 0.1, 500) == "small"
@@ -0,0 +1,44 @@
+import types
+import pytest
+import model_cache
+from model_cache import ModelCache
+from model_warmup import ModelWarmupThread
+
+class FakeModel:
+    dims = types.SimpleNamespace(n_mels=80)
+
+    def __init__(self, fail=False):
+        self.fail = fail
+
+    def transcribe(self, audio, **options):
+        if self.fail:
+            raise RuntimeError("sin memoria")
+        return {"text": ""}
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = ModelCache(idle_timeout=0)
+    monkeypatch.setattr(model_cache, "model_size_bytes", lambda model: 1)
+    monkeypatch.setattr(model_cache, "default_device", lambda: "cpu")
+    monkeypatch.setattr(model_cache, "get_model_cache", lambda: cache)
+    return cache
+
+def test_pinned_warmup_survives_idle_eviction(cache, monkeypatch):
+    monkeypatch.setattr(cache, "_load", lambda name, device, precision: FakeModel())
+    ready = []
+    thread = ModelWarmupThread("tiny", "es", pin=True)
+    thread.ready.connect(lambda name, n_mels: ready.append((name, n_mels)))
+    thread.run()
+    assert ready == [("tiny", 80)]
+    assert cache.evict_idle() == []
+    model_cache.release_model("tiny")
+    assert len(cache.evict_idle()) == 1
+
+def test_failed_warmup_releases_its_pin(cache, monkeypatch):
+    monkeypatch.setattr(cache, "_load", lambda name, device, precision: FakeModel(fail=True))
+    failed = []
+    thread = ModelWarmupThread("tiny", "es", pin=True)
+    thread.failed.connect(lambda name, error: failed.append(error))
+    thread.run()
+    assert failed == ["sin memoria"]
+    assert len(cache.evict_idle()) == 1
@@ -0,0 +1,37 @@
+import parallel_transcribe
+from parallel_transcribe import plan_pieces, TranscriptStitcher, memory_workers, MAX_PIECE_SECONDS, OVERLAP_SECONDS
+
+SR = 16000
+
+def test_cuts_at_the_clear_silence_nearest_the_target():
+    silences = [(40 * SR, int(40.4 * SR)), (59 * SR, 60 * SR), (75 * SR, 77 * SR)]
+    # El silencio a los 40 s es más corto que CLEAR_SILENCE_SECONDS y el de los 76 s queda más lejos de PIECE_SECONDS
+    assert plan_pieces(140 * SR, silences, SR) == [(0, int(59.5 * SR)), (int(59.5 * SR), 140 * SR)]
+
+def test_continuous_speech_is_cut_with_overlap():
+    pieces = plan_pieces(200 * SR, [], SR)
+    assert pieces[0] == (0, MAX_PIECE_SECONDS * SR)
+    assert pieces[1][0] == int((MAX_PIECE_SECONDS - OVERLAP_SECONDS) * SR)
+    assert pieces[-1][1] == 200 * SR
+
+def test_stitcher_drops_words_repeated_in_the_overlap():
+    stitcher = TranscriptStitcher()
+    first = stitcher.add(0.0, [{"start": 80.0, "end": 90.0, "text": " y entonces fuimos a la playa"}])
+    # La pieza siguiente empieza 2 s antes del final de la anterior
+    second = stitcher.add(88.0, [
+        {"start": 0.0, "end": 1.5, "text": " la playa"},
+        {"start": 0.5, "end": 3.0, "text": " la playa, que estaba llena"},
+        {"start": 3.0, "end": 5.0, "text": " de gente."},
+    ])
+    assert first == [{"start": 80.0, "end": 90.0, "text": "y entonces fuimos a la playa"}]
+    assert second == [
+        {"start": 90.0, "end": 91.0, "text": "que estaba llena"},
+        {"start": 91.0, "end": 93.0, "text": "de gente."},
+    ]
+
+def test_workers_are_capped_by_free_memory(monkeypatch):
+    monkeypatch.setattr(parallel_transcribe, "available_memory", lambda: 3 * 1024 ** 3)
+    assert memory_workers("large") == 1
+    assert memory_workers("tiny") == 4
+    monkeypatch.setattr(parallel_transcribe, "available_memory", lambda: None)
+    assert memory_workers("large") is None
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+from resampler import StreamingResampler
+
+@pytest.mark.parametrize("rate", [44100, 48000])
+def test_blockwise_output_matches_one_pass(rate):
+    rng = np.random.default_rng(0)
+    audio = rng.standard_normal((rate, 2)).astype(np.float32) * 0.1
+    whole = StreamingResampler(rate, 16000, 2)
+    expected = np.concatenate([whole.process(audio), whole.flush()])
+    blocks = StreamingResampler(rate, 16000, 2)
+    # Bloques de 30 ms como los del grabador, intercalados con bloques cortos irregulares
+    sizes = [int(rate * 0.03), 7] * rate
+    bounds = np.cumsum([0] + sizes)
+    parts = [blocks.process(audio[start:end]) for start, end in zip(bounds, bounds[1:]) if start < len(audio)]
+    parts.append(blocks.flush())
+    np.testing.assert_allclose(np.concatenate(parts), expected, atol=1e-5)
+
+@pytest.mark.parametrize("rate", [44100, 48000])
+def test_tone_survives_resampling(rate):
+    t = np.arange(rate) / rate
+    tone = np.sin(2 * np.pi * 440 * t).astype(np.float32)
+    resampler = StreamingResampler(rate, 16000)
+    output = np.concatenate([resampler.process(tone), resampler.flush()])
+    # flush() añade la cola del filtro tras la última muestra
+    assert len(output) >= 16000
+    reference = np.sin(2 * np.pi * 440 * np.arange(len(output)) / 16000)
+    # Lejos de los bordes, donde el filtro ve ceros
+    middle = slice(1000, 15000)
+    assert np.max(np.abs(output[middle] - reference[middle])) < 1e-2
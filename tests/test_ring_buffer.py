@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+from ring_buffer import AudioRingBuffer
+
+def test_window_across_the_wrap_is_contiguous():
+    ring = AudioRingBuffer(10)
+    ring.write(np.arange(7, dtype=np.float32))
+    ring.write(np.arange(7, 14, dtype=np.float32))
+    window = ring.read(5, 14)
+    np.testing.assert_array_equal(window, np.arange(5, 14))
+    # Vista sobre el buffer espejo, sin copia
+    assert window.base is not None
+
+def test_overwritten_samples_cannot_be_read():
+    ring = AudioRingBuffer(10)
+    ring.write(np.arange(25, dtype=np.float32))
+    assert ring.oldest_index == 15
+    np.testing.assert_array_equal(ring.read(15, 25), np.arange(15, 25))
+    with pytest.raises(ValueError):
+        ring.read(14, 20)
+    with pytest.raises(ValueError):
+        ring.read(20, 26)
+
+def test_block_larger_than_capacity_keeps_the_newest_samples():
+    ring = AudioRingBuffer(8)
+    ring.write(np.arange(3, dtype=np.float32))
+    ring.write(np.arange(3, 23, dtype=np.float32))
+    assert ring.write_index == 23
+    np.testing.assert_array_equal(ring.read(15, 23), np.arange(15, 23))
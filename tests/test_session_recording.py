@@ -0,0 +1,34 @@
+import numpy as np
+from session_recording import SessionRecording, transcribe_session
+
+SR = 16000
+
+class EarlySegmentsModel:
+    # Dos segmentos pegados al principio de cada ventana: el caso que dejaba la sesión avanzando muestra a muestra
+    def __init__(self):
+        self.calls = 0
+
+    def transcribe(self, audio, **options):
+        self.calls += 1
+        return {"segments": [{"start": 0.0, "end": 0.0, "text": " hola"}, {"start": 0.0, "end": 0.5, "text": " mundo"}]}
+
+def make_session(tmp_path, seconds, segment_seconds=10):
+    session = SessionRecording.create(base_dir=str(tmp_path), sample_rate=SR, segment_seconds=segment_seconds)
+    session.write(np.zeros(int(seconds * SR), dtype=np.float32))
+    session.close()
+    return session
+
+def test_advances_at_least_half_a_window(tmp_path):
+    session = make_session(tmp_path, 95)
+    model = EarlySegmentsModel()
+    windows = list(transcribe_session(model, session, "es"))
+    assert model.calls == 4
+    assert [start for start, _, _ in windows] == [0, 30, 60, 90]
+    assert windows[0][2] == " hola mundo"
+
+def test_maps_behind_the_read_position_are_released(tmp_path):
+    session = make_session(tmp_path, 35)
+    session.read(0, SR)
+    session.read(12 * SR, 13 * SR)
+    session.read(25 * SR, 26 * SR)
+    assert list(session._maps) == [2]
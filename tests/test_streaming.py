@@ -0,0 +1,56 @@
+import numpy as np
+from streaming import StreamingTranscriber, words_text
+
+SR = 16000
+
+class Script:
+    # Devuelve las hipótesis dadas, en orden, y registra la ventana y el prompt de cada llamada
+    def __init__(self, *hypotheses):
+        self.hypotheses = list(hypotheses)
+        self.calls = []
+
+    def __call__(self, audio, prompt, start_index):
+        self.calls.append((len(audio), prompt, start_index))
+        return self.hypotheses.pop(0)
+
+def audio(seconds):
+    return np.zeros(int(seconds * SR), dtype=np.float32)
+
+def test_commits_the_prefix_two_hypotheses_agree_on():
+    script = Script(
+        [(0.0, 0.4, " Hola"), (0.4, 0.8, " mundo")],
+        [(0.0, 0.4, " hola"), (0.4, 0.8, " mundo,"), (0.8, 1.2, " qué")],
+        [(0.0, 0.4, " hola"), (0.4, 0.8, " mundo"), (0.8, 1.2, " qué"), (1.2, 1.6, " tal")],
+    )
+    transcriber = StreamingTranscriber(script)
+    assert transcriber.process(audio(1)) == ([], [(0.0, 0.4, " Hola"), (0.4, 0.8, " mundo")])
+    committed, provisional = transcriber.process(audio(1.5))
+    assert words_text(committed) == " hola mundo,"
+    assert provisional == [(0.8, 1.2, " qué")]
+    # Lo ya confirmado no se repite al volver a decodificarlo
+    committed, provisional = transcriber.process(audio(2))
+    assert words_text(committed) == " qué"
+    assert provisional == [(1.2, 1.6, " tal")]
+    assert transcriber.finish() == [(1.2, 1.6, " tal")]
+
+def test_long_window_is_trimmed_after_committed_text():
+    words = [(float(i), i + 0.5, f" w{i}") for i in range(13)]
+    script = Script(words, words, [])
+    transcriber = StreamingTranscriber(script, trim_window=12)
+    transcriber.process(audio(13))
+    committed, _ = transcriber.process(audio(13))
+    assert len(committed) == 13
+    # La ventana empieza tras la última palabra confirmada, que pasa al prompt
+    assert transcriber.window_start == int(12.5 * SR)
+    transcriber.process(audio(1))
+    assert script.calls[-1][1].endswith(" w11 w12")
+    assert script.calls[-1][2] == int(12.5 * SR)
+
+def test_unstable_window_is_committed_at_the_hard_limit():
+    script = Script([(0.0, 1.0, " uno")], [(0.0, 1.0, " otro")])
+    transcriber = StreamingTranscriber(script, max_window=25)
+    transcriber.process(audio(10))
+    committed, provisional = transcriber.process(audio(26))
+    assert committed == [(0.0, 1.0, " otro")]
+    assert provisional == []
+    assert transcriber.window_start == 26 * SR
@@ -0,0 +1,58 @@
+import types
+import pytest
+from transcript_store import TranscriptStore, fts_query
+from translation_worker import TranslationRequest
+from audio_processor import AudioProcessorThread
+
+@pytest.fixture
+def store(tmp_path):
+    store = TranscriptStore(str(tmp_path / "transcripts.sqlite3"), batch_size=3, flush_interval=30)
+    yield store
+    store.close()
+
+def test_segments_are_written_in_batches_until_flush(store, monkeypatch):
+    batches = []
+    write_batch = store._write_batch
+    monkeypatch.setattr(store, "_write_batch", lambda db, batch: batches.append(len(batch)) or write_batch(db, batch))
+    session_id = store.start_session("small", ["Micrófono"])
+    for i in range(6):
+        store.add_segment(session_id, f"frase {i}", start=float(i), end=i + 1.0)
+    # La sesión y los seis segmentos: lotes llenos; flush() cierra el último aunque no lo esté
+    assert store.flush(timeout=5)
+    assert batches == [3, 3, 2]
+    assert store.written == 6
+
+def test_search_matches_prefixes_without_accents_and_highlights(store):
+    session_id = store.start_session("small", ["Micrófono"])
+    store.add_segment(session_id, "La reunión empieza mañana", "The meeting starts tomorrow", 1.0, 3.0, "Micrófono", "es", "en", "small")
+    store.add_segment(session_id, "Otro tema", None, 4.0, 5.0)
+    store.flush(timeout=5)
+    results = store.search("reunion mana")
+    assert len(results) == 1
+    assert results[0]["session_id"] == session_id
+    assert "[reunión]" in results[0]["snippet"]
+    assert store.search("meet")[0]["translation"] == "The meeting starts tomorrow"
+    # La sintaxis de FTS del usuario no se interpreta
+    assert fts_query('tema" OR *') == '"tema"""* "OR"* "*"*'
+    assert store.search('tema" OR *') == []
+
+def test_session_segments_in_order(store):
+    session_id = store.start_session("base", ["A", "B"])
+    other = store.start_session("base", ["A"])
+    store.add_segment(session_id, "uno", start=0.0, end=1.0, source="A")
+    store.add_segment(other, "ajeno")
+    store.add_segment(session_id, "dos", start=1.0, end=2.0, source="B")
+    store.flush(timeout=5)
+    assert [segment["text"] for segment in store.session_segments(session_id)] == ["uno", "dos"]
+    sessions = {session["id"]: session for session in store.sessions()}
+    assert sessions[session_id]["segments"] == 2
+    assert sessions[session_id]["sources"] == "A, B"
+
+def test_stored_model_is_the_one_that_transcribed(store):
+    # La traducción llega después de que adapt_model cambiara de modelo
+    session_id = store.start_session("small")
+    processor = types.SimpleNamespace(transcript_store=store, session_id=session_id, default_source=types.SimpleNamespace(label=None, device=None), transcriber_name=lambda: "base")
+    request = TranslationRequest(0, "hola", "es", "en", "chunk", model="small")
+    AudioProcessorThread.store_segment(processor, request, "hello", None)
+    store.flush(timeout=5)
+    assert store.session_segments(session_id)[0]["model"] == "small"
@@ -0,0 +1,55 @@
+import translation_cache
+from translation_cache import CachedTranslator
+from translators import StubTranslatorBackend
+
+class CountingTranslator(StubTranslatorBackend):
+    def __init__(self):
+        super().__init__()
+        self.texts = []
+
+    def translate_many(self, texts, src, dest):
+        self.texts.extend(texts)
+        return super().translate_many(texts, src, dest)
+
+def test_repeated_text_is_served_from_memory(tmp_path):
+    translator = CountingTranslator()
+    cache = CachedTranslator(translator, path=str(tmp_path / "translations.sqlite3"))
+    assert cache.translate_many(["hola", " hola ", "adiós"], "es", "en") == ["[es->en] hola", "[es->en] hola", "[es->en] adiós"]
+    # Una sola llamada y sin repetir "hola"
+    assert translator.texts == ["hola", "adiós"]
+    assert cache.translate("hola", "es", "en") == "[es->en] hola"
+    assert translator.requests == 1
+    assert cache.stats()["memory_hits"] == 1
+    # Otro par de idiomas es otra entrada
+    cache.translate("hola", "es", "pt")
+    assert translator.requests == 2
+    cache.close()
+
+def test_translations_survive_a_restart(tmp_path):
+    path = str(tmp_path / "translations.sqlite3")
+    first = CachedTranslator(CountingTranslator(), path=path)
+    first.translate("buenos días", "es", "en")
+    first.close()
+    translator = CountingTranslator()
+    second = CachedTranslator(translator, path=path)
+    assert second.translate("buenos días", "es", "en") == "[es->en] buenos días"
+    assert translator.requests == 0
+    assert second.stats()["disk_hits"] == 1
+    second.close()
+
+def test_expired_translations_are_requested_again(tmp_path, monkeypatch):
+    path = str(tmp_path / "translations.sqlite3")
+    now = [1000.0]
+    monkeypatch.setattr(translation_cache.time, "time", lambda: now[0])
+    translator = CountingTranslator()
+    cache = CachedTranslator(translator, path=path, ttl=60)
+    cache.translate("hola", "es", "en")
+    now[0] += 61
+    cache.translate("hola", "es", "en")
+    assert translator.requests == 2
+    cache.close()
+    # Al abrir de nuevo se borran las filas caducadas
+    now[0] += 61
+    reopened = CachedTranslator(CountingTranslator(), path=path, ttl=60)
+    assert reopened._db.execute("SELECT COUNT(*) FROM translations").fetchone()[0] == 0
+    reopened.close()
@@ -0,0 +1,73 @@
+import threading
+import time
+from translators import StubTranslatorBackend
+from translation_worker import TranslationStage
+
+class GatedTranslator(StubTranslatorBackend):
+    # Los textos que empiezan por "espera" no terminan hasta que se abre la puerta
+    def __init__(self):
+        super().__init__()
+        self.gate = threading.Event()
+        self.batches = []
+        self.finished = []
+
+    def translate_many(self, texts, src, dest):
+        self.batches.append(list(texts))
+        if texts[0].startswith("espera"):
+            assert self.gate.wait(5)
+        if src == "xx":
+            raise ConnectionError("429 Too Many Requests")
+        self.finished.extend(texts)
+        return super().translate_many(texts, src, dest)
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+def collect():
+    results = []
+    return results, lambda request, translation, error: results.append((request.text, translation, error))
+
+def test_results_are_delivered_in_submission_order():
+    translator = GatedTranslator()
+    results, on_result = collect()
+    stage = TranslationStage(translator, on_result, max_workers=2, batch_size=1)
+    stage.submit("espera uno", "es", "en")
+    stage.submit("dos", "es", "en")
+    # El segundo termina antes, pero no se entrega hasta que llega el primero
+    wait_until(lambda: translator.finished == ["dos"])
+    assert results == []
+    translator.gate.set()
+    stage.close()
+    assert [text for text, _, _ in results] == ["espera uno", "dos"]
+    assert results[1][1] == "[es->en] dos"
+
+def test_pending_requests_travel_in_one_batch():
+    translator = GatedTranslator()
+    results, on_result = collect()
+    stage = TranslationStage(translator, on_result, max_workers=1, batch_size=8)
+    stage.submit("espera", "es", "en")
+    wait_until(lambda: len(translator.batches) == 1)
+    # Con el único hilo ocupado, las siguientes se acumulan
+    for text in ("a", "b", "c"):
+        stage.submit(text, "es", "en")
+    translator.gate.set()
+    stage.close()
+    assert translator.batches == [["espera"], ["a", "b", "c"]]
+    assert len(results) == 4
+
+def test_errors_are_reported_and_do_not_block_later_results():
+    translator = GatedTranslator()
+    results, on_result = collect()
+    stage = TranslationStage(translator, on_result, max_workers=1, batch_size=8)
+    stage.submit("hola", "xx", "en")
+    stage.submit("igual", "es", "es")
+    stage.submit("adiós", "es", "en")
+    stage.close()
+    assert [text for text, _, _ in results] == ["hola", "igual", "adiós"]
+    assert isinstance(results[0][2], ConnectionError) and results[0][1] is None
+    # Mismo idioma: se entrega sin traducir y sin llamar al traductor
+    assert results[1][1:] == (None, None)
+    assert results[2][1:] == ("[es->en] adiós", None)
@@ -0,0 +1,54 @@
+import numpy as np
+import queue
+import vad
+from ring_buffer import AudioRingBuffer
+from vad import EnergyVAD, SAMPLE_RATE
+
+def noise(seconds, level, rng):
+    return (rng.standard_normal(int(SAMPLE_RATE * seconds)) * level).astype(np.float32)
+
+def voiced(seconds, level):
+    # Vocal sostenida: armónicos graves, pocos cruces por cero
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    return (level * (np.sin(2 * np.pi * 150 * t) + 0.5 * np.sin(2 * np.pi * 300 * t))).astype(np.float32)
+
+def frame_by_frame(vad, samples):
+    # Como VADSegmenterThread: una trama por llamada
+    return np.concatenate([vad.is_speech(samples[i:i + vad.frame_length]) for i in range(0, len(samples) - vad.frame_length + 1, vad.frame_length)])
+
+def test_sustained_speech_does_not_raise_the_floor():
+    rng = np.random.default_rng(0)
+    vad = EnergyVAD()
+    assert not frame_by_frame(vad, noise(2, 0.001, rng)).any()
+    speech = frame_by_frame(vad, voiced(20, 0.05) + noise(20, 0.001, rng))
+    assert speech.all()
+    assert vad.noise_floor_db < -45
+
+def test_floor_follows_silence_between_phrases():
+    rng = np.random.default_rng(1)
+    vad = EnergyVAD()
+    frame_by_frame(vad, noise(2, 0.001, rng))
+    frame_by_frame(vad, voiced(5, 0.05))
+    # Ruido de fondo algo más alto, pero por debajo del umbral: el suelo lo sigue
+    assert not frame_by_frame(vad, noise(3, 0.002, rng)).any()
+    assert abs(vad.noise_floor_db - 20 * np.log10(0.002)) < 2
+
+def test_silero_falls_back_to_energy_when_it_cannot_load(monkeypatch):
+    def unavailable(sample_rate):
+        raise ImportError("No module named 'torch'")
+    monkeypatch.setattr(vad, "SileroVAD", unavailable)
+    assert isinstance(vad.create_vad("silero"), EnergyVAD)
+
+def test_segmenter_thread_builds_the_selected_vad(monkeypatch):
+    created = []
+    monkeypatch.setattr(vad, "create_vad", lambda kind, sample_rate: created.append(kind) or EnergyVAD(sample_rate))
+    ring = AudioRingBuffer(SAMPLE_RATE)
+    thread = vad.VADSegmenterThread(ring, queue.Queue(), vad_kind="silero")
+    # Sin audio: la primera espera detiene el hilo y run() sale tras crear el detector
+    original_wait = ring.wait_for
+    def wait_and_stop(index, timeout=None):
+        thread.is_running = False
+        return original_wait(index, 0)
+    monkeypatch.setattr(ring, "wait_for", wait_and_stop)
+    thread.run()
+    assert created == ["silero"]
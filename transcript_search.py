@@ -0,0 +1,75 @@
+import time
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QLineEdit, QListWidget, QListWidgetItem, QTextEdit, QLabel
+from PyQt5.QtCore import QTimer, Qt
+from transcript_store import SEARCH_LIMIT
+
+SEARCH_DELAY = 250  # ms sin teclear antes de consultar la base de datos
+
+def format_offset(seconds):
+    if seconds is None:
+        return "--:--"
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
+
+class TranscriptSearchDialog(QDialog):
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.setWindowTitle("Buscar en transcripciones anteriores")
+        self.resize(700, 600)
+        layout = QVBoxLayout()
+
+        self.searchEdit = QLineEdit()
+        self.searchEdit.setPlaceholderText("Palabras del original o de la traducción")
+        self.searchEdit.textChanged.connect(lambda: self.searchTimer.start(SEARCH_DELAY))
+        layout.addWidget(self.searchEdit)
+
+        self.countLabel = QLabel("")
+        layout.addWidget(self.countLabel)
+
+        # Solo las coincidencias (con un fragmento resaltado), no las sesiones completas
+        self.resultList = QListWidget()
+        self.resultList.currentItemChanged.connect(self.showSession)
+        layout.addWidget(self.resultList)
+
+        # La sesión del resultado elegido se carga bajo demanda
+        self.sessionText = QTextEdit()
+        self.sessionText.setReadOnly(True)
+        layout.addWidget(self.sessionText)
+
+        self.setLayout(layout)
+        self.searchTimer = QTimer()
+        self.searchTimer.setSingleShot(True)
+        self.searchTimer.timeout.connect(self.search)
+
+    def search(self):
+        self.resultList.clear()
+        self.sessionText.clear()
+        query = self.searchEdit.text().strip()
+        if not query:
+            self.countLabel.setText("")
+            return
+        results = self.store.search(query)
+        for result in results:
+            started = time.strftime("%Y-%m-%d %H:%M", time.localtime(result["started_at"]))
+            source = f" [{result['source']}]" if result["source"] else ""
+            item = QListWidgetItem(f"{started} {format_offset(result['start'])}{source}  {result['snippet']}")
+            item.setData(Qt.UserRole, (result["session_id"], result["id"]))
+            self.resultList.addItem(item)
+        self.countLabel.setText(f"{len(results)} resultados" + (" (se muestran los más relevantes)" if len(results) >= SEARCH_LIMIT else ""))
+
+    def showSession(self, item, _previous=None):
+        if item is None:
+            return
+        session_id, segment_id = item.data(Qt.UserRole)
+        lines = []
+        for segment in self.store.session_segments(session_id):
+            marker = "► " if segment["id"] == segment_id else ""
+            source = f"[{segment['source']}] " if segment["source"] else ""
+            lines.append(f"{marker}{format_offset(segment['start'])} {source}{segment['text']}")
+            if segment["translation"]:
+                lines.append(f"      {segment['translation']}")
+        self.sessionText.setPlainText("\n".join(lines))
+        # Desplaza la vista hasta el segmento encontrado
+        self.sessionText.find("► ")
@@ -0,0 +1,172 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+import logging
+
+DEFAULT_STORE_PATH = os.path.join(os.path.expanduser("~"), ".audio_translator", "transcripts.sqlite3")
+WRITE_BATCH_SIZE = 256  # Filas por transacción como máximo
+FLUSH_INTERVAL = 1.0  # Segundos que una fila puede esperar en memoria antes de escribirse
+SEARCH_LIMIT = 100
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS sessions ("
+    "id TEXT PRIMARY KEY, started_at REAL NOT NULL, model TEXT, sources TEXT)",
+    "CREATE TABLE IF NOT EXISTS segments ("
+    "id INTEGER PRIMARY KEY, session_id TEXT NOT NULL REFERENCES sessions(id), "
+    "start REAL, end REAL, source TEXT, language TEXT, target TEXT, "
+    "text TEXT NOT NULL, translation TEXT, model TEXT, created_at REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS segments_session ON segments (session_id, start)",
+    # Índice de texto completo sobre el original y la traducción, sin duplicar el contenido
+    "CREATE VIRTUAL TABLE IF NOT EXISTS segments_fts USING fts5("
+    "text, translation, content='segments', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS segments_ai AFTER INSERT ON segments BEGIN "
+    "INSERT INTO segments_fts (rowid, text, translation) VALUES (new.id, new.text, new.translation); END",
+    "CREATE TRIGGER IF NOT EXISTS segments_ad AFTER DELETE ON segments BEGIN "
+    "INSERT INTO segments_fts (segments_fts, rowid, text, translation) VALUES ('delete', old.id, old.text, old.translation); END",
+)
+
+def fts_query(text):
+    # Cada palabra entre comillas (sin sintaxis FTS del usuario) y como prefijo, para buscar mientras se escribe
+    terms = [term.replace('"', '""') for term in text.split()]
+    return " ".join(f'"{term}"*' for term in terms if term)
+
+class TranscriptStore:
+    def __init__(self, path=DEFAULT_STORE_PATH, batch_size=WRITE_BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self._pending = queue.Queue()
+        self._read_db = None
+        self._read_lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        db = self._connect()
+        for statement in SCHEMA:
+            db.execute(statement)
+        db.commit()
+        db.close()
+        # Un único hilo escribe; quien produce los segmentos solo encola
+        self._writer = threading.Thread(target=self._write_loop, name="transcript-store", daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def start_session(self, model=None, sources=None):
+        session_id = uuid.uuid4().hex
+        self._pending.put(("session", (session_id, time.time(), model, ", ".join(sources or []))))
+        return session_id
+
+    def add_segment(self, session_id, text, translation=None, start=None, end=None, source=None, language=None, target=None, model=None):
+        self._pending.put(("segment", (session_id, start, end, source, language, target, text, translation, model, time.time())))
+
+    def _write_loop(self):
+        db = self._connect()
+        stopping = False
+        while not stopping:
+            item = self._pending.get()
+            if item is None:
+                break
+            batch = [item]
+            # Se acumula hasta llenar el lote o hasta que la primera fila lleve FLUSH_INTERVAL esperando
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and batch[-1][0] != "flush":
+                try:
+                    item = self._pending.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._write_batch(db, batch)
+        db.close()
+
+    def _write_batch(self, db, batch):
+        sessions = [row for kind, row in batch if kind == "session"]
+        segments = [row for kind, row in batch if kind == "segment"]
+        try:
+            # Una transacción por lote: un solo fsync para todas las filas
+            with db:
+                if sessions:
+                    db.executemany("INSERT OR IGNORE INTO sessions VALUES (?, ?, ?, ?)", sessions)
+                if segments:
+                    db.executemany(
+                        "INSERT INTO segments (session_id, start, end, source, language, target, text, translation, model, created_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        segments,
+                    )
+            self.written += len(segments)
+        except sqlite3.Error as e:
+            logging.warning(f"No se pudieron guardar {len(segments)} segmentos de transcripción: {str(e)}")
+        for kind, done in batch:
+            if kind == "flush":
+                done.set()
+
+    def _query(self, sql, params=()):
+        # Conexión de lectura aparte: con WAL las búsquedas no esperan al hilo de escritura
+        with self._read_lock:
+            if self._read_db is None:
+                self._read_db = self._connect()
+                self._read_db.row_factory = sqlite3.Row
+            return [dict(row) for row in self._read_db.execute(sql, params).fetchall()]
+
+    def search(self, text, limit=SEARCH_LIMIT):
+        query = fts_query(text)
+        if not query:
+            return []
+        return self._query(
+            "SELECT s.id, s.session_id, s.start, s.end, s.source, s.language, s.target, s.model, s.created_at, "
+            "s.text, s.translation, ss.started_at, "
+            "snippet(segments_fts, -1, '[', ']', '…', 12) AS snippet "
+            "FROM segments_fts JOIN segments s ON s.id = segments_fts.rowid "
+            "JOIN sessions ss ON ss.id = s.session_id "
+            "WHERE segments_fts MATCH ? ORDER BY rank LIMIT ?",
+            (query, limit),
+        )
+
+    def sessions(self, limit=SEARCH_LIMIT):
+        return self._query(
+            "SELECT ss.id, ss.started_at, ss.model, ss.sources, COUNT(s.id) AS segments "
+            "FROM sessions ss LEFT JOIN segments s ON s.session_id = ss.id "
+            "GROUP BY ss.id ORDER BY ss.started_at DESC LIMIT ?",
+            (limit,),
+        )
+
+    def session_segments(self, session_id):
+        return self._query("SELECT * FROM segments WHERE session_id = ? ORDER BY id", (session_id,))
+
+    def flush(self, timeout=None):
+        # Espera a que lo encolado hasta ahora esté en disco
+        done = threading.Event()
+        self._pending.put(("flush", done))
+        return done.wait(timeout)
+
+    def close(self):
+        self._pending.put(None)
+        self._writer.join()
+        with self._read_lock:
+            if self._read_db is not None:
+                self._read_db.close()
+                self._read_db = None
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+def get_transcript_store(path=DEFAULT_STORE_PATH):
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            try:
+                _default_store = TranscriptStore(path)
+            except sqlite3.Error as e:
+                # Sin base de datos la aplicación sigue funcionando, solo sin historial
+                logging.warning(f"No se pudo abrir el historial de transcripciones en {path}: {str(e)}")
+                return None
+        return _default_store
@@ -0,0 +1,72 @@
+import os
+import time
+import logging
+from PyQt5.QtWidgets import QTextEdit
+from PyQt5.QtGui import QTextCursor
+
+MAX_TRANSCRIPT_BLOCKS = 2000  # Líneas visibles; el resto queda solo en el archivo de la sesión
+DEFAULT_SPILL_DIR = os.path.join(os.path.expanduser("~"), ".audio_translator", "transcripts")
+
+class TranscriptView(QTextEdit):
+    def __init__(self, max_blocks=MAX_TRANSCRIPT_BLOCKS, spill_dir=DEFAULT_SPILL_DIR):
+        super().__init__()
+        self.setReadOnly(True)
+        # Qt descarta los bloques más antiguos, así que cada línea nueva cuesta lo mismo durante toda la sesión
+        self.document().setMaximumBlockCount(max_blocks)
+        self.spill_dir = spill_dir
+        self.spill_file = None
+        self.spill_path = None
+        self.line_open = False
+
+    def start_session(self):
+        self.clear()
+        self.line_open = False
+        self.close_session()
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            self.spill_path = os.path.join(self.spill_dir, time.strftime("sesion-%Y%m%d-%H%M%S.txt"))
+            self.spill_file = open(self.spill_path, "a", encoding="utf-8")
+        except OSError as e:
+            logging.warning(f"No se pudo crear el historial de la sesión: {str(e)}")
+            self.spill_file = None
+
+    def close_session(self):
+        if self.spill_file is not None:
+            self.spill_file.write("\n")
+            self.spill_file.close()
+            self.spill_file = None
+
+    def append_lines(self, entries):
+        # entries: lista de (texto, en_línea); en_línea continúa la última línea abierta si es la misma
+        # (True, o una clave como la fuente, para que dos fuentes no mezclen su texto en una línea)
+        if not entries:
+            return
+        scrollbar = self.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum() - 4
+        cursor = QTextCursor(self.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.beginEditBlock()
+        spilled = []
+        for text, inline in entries:
+            if inline and self.line_open == inline:
+                cursor.insertText(text)
+                spilled.append(text)
+                continue
+            text = text.strip() if inline else text
+            if not self.document().isEmpty():
+                cursor.insertBlock()
+            cursor.insertText(text)
+            spilled.append("\n" + text)
+            self.line_open = inline
+        cursor.endEditBlock()
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())
+
+        if self.spill_file is not None:
+            text = "".join(spilled)
+            self.spill_file.write(text[1:] if self.spill_file.tell() == 0 and text.startswith("\n") else text)
+            self.spill_file.flush()
+
+    def clear(self):
+        super().clear()
+        self.line_open = False
@@ -0,0 +1,123 @@
+import os
+import sqlite3
+import threading
+import time
+import logging
+from collections import OrderedDict
+import translators
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".audio_translator", "translations.sqlite3")
+MEMORY_CACHE_SIZE = 2048
+CACHE_TTL = 30 * 24 * 3600  # Las traducciones caducan a los 30 días
+
+class CachedTranslator:
+    def __init__(self, translator, path=DEFAULT_CACHE_PATH, memory_size=MEMORY_CACHE_SIZE, ttl=CACHE_TTL):
+        self.translator = translator
+        self.memory_size = memory_size
+        self.ttl = ttl
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            self._open(path)
+
+    def _open(self, path):
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                "src TEXT NOT NULL, dest TEXT NOT NULL, text TEXT NOT NULL, "
+                "translation TEXT NOT NULL, created_at REAL NOT NULL, "
+                "PRIMARY KEY (src, dest, text))"
+            )
+            if self.ttl is not None:
+                self._db.execute("DELETE FROM translations WHERE created_at < ?", (time.time() - self.ttl,))
+            self._db.commit()
+        except sqlite3.Error as e:
+            logging.warning(f"No se pudo abrir la caché de traducciones en {path}: {str(e)}")
+            self._db = None
+
+    def translate(self, text, src, dest):
+        return self.translate_many([text], src, dest)[0]
+
+    def translate_many(self, texts, src, dest):
+        keys = [(src, dest, text.strip()) for text in texts]
+        results = [self._lookup(key) for key in keys]
+
+        # Solo los textos que no están en caché van al traductor, en una sola llamada
+        missing = list(OrderedDict.fromkeys(key for key, result in zip(keys, results) if result is None))
+        if missing:
+            translated = dict(zip(missing, self.translator.translate_many([key[2] for key in missing], src, dest)))
+            for key, translation in translated.items():
+                self._store(key, translation)
+            results = [translated[key] if result is None else result for key, result in zip(keys, results)]
+        return results
+
+    def _lookup(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and (self.ttl is None or now - entry[1] < self.ttl):
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return entry[0]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT translation, created_at FROM translations WHERE src = ? AND dest = ? AND text = ?", key
+                ).fetchone()
+                if row is not None and (self.ttl is None or now - row[1] < self.ttl):
+                    self._remember(key, row[0], row[1])
+                    self.disk_hits += 1
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def _store(self, key, translation):
+        now = time.time()
+        with self._lock:
+            self._remember(key, translation, now)
+            if self._db is not None:
+                try:
+                    self._db.execute("INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?)", key + (translation, now))
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    logging.warning(f"No se pudo guardar la traducción en caché: {str(e)}")
+
+    def _remember(self, key, translation, created_at):
+        self._memory[key] = (translation, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def stats(self):
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+_default_translators = {}
+_default_translators_lock = threading.Lock()
+
+def get_cached_translator(backend="google"):
+    with _default_translators_lock:
+        if backend not in _default_translators:
+            translator = translators.create_translator(backend)
+            path = DEFAULT_CACHE_PATH if translator.persistent else None
+            _default_translators[backend] = CachedTranslator(translator, path=path)
+        return _default_translators[backend]
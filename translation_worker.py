@@ -0,0 +1,114 @@
+import itertools
+import queue
+import threading
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from metrics import get_metrics
+
+TRANSLATION_WORKERS = 2
+TRANSLATION_BATCH_SIZE = 8
+
+class TranslationRequest:
+    def __init__(self, seq, text, src, dest, context, source=None, start=None, end=None, model=None):
+        self.seq = seq
+        self.text = text
+        self.src = src
+        self.dest = dest
+        self.context = context
+        self.source = source
+        # Posición del texto en la sesión, en segundos desde el inicio de la captura
+        self.start = start
+        self.end = end
+        # Modelo que transcribió el texto: puede cambiar antes de que llegue la traducción
+        self.model = model
+        self.submitted = time.monotonic()
+
+class TranslationStage:
+    def __init__(self, translator, on_result, max_workers=TRANSLATION_WORKERS, batch_size=TRANSLATION_BATCH_SIZE):
+        self.translator = translator
+        self.on_result = on_result
+        self.batch_size = batch_size
+        self._seq = itertools.count()
+        self._pending = queue.Queue()
+        self._results = {}
+        self._next_seq = 0
+        self._lock = threading.Lock()
+        # Solo se toma un lote cuando hay un hilo libre; mientras tanto las peticiones se acumulan y viajan juntas
+        self._slots = threading.Semaphore(max_workers)
+        self.metrics = get_metrics()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="translation")
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, daemon=True)
+        self._dispatcher.start()
+
+    def submit(self, text, src, dest, context=None, source=None, start=None, end=None, model=None):
+        with self._lock:
+            request = TranslationRequest(next(self._seq), text, src, dest, context, source, start, end, model)
+        if src == dest or not text.strip():
+            self._complete(request, None, None)
+        else:
+            self._pending.put(request)
+            self.metrics.set_gauge("queue_depth", self._pending.qsize(), queue="translation")
+        return request.seq
+
+    def _dispatch_loop(self):
+        while True:
+            self._slots.acquire()
+            request = self._pending.get()
+            if request is None:
+                self._slots.release()
+                break
+            batch = [request]
+            stopping = False
+            while len(batch) < self.batch_size:
+                try:
+                    request = self._pending.get_nowait()
+                except queue.Empty:
+                    break
+                if request is None:
+                    stopping = True
+                    break
+                batch.append(request)
+            self.metrics.set_gauge("queue_depth", self._pending.qsize(), queue="translation")
+            self._executor.submit(self._translate_batch, batch)
+            if stopping:
+                break
+
+    def _translate_batch(self, batch):
+        try:
+            groups = {}
+            for request in batch:
+                groups.setdefault((request.src, request.dest), []).append(request)
+            for (src, dest), requests in groups.items():
+                try:
+                    translations = self.translator.translate_many([r.text for r in requests], src, dest)
+                except Exception as e:
+                    logging.error(f"Error en la traducción de {src} a {dest}: {str(e)}")
+                    for request in requests:
+                        self._complete(request, None, e)
+                    continue
+                now = time.monotonic()
+                for request, translation in zip(requests, translations):
+                    self.metrics.observe("translation", now - request.submitted)
+                    self._complete(request, translation, None)
+                self.metrics.increment("segments_translated", len(requests))
+                self.metrics.increment("translation_requests")
+        finally:
+            self._slots.release()
+
+    def _complete(self, request, translation, error):
+        # Los resultados se entregan en orden de llegada aunque terminen desordenados
+        with self._lock:
+            self._results[request.seq] = (request, translation, error)
+            while self._next_seq in self._results:
+                request, translation, error = self._results.pop(self._next_seq)
+                self._next_seq += 1
+                try:
+                    self.on_result(request, translation, error)
+                except Exception as e:
+                    logging.error(f"Error al entregar la traducción {request.seq}: {str(e)}")
+
+    def close(self):
+        self._pending.put(None)
+        self._dispatcher.join()
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,84 @@
+import time
+import logging
+
+MAX_BATCH_CHARS = 4500  # googletrans rechaza textos de más de 5000 caracteres
+BATCH_SEPARATOR = "\n"
+
+class TranslatorBackend:
+    name = None
+    persistent = True  # Si sus resultados pueden guardarse en la caché en disco
+
+    def translate(self, text, src, dest):
+        return self.translate_many([text], src, dest)[0]
+
+    def translate_many(self, texts, src, dest):
+        raise NotImplementedError
+
+class GoogleTranslatorBackend(TranslatorBackend):
+    name = "google"
+
+    def __init__(self):
+        self.translator = None
+
+    def client(self):
+        # googletrans se importa al traducir por primera vez, fuera del arranque de la interfaz
+        if self.translator is None:
+            from googletrans import Translator
+            self.translator = Translator()
+        return self.translator
+
+    def translate_many(self, texts, src, dest):
+        results = []
+        for batch in self._batches(texts):
+            results.extend(self._translate_batch(batch, src, dest))
+        return results
+
+    def _batches(self, texts):
+        batch, size = [], 0
+        for text in texts:
+            text = text.replace(BATCH_SEPARATOR, " ")
+            if batch and size + len(text) + 1 > MAX_BATCH_CHARS:
+                yield batch
+                batch, size = [], 0
+            batch.append(text)
+            size += len(text) + 1
+        if batch:
+            yield batch
+
+    def _translate_batch(self, batch, src, dest):
+        translator = self.client()
+        if len(batch) == 1:
+            return [translator.translate(batch[0], src=src, dest=dest).text]
+
+        # Una sola petición con los textos separados por líneas
+        translated = translator.translate(BATCH_SEPARATOR.join(batch), src=src, dest=dest).text
+        lines = translated.split(BATCH_SEPARATOR)
+        if len(lines) == len(batch):
+            return lines
+        logging.warning("La traducción por lotes no conservó las líneas; se traduce texto a texto")
+        return [translator.translate(text, src=src, dest=dest).text for text in batch]
+
+class StubTranslatorBackend(TranslatorBackend):
+    name = "stub"
+    persistent = False
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.requests = 0
+
+    def translate_many(self, texts, src, dest):
+        # Traducción determinista y sin red, para pruebas y mediciones
+        self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return [f"[{src}->{dest}] {text.strip()}" for text in texts]
+
+BACKENDS = {
+    GoogleTranslatorBackend.name: GoogleTranslatorBackend,
+    StubTranslatorBackend.name: StubTranslatorBackend,
+}
+
+def create_translator(name="google", **options):
+    if name not in BACKENDS:
+        raise ValueError(f"Traductor desconocido: {name}")
+    return BACKENDS[name](**options)
@@ -1,21 +1,63 @@
-import queue
 import soundcard as sc
-from PyQt5.QtWidgets import QWidget, QPushButton, QVBoxLayout, QTextEdit, QComboBox, QLabel
+from PyQt5.QtWidgets import QWidget, QPushButton, QVBoxLayout, QHBoxLayout, QComboBox, QLabel, QCheckBox, QListWidget
 from PyQt5.QtCore import QTimer
-from audio_recorder import AudioRecorderThread
+from audio_recorder import AudioRecorderThread, SAMPLE_RATE, BUFFER_DURATION
 from audio_processor import AudioProcessorThread
+from model_warmup import ModelWarmupThread
+from vad import VADSegmenterThread
+from messages import TranscriptMessage, PROVISIONAL
+from chunk_queue import FairAudioQueue, queue_options
+from metrics import get_metrics, PrometheusFileWriter
+from message_bus import MessageBus
+from transcript_view import TranscriptView
+from mel_frontend import IncrementalLogMel, HOP_LENGTH
+from sources import AudioSource
+from model_selector import AdaptiveModelController, model_ladder
+from transcript_store import get_transcript_store
+from transcript_search import TranscriptSearchDialog
+import model_cache
 import logging
 
+STOP_POLL_INTERVAL = 100  # ms entre comprobaciones de los hilos al detener la grabación
+STAGE_LABELS = (
+    ("capture", "Captura"),
+    ("queue_wait", "Cola"),
+    ("inference", "Inferencia"),
+    ("translation", "Traducción"),
+    ("render", "Interfaz"),
+)
+
 class AudioTranslatorApp(QWidget):
     def __init__(self):
         super().__init__()
         self.initUI()
         self.is_recording = False
-        self.message_queue = queue.Queue()
-        self.audio_queue = queue.Queue()
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.check_messages)
-        self.timer.start(100)
+        self.metrics = get_metrics()
+        # Los hilos publican mensajes en el bus y la interfaz los recibe por señal, agrupados por fotograma
+        self.message_queue = MessageBus(metrics=self.metrics)
+        self.message_queue.delivered.connect(self.showMessages)
+        # Una cola por fuente, atendidas por turnos por el único hilo de inferencia; se crea en cada sesión
+        self.audio_queue = None
+        self.audio_threads = []
+        self.segmenter_threads = []
+        self.processor_thread = None
+        # Etapas pendientes al detener: cada una espera a que la anterior haya terminado
+        self.stop_stages = []
+        self.stop_timer = QTimer()
+        self.stop_timer.timeout.connect(self.advanceStop)
+        self.provisional_texts = {}
+        self.inline_source = None
+        self.ready_model = None
+        # Modelo preparado que se mantiene fijado en la caché mientras esté seleccionado
+        self.held_model = None
+        self.ready_n_mels = None
+        self.warmup_threads = []
+        # Las estadísticas y el archivo de métricas de Prometheus se refrescan solo mientras se graba
+        self.stats_timer = QTimer()
+        self.stats_timer.timeout.connect(self.updateStats)
+        self.prometheus_writer = PrometheusFileWriter(metrics=self.metrics)
+        # Se prepara el modelo cuando la ventana ya está visible
+        QTimer.singleShot(0, self.warmUpModel)
 
     def initUI(self):
         layout = QVBoxLayout()
@@ -41,14 +83,83 @@ class AudioTranslatorApp(QWidget):
         layout.addWidget(QLabel("Seleccione el idioma de salida:"))
         layout.addWidget(self.outputLanguageCombo)
 
+        # Varias fuentes a la vez (p. ej. los dos lados de una llamada), todas con el mismo modelo
+        self.source_specs = []
+        self.sourceList = QListWidget()
+        self.sourceList.setMaximumHeight(90)
+        sourceButtons = QHBoxLayout()
+        self.addSourceButton = QPushButton("Añadir fuente")
+        self.addSourceButton.clicked.connect(self.addSource)
+        sourceButtons.addWidget(self.addSourceButton)
+        self.removeSourceButton = QPushButton("Quitar fuente")
+        self.removeSourceButton.clicked.connect(self.removeSource)
+        sourceButtons.addWidget(self.removeSourceButton)
+        layout.addWidget(QLabel("Fuentes (si no hay ninguna se graba el dispositivo seleccionado):"))
+        layout.addWidget(self.sourceList)
+        layout.addLayout(sourceButtons)
+
+        self.modelCombo = QComboBox()
+        for model_name in model_cache.MODEL_CHOICES:
+            self.modelCombo.addItem(model_name)
+        self.modelCombo.currentTextChanged.connect(self.warmUpModel)
+        layout.addWidget(QLabel("Seleccione el modelo:"))
+        layout.addWidget(self.modelCombo)
+
+        # El modelo seleccionado es el máximo; si no se mantiene en tiempo real se baja hasta este mínimo
+        self.adaptiveCheck = QCheckBox("Ajustar el modelo a la velocidad del equipo")
+        layout.addWidget(self.adaptiveCheck)
+        self.minModelCombo = QComboBox()
+        for model_name in model_cache.MODEL_NAMES:
+            self.minModelCombo.addItem(model_name)
+        layout.addWidget(QLabel("Modelo mínimo:"))
+        layout.addWidget(self.minModelCombo)
+
+        self.vadCheck = QCheckBox("Segmentar por pausas de voz (VAD)")
+        self.vadCheck.setChecked(True)
+        layout.addWidget(self.vadCheck)
+
+        # Detector de voz con un modelo pequeño (Silero); sin torch o sin red se usa el de energía
+        self.sileroCheck = QCheckBox("Detectar la voz con Silero VAD (más preciso con ruido)")
+        self.sileroCheck.setChecked(False)
+        layout.addWidget(self.sileroCheck)
+
+        self.streamingCheck = QCheckBox("Subtítulos en tiempo real (streaming)")
+        layout.addWidget(self.streamingCheck)
+
+        self.melCheck = QCheckBox("Calcular el espectrograma durante la captura")
+        self.melCheck.setChecked(True)
+        layout.addWidget(self.melCheck)
+
+        self.contextCheck = QCheckBox("Contexto de audio dinámico (no procesar el relleno hasta 30 s)")
+        layout.addWidget(self.contextCheck)
+
         self.recordButton = QPushButton('Iniciar Grabación')
         self.recordButton.clicked.connect(self.toggleRecording)
+        self.recordButton.setEnabled(False)
         layout.addWidget(self.recordButton)
 
-        self.resultText = QTextEdit()
-        self.resultText.setReadOnly(True)
+        # Historial de sesiones anteriores guardado en SQLite
+        self.searchButton = QPushButton("Buscar en transcripciones anteriores")
+        self.searchButton.clicked.connect(self.openSearch)
+        layout.addWidget(self.searchButton)
+
+        self.statusLabel = QLabel("Preparando modelo...")
+        layout.addWidget(self.statusLabel)
+
+        self.resultText = TranscriptView()
         layout.addWidget(self.resultText)
 
+        # Texto aún no confirmado del modo streaming
+        self.provisionalLabel = QLabel("")
+        self.provisionalLabel.setWordWrap(True)
+        self.provisionalLabel.setStyleSheet("color: #9a9a9a; font-style: italic;")
+        layout.addWidget(self.provisionalLabel)
+
+        # Panel de estadísticas por etapa del pipeline
+        self.statsLabel = QLabel("")
+        self.statsLabel.setStyleSheet("font-family: monospace; font-size: 12px; color: #b0b0b0;")
+        layout.addWidget(self.statsLabel)
+
         self.setLayout(layout)
         self.setWindowTitle('Grabador y Traductor de Audio Multilingüe')
         self.setGeometry(30, 50, 700, 800)
@@ -86,6 +197,69 @@ class AudioTranslatorApp(QWidget):
 
 
 
+    def warmUpModel(self):
+        model_name = self.modelCombo.currentText()
+        self.ready_model = None
+        self.holdModel(None)
+        if not self.is_recording:
+            self.recordButton.setEnabled(False)
+
+        thread = ModelWarmupThread(model_name, self.inputLanguageCombo.currentData(), pin=True)
+        thread.progress.connect(self.onWarmupProgress)
+        thread.ready.connect(self.onModelReady)
+        thread.failed.connect(self.onModelFailed)
+        thread.finished.connect(lambda: self.warmup_threads.remove(thread))
+        self.warmup_threads.append(thread)
+        thread.start()
+
+    def onWarmupProgress(self, percent, message):
+        self.statusLabel.setText(f"{message} ({percent}%)")
+
+    def onModelReady(self, model_name, n_mels):
+        # Se ignoran preparaciones de un modelo que ya no está seleccionado
+        if model_name != self.modelCombo.currentText():
+            model_cache.release_model(model_name)
+            return
+        self.holdModel(model_name)
+        self.ready_model = model_name
+        self.ready_n_mels = n_mels
+        self.statusLabel.setText(f"Modelo {model_name} listo")
+        if not self.is_recording:
+            self.recordButton.setEnabled(True)
+
+    def holdModel(self, model_name):
+        # Sin esta referencia la limpieza por inactividad descargaría el modelo con el botón de grabar activo
+        if self.held_model is not None:
+            model_cache.release_model(self.held_model)
+        self.held_model = model_name
+
+    def onModelFailed(self, model_name, error):
+        if model_name == self.modelCombo.currentText():
+            self.statusLabel.setText(f"Error al cargar el modelo {model_name}: {error}")
+
+    def addSource(self):
+        speaker = self.speakers[self.deviceCombo.currentIndex()]
+        input_language = self.inputLanguageCombo.currentData()
+        output_language = self.outputLanguageCombo.currentData()
+        self.source_specs.append((speaker, input_language, output_language))
+        self.sourceList.addItem(f"{speaker.name} ({input_language} → {output_language})")
+
+    def removeSource(self):
+        row = self.sourceList.currentRow()
+        if row >= 0:
+            self.sourceList.takeItem(row)
+            del self.source_specs[row]
+
+    def setControlsEnabled(self, enabled):
+        for widget in (self.modelCombo, self.adaptiveCheck, self.minModelCombo, self.vadCheck, self.sileroCheck, self.streamingCheck, self.melCheck, self.contextCheck, self.addSourceButton, self.removeSourceButton):
+            widget.setEnabled(enabled)
+
+    def createMelFrontend(self):
+        if not self.melCheck.isChecked():
+            return None
+        # El calentamiento informa cuántas bandas mel espera el modelo: no se toca la caché desde el hilo de la interfaz
+        return IncrementalLogMel(SAMPLE_RATE * BUFFER_DURATION // HOP_LENGTH, self.ready_n_mels)
+
     def toggleRecording(self):
         if not self.is_recording:
             self.startRecording()
@@ -95,39 +269,139 @@ class AudioTranslatorApp(QWidget):
     def startRecording(self):
         self.is_recording = True
         self.recordButton.setText('Detener Grabación')
-        self.resultText.clear()
-        self.resultText.append("Grabando...")
+        self.setControlsEnabled(False)
+        self.resultText.start_session()
+        self.provisional_texts = {}
+        self.inline_source = None
+        self.resultText.append_lines([("Grabando...", False)])
+        self.stats_timer.start(1000)
+        self.prometheus_writer.start()
 
-        selected_speaker = self.speakers[self.deviceCombo.currentIndex()]
         input_language = self.inputLanguageCombo.currentData()
         output_language = self.outputLanguageCombo.currentData()
+        specs = self.source_specs or [(self.speakers[self.deviceCombo.currentIndex()], input_language, output_language)]
+
+        # Con VAD o streaming el grabador solo llena el buffer y otra etapa decide qué transcribir
+        streaming = self.streamingCheck.isChecked()
+        use_vad = self.vadCheck.isChecked() and not streaming
+        sources = []
+        # Cola nueva en cada sesión: sin colas de fuentes anteriores ni fragmentos sobrantes
+        self.audio_queue = FairAudioQueue(**queue_options())
+        self.audio_threads = []
+        self.segmenter_threads = []
+        for speaker, source_input, source_output in specs:
+            # Con una sola fuente la salida no lleva etiqueta
+            source = AudioSource(speaker.name if len(specs) > 1 else None, speaker, source_input, source_output)
+            recorder = AudioRecorderThread(None if use_vad or streaming else self.audio_queue, speaker, mel_frontend=self.createMelFrontend(), source=source)
+            recorder.start()
+            self.audio_threads.append(recorder)
+            sources.append(source)
+            if use_vad:
+                segmenter = VADSegmenterThread(recorder.ring_buffer, self.audio_queue, source=source, vad_kind="silero" if self.sileroCheck.isChecked() else "energy")
+                segmenter.start()
+                self.segmenter_threads.append(segmenter)
 
-        self.audio_thread = AudioRecorderThread(self.audio_queue, selected_speaker)
-        self.audio_thread.start()
+        model_controller = None
+        if self.adaptiveCheck.isChecked():
+            ladder = model_ladder(self.ready_model, self.minModelCombo.currentText())
+            model_controller = AdaptiveModelController(ladder, self.ready_model)
 
-        self.processor_thread = AudioProcessorThread(self.audio_queue, self.message_queue, input_language, output_language)
+        store = get_transcript_store()
+        session_id = store.start_session(self.ready_model, [speaker.name for speaker, _, _ in specs]) if store is not None else None
+
+        self.processor_thread = AudioProcessorThread(self.audio_queue, self.message_queue, input_language, output_language, self.ready_model, streaming=streaming, audio_context="dynamic" if self.contextCheck.isChecked() else "full", sources=sources, model_controller=model_controller, transcript_store=store, session_id=session_id)
         self.processor_thread.start()
 
     def stopRecording(self):
-        if hasattr(self, 'audio_thread') and self.audio_thread.isRunning():
-            self.audio_thread.stop()
-            self.recordButton.setEnabled(False)
-            self.resultText.append("Finalizando grabación...")
-
-        if hasattr(self, 'processor_thread'):
-            self.processor_thread.stop()
+        self.recordButton.setEnabled(False)
+        self.resultText.append_lines([("Finalizando grabación...", False)])
+        # Primero los grabadores (emiten su último fragmento), luego los segmentadores (emiten el último segmento)
+        # y por último el procesador, que vacía la cola: así nada queda en ella para la sesión siguiente
+        self.stop_stages = [
+            [(thread, thread.stop) for thread in self.audio_threads],
+            [(thread, thread.stop) for thread in self.segmenter_threads],
+        ]
+        if self.processor_thread is not None:
+            processor = self.processor_thread
+            self.stop_stages.append([(processor, lambda: processor.stop(drain=True))])
+        self.stop_timer.start(STOP_POLL_INTERVAL)
+        self.advanceStop()
 
+    def advanceStop(self):
+        while self.stop_stages:
+            stage = self.stop_stages[0]
+            for _, stop in stage:
+                stop()
+            if any(thread.isRunning() for thread, _ in stage):
+                return
+            self.stop_stages.pop(0)
+        self.stop_timer.stop()
         self.onRecordingFinished()
 
-    def check_messages(self):
-        while not self.message_queue.empty():
-            message = self.message_queue.get()
-            self.resultText.append(message)
-            logging.info(f"Mensaje en la interfaz: {message}")
+    def openSearch(self):
+        store = get_transcript_store()
+        if store is None:
+            self.statusLabel.setText("El historial de transcripciones no está disponible")
+            return
+        TranscriptSearchDialog(store, self).exec_()
+
+    def closeEvent(self, event):
+        # Los segmentos pendientes del último lote se escriben antes de salir
+        store = get_transcript_store()
+        if store is not None:
+            store.flush(timeout=2)
+        self.holdModel(None)
+        super().closeEvent(event)
+
+    def showMessages(self, messages):
+        # Un único bloque de edición del documento por lote de mensajes
+        entries = []
+        provisional_changed = False
+        for message in messages:
+            if isinstance(message, TranscriptMessage):
+                if message.kind == PROVISIONAL:
+                    self.provisional_texts[message.source] = message.text
+                    provisional_changed = True
+                    continue
+                # El texto confirmado de cada fuente continúa su propia línea, que empieza con la etiqueta
+                key = message.source or True
+                text = message.text
+                if message.source and self.inline_source != key:
+                    text = f"[{message.source}] {text.strip()}"
+                self.inline_source = key
+                entries.append((text, key))
+                continue
+            self.inline_source = None
+            entries.append((str(message), False))
+        self.resultText.append_lines(entries)
+        if provisional_changed:
+            self.provisionalLabel.setText("\n".join(
+                f"[{source}] {text}" if source else text
+                for source, text in self.provisional_texts.items() if text
+            ))
+        logging.debug(f"{len(messages)} mensajes mostrados en la interfaz")
+
+    def updateStats(self):
+        summary = self.metrics.stage_summary()
+        lines = []
+        for stage, label in STAGE_LABELS:
+            stats = summary.get(stage)
+            if stats and stats["count"]:
+                lines.append(f"{label:<11} p50 {stats['p50'] * 1000:7.0f} ms   p95 {stats['p95'] * 1000:7.0f} ms   n={stats['count']}")
+        audio_depth = self.metrics.gauge("queue_depth", queue="audio") or 0
+        translation_depth = self.metrics.gauge("queue_depth", queue="translation") or 0
+        rtf = self.metrics.gauge("real_time_factor")
+        rtf_text = f"{rtf:.2f}" if rtf is not None else "-"
+        lines.append(f"Cola audio: {audio_depth:g}   Cola traducción: {translation_depth:g}   RTF: {rtf_text}   Descartados: {self.metrics.counter('audio_chunks_dropped'):g}")
+        self.statsLabel.setText("\n".join(lines))
 
     def onRecordingFinished(self):
         self.is_recording = False
         self.recordButton.setText('Iniciar Grabación')
-        self.recordButton.setEnabled(True)
-        self.resultText.append("Grabación finalizada.")
+        self.recordButton.setEnabled(self.ready_model is not None)
+        self.setControlsEnabled(True)
+        self.stats_timer.stop()
+        self.prometheus_writer.stop()
+        self.updateStats()
+        self.resultText.append_lines([("Grabación finalizada.", False)])
         logging.info("Grabación finalizada")
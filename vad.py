@@ -0,0 +1,182 @@
+import numpy as np
+from PyQt5.QtCore import QThread
+import logging
+from ring_buffer import AudioChunk, emit_chunk
+
+SAMPLE_RATE = 16000
+FRAME_DURATION = 0.032  # 512 muestras a 16 kHz, el tamaño que usa también Silero
+MIN_SEGMENT_DURATION = 0.5
+MAX_SEGMENT_DURATION = 20  # Por debajo de la ventana de 30 s de Whisper
+HANGOVER_DURATION = 0.6  # Silencio necesario para cerrar una frase
+PRE_ROLL_DURATION = 0.2  # Audio previo a la voz que se incluye en el segmento
+FLOOR_SMOOTHING = 0.95  # Peso del suelo de ruido anterior frente a cada trama de silencio
+FLOOR_RISE_DB_PER_SECOND = 0.5  # Subida máxima del suelo durante voz continua, para seguir un ruido que aumenta de verdad
+
+class EnergyVAD:
+    def __init__(self, sample_rate=SAMPLE_RATE, frame_duration=FRAME_DURATION, min_energy_db=-50, energy_margin_db=12, zcr_threshold=0.25):
+        self.frame_length = int(sample_rate * frame_duration)
+        self.sample_rate = sample_rate
+        self.min_energy_db = min_energy_db
+        self.energy_margin_db = energy_margin_db
+        self.zcr_threshold = zcr_threshold
+        self.noise_floor_db = None
+
+    def is_speech(self, samples):
+        n_frames = len(samples) // self.frame_length
+        frames = samples[:n_frames * self.frame_length].reshape(n_frames, self.frame_length)
+        if n_frames == 0:
+            return np.zeros(0, dtype=bool)
+
+        energy_db = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / self.frame_length
+
+        # Primera estimación del ruido de fondo; después solo se actualiza trama a trama (ver abajo)
+        if self.noise_floor_db is None:
+            self.noise_floor_db = np.percentile(energy_db, 10)
+        threshold = max(self.min_energy_db, self.noise_floor_db + self.energy_margin_db)
+
+        # Fricativas: poca energía pero muchos cruces por cero
+        fricative = (energy_db > threshold - 6) & (zcr > self.zcr_threshold)
+        speech = (energy_db > threshold) | fricative
+        self.update_floor(energy_db, speech)
+        return speech
+
+    def update_floor(self, energy_db, speech):
+        # El suelo sigue a las tramas de silencio; la voz solo lo empuja muy despacio. Así no depende de
+        # cuántas tramas trae cada llamada (el segmentador pasa una por despertar) y la voz sostenida no lo arrastra
+        rise = FLOOR_RISE_DB_PER_SECOND * self.frame_length / self.sample_rate
+        floor = self.noise_floor_db
+        for energy, is_speech in zip(energy_db, speech):
+            if not is_speech:
+                floor = FLOOR_SMOOTHING * floor + (1 - FLOOR_SMOOTHING) * energy
+            elif energy > floor:
+                floor += rise
+        self.noise_floor_db = floor
+
+class SileroVAD:
+    def __init__(self, sample_rate=SAMPLE_RATE, threshold=0.5):
+        import torch
+        self.torch = torch
+        self.model, _ = torch.hub.load("snakers4/silero-vad", "silero_vad", trust_repo=True)
+        self.sample_rate = sample_rate
+        self.frame_length = 512 if sample_rate == 16000 else 256
+        self.threshold = threshold
+
+    def is_speech(self, samples):
+        n_frames = len(samples) // self.frame_length
+        frames = samples[:n_frames * self.frame_length].reshape(n_frames, self.frame_length)
+        with self.torch.no_grad():
+            probs = [self.model(self.torch.from_numpy(np.ascontiguousarray(frame)), self.sample_rate).item() for frame in frames]
+        return np.asarray(probs) > self.threshold
+
+def create_vad(kind="energy", sample_rate=SAMPLE_RATE):
+    if kind == "silero":
+        try:
+            return SileroVAD(sample_rate)
+        except Exception as e:
+            logging.warning(f"No se pudo cargar Silero VAD, se usa el detector por energía: {str(e)}")
+    return EnergyVAD(sample_rate)
+
+class SpeechSegmenter:
+    def __init__(self, frame_length, sample_rate=SAMPLE_RATE, min_segment=MIN_SEGMENT_DURATION, max_segment=MAX_SEGMENT_DURATION, hangover=HANGOVER_DURATION, pre_roll=PRE_ROLL_DURATION):
+        self.frame_length = frame_length
+        self.min_samples = int(min_segment * sample_rate)
+        self.max_samples = int(max_segment * sample_rate)
+        self.hangover_frames = max(1, int(round(hangover * sample_rate / frame_length)))
+        self.pre_roll = int(pre_roll * sample_rate)
+        self.segment_start = None
+        self.speech_end = None
+        self.silent_frames = 0
+        self.floor_index = 0
+
+    def feed(self, speech_flags, first_index):
+        segments = []
+        for i, is_speech in enumerate(speech_flags):
+            frame_start = first_index + i * self.frame_length
+            frame_end = frame_start + self.frame_length
+            if self.segment_start is None:
+                if is_speech:
+                    self.segment_start = max(self.floor_index, frame_start - self.pre_roll)
+                    self.speech_end = frame_end
+                    self.silent_frames = 0
+                continue
+
+            if is_speech:
+                self.speech_end = frame_end
+                self.silent_frames = 0
+            else:
+                self.silent_frames += 1
+                if self.silent_frames >= self.hangover_frames:
+                    segments.extend(self._close(self.speech_end))
+                    continue
+
+            if frame_end - self.segment_start >= self.max_samples:
+                # Frase demasiado larga: se corta y se continúa en un nuevo segmento
+                segments.extend(self._close(frame_end))
+                self.segment_start = frame_end
+                self.speech_end = frame_end
+        return segments
+
+    def flush(self):
+        if self.segment_start is None:
+            return []
+        return self._close(self.speech_end)
+
+    def _close(self, end):
+        start = self.segment_start
+        self.segment_start = None
+        self.silent_frames = 0
+        self.floor_index = end
+        if end - start < self.min_samples:
+            return []
+        return [(start, end)]
+
+class VADSegmenterThread(QThread):
+    def __init__(self, ring_buffer, audio_queue, vad=None, sample_rate=SAMPLE_RATE, source=None, vad_kind="energy", **segmenter_options):
+        super().__init__()
+        self.ring_buffer = ring_buffer
+        self.audio_queue = audio_queue
+        self.source = source
+        self.sample_rate = sample_rate
+        # Sin vad explícito, el detector se crea en run(): cargar Silero (torch) no debe bloquear la interfaz
+        self.vad = vad
+        self.vad_kind = vad_kind
+        self.segmenter_options = segmenter_options
+        self.segmenter = None
+        self.is_running = False
+        self.speech_samples = 0
+        self.total_samples = 0
+
+    def run(self):
+        self.is_running = True
+        if self.vad is None:
+            self.vad = create_vad(self.vad_kind, self.sample_rate)
+        self.segmenter = SpeechSegmenter(self.vad.frame_length, self.sample_rate, **self.segmenter_options)
+        frame_length = self.vad.frame_length
+        cursor = self.ring_buffer.write_index
+        self.segmenter.floor_index = cursor
+
+        while True:
+            running = self.is_running
+            self.ring_buffer.wait_for(cursor + frame_length, timeout=0.1)
+            available = (self.ring_buffer.write_index - cursor) // frame_length * frame_length
+            if available:
+                flags = self.vad.is_speech(self.ring_buffer.read(cursor, cursor + available))
+                self.speech_samples += int(np.count_nonzero(flags)) * frame_length
+                self.total_samples += available
+                self.emit_segments(self.segmenter.feed(flags, cursor))
+                cursor += available
+            elif not running:
+                break
+
+        self.emit_segments(self.segmenter.flush())
+        if self.total_samples:
+            logging.info(f"VAD: {100 * self.speech_samples / self.total_samples:.0f}% del audio contenía voz")
+
+    def emit_segments(self, segments):
+        for start, end in segments:
+            emit_chunk(self.audio_queue, AudioChunk(self.ring_buffer, start, end, self.source))
+
+    def stop(self):
+        self.is_running = False